@@ -1,15 +1,21 @@
 /**
- * Custom hook for polling job status
+ * Custom hook for following job status
+ *
+ * Subscribes to the server's job event stream (Server-Sent Events), so status
+ * changes arrive as they happen without repeated requests. Falls back to
+ * polling when EventSource is unavailable or the stream cannot be opened.
  */
 
-import { useEffect, useState, useRef, useCallback } from 'react';
+import { useEffect, useState, useRef } from 'react';
 import { getJobStatus } from '../lib/api';
-import { JobResponse, JobStatus } from '../lib/types';
+import { JobResponse } from '../lib/types';
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
 interface UseJobPollingOptions {
     jobId: string | null;
     enabled?: boolean;
-    interval?: number; // milliseconds
+    interval?: number; // milliseconds, polling fallback only
     onComplete?: (job: JobResponse) => void;
     onError?: (error: Error) => void;
 }
@@ -25,6 +31,7 @@ export function useJobPolling({
     const [isPolling, setIsPolling] = useState(false);
     const [error, setError] = useState<Error | null>(null);
     const intervalRef = useRef<NodeJS.Timeout | null>(null);
+    const eventSourceRef = useRef<EventSource | null>(null);
 
     // Use refs to store callbacks to avoid recreating the effect
     const onCompleteRef = useRef(onComplete);
@@ -41,62 +48,93 @@ export function useJobPolling({
             return;
         }
 
+        let finished = false;
+
+        const stop = () => {
+            if (eventSourceRef.current) {
+                eventSourceRef.current.close();
+                eventSourceRef.current = null;
+            }
+            if (intervalRef.current) {
+                clearInterval(intervalRef.current);
+                intervalRef.current = null;
+            }
+        };
+
+        const fail = (err: Error) => {
+            finished = true;
+            stop();
+            setError(err);
+            setIsPolling(false);
+            if (onErrorRef.current) {
+                onErrorRef.current(err);
+            }
+        };
+
+        const handleJob = (jobData: JobResponse) => {
+            setJob(jobData);
+
+            // Stop following once the job is completed or failed
+            if (jobData.status === 'completed' || jobData.status === 'failed') {
+                finished = true;
+                stop();
+                setIsPolling(false);
+
+                if (jobData.status === 'completed' && onCompleteRef.current) {
+                    onCompleteRef.current(jobData);
+                }
+
+                if (jobData.status === 'failed' && jobData.error) {
+                    fail(new Error(jobData.error));
+                }
+            }
+        };
+
         const poll = async () => {
             try {
-                setIsPolling(true);
-                const jobData = await getJobStatus(jobId);
-                setJob(jobData);
-
-                // Stop polling if job is completed or failed
-                if (jobData.status === 'completed' || jobData.status === 'failed') {
-                    if (intervalRef.current) {
-                        clearInterval(intervalRef.current);
-                        intervalRef.current = null;
-                    }
-                    setIsPolling(false);
-
-                    if (jobData.status === 'completed' && onCompleteRef.current) {
-                        onCompleteRef.current(jobData);
-                    }
-
-                    if (jobData.status === 'failed' && jobData.error) {
-                        const err = new Error(jobData.error);
-                        setError(err);
-                        if (onErrorRef.current) {
-                            onErrorRef.current(err);
-                        }
-                    }
-                }
+                handleJob(await getJobStatus(jobId));
             } catch (err) {
-                const error = err instanceof Error ? err : new Error('Failed to fetch job status');
-                setError(error);
-                setIsPolling(false);
-                if (onErrorRef.current) {
-                    onErrorRef.current(error);
-                }
                 // Stop polling on error
-                if (intervalRef.current) {
-                    clearInterval(intervalRef.current);
-                    intervalRef.current = null;
-                }
+                fail(err instanceof Error ? err : new Error('Failed to fetch job status'));
             }
         };
 
-        // Initial poll
-        poll();
+        const startPolling = () => {
+            poll();
+            intervalRef.current = setInterval(poll, interval);
+        };
+
+        setIsPolling(true);
 
-        // Set up polling interval
-        intervalRef.current = setInterval(poll, interval);
+        if (typeof EventSource === 'undefined') {
+            startPolling();
+        } else {
+            const source = new EventSource(`${API_URL}/api/v1/jobs/${jobId}/events`);
+            eventSourceRef.current = source;
+
+            const onMessage = (event: MessageEvent) => {
+                handleJob(JSON.parse(event.data) as JobResponse);
+            };
+            source.addEventListener('status', onMessage);
+            source.addEventListener('progress', onMessage);
+
+            // The server closes the stream after the last status; anything
+            // else (stream unsupported, proxy, network) falls back to polling
+            source.onerror = () => {
+                source.close();
+                eventSourceRef.current = null;
+                if (!finished && !intervalRef.current) {
+                    startPolling();
+                }
+            };
+        }
 
         // Cleanup
         return () => {
-            if (intervalRef.current) {
-                clearInterval(intervalRef.current);
-                intervalRef.current = null;
-            }
+            finished = true;
+            stop();
         };
     }, [jobId, enabled, interval]); // Removed onComplete and onError from dependencies
 
     return { job, isPolling, error };
 }
-
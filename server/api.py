@@ -5,29 +5,159 @@ FastAPI wrapper for CSGT Scraper
 This provides a REST API interface for the traffic violation scraper.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any, List
-from datetime import datetime
-from pathlib import Path
-import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import asyncio
+import itertools
 import json
+import logging
+import os
+import time
+import uuid
 from enum import Enum
 
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
+from csgt_scraper.engine import CrawlEngine
 from csgt_scraper.spiders.csgt_spider import CsgtSpider
+from csgt_scraper.utils.normalize import canonical_plate
+from csgt_scraper.utils.ocr_ensemble import shutdown_ocr_ensembles
+from csgt_scraper.utils.page_store import decompress, get_page_store, is_digest
+from job_events import JobEvents
+from job_queue import JobQueue, QueueFull
+from job_record import JobRecord
+from job_store import open_job_store
+from result_cache import open_result_cache
+
+logger = logging.getLogger(__name__)
+
+# Job storage shared by all API workers (memory://, sqlite:///<path> or redis://...),
+# opened by lifespan, so importing this module creates no database.
+# A running job whose worker sent no heartbeat for JOB_LEASE_SECONDS is requeued.
+JOB_STORE_URL = os.environ.get('JOB_STORE_URL', 'sqlite:///jobs.db')
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 60))
+jobs = None
+
+# Cache of successful lookup results (memory:// or sqlite:///<path>), opened by
+# lifespan with the job store; RESULT_CACHE_TTL=0 disables it
+RESULT_CACHE_URL = os.environ.get('RESULT_CACHE_URL', 'memory://')
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 3600))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 10000))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+result_cache = None
+
+# Pushes job changes to /api/v1/jobs/{job_id}/events subscribers (created with the job store)
+JOB_EVENTS_POLL_INTERVAL = float(os.environ.get('JOB_EVENTS_POLL_INTERVAL', 1.0))
+events = None
+
+# Seconds between keepalive comments on idle event streams
+EVENTS_HEARTBEAT_SECONDS = 15
+
+# Longest ?wait= accepted by the job status endpoints (below proxy read timeouts)
+MAX_WAIT_SECONDS = 30
+
+# One crawl engine per API worker, shared by all jobs
+engine = CrawlEngine()
+
+# Raw results pages the spider could not extract violations from (RAW_PAGE_STORE_DIR
+# setting, opened by lifespan), served by /api/v1/pages/{page_hash} and pruned with the jobs
+page_store = None
+
+
+# Finished jobs are deleted after JOB_RETENTION_SECONDS, and beyond the newest
+# JOB_MAX_FINISHED, checked every JOB_EVICTION_INTERVAL seconds
+JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', 7 * 24 * 3600))
+JOB_MAX_FINISHED = int(os.environ.get('JOB_MAX_FINISHED', 10000))
+JOB_EVICTION_INTERVAL = 300
+
+# Largest batch accepted by POST /api/v1/scrape/batch
+BATCH_MAX_PLATES = int(os.environ.get('BATCH_MAX_PLATES', 5000))
+
+# Seconds between writes of batch progress to the job store
+BATCH_FLUSH_SECONDS = 1.0
+
+
+async def run_job(job: Dict[str, Any]):
+    """Run a job claimed from the queue"""
+    # The queue has marked it running
+    events.publish(job['job_id'], job)
+    try:
+        if job.get('kind') == 'batch':
+            await run_batch(job)
+            return
+        await run_scraper(
+            job['job_id'],
+            job['license_plate'],
+            job['vehicle_type'],
+            job['max_retries'],
+            job.get('lookup_key')
+        )
+    finally:
+        await events.refresh(job['job_id'])
+
+
+# Bounded job queue (created with the job store); each API worker runs
+# QUEUE_WORKERS jobs at a time, at most QUEUE_BATCH_WORKERS of them batch jobs
+QUEUE_WORKERS = int(os.environ.get('QUEUE_WORKERS', 2))
+QUEUE_BATCH_WORKERS = int(os.environ.get('QUEUE_BATCH_WORKERS', max(QUEUE_WORKERS - 1, 1)))
+QUEUE_MAX_DEPTH = int(os.environ.get('QUEUE_MAX_DEPTH', 100))
+queue = None
+
+
+async def evict_jobs():
+    """Apply the job retention policy until cancelled"""
+    while True:
+        try:
+            before = (datetime.now() - timedelta(seconds=JOB_RETENTION_SECONDS)).isoformat()
+            evicted = await asyncio.to_thread(jobs.evict, before=before, keep=JOB_MAX_FINISHED)
+            if evicted:
+                logger.info(f"Evicted {evicted} finished jobs")
+            if page_store is not None:
+                pruned = await asyncio.to_thread(page_store.prune, time.time() - JOB_RETENTION_SECONDS)
+                if pruned:
+                    logger.info(f"Pruned {pruned} raw pages")
+        except Exception:
+            logger.exception("Job eviction failed")
+        await asyncio.sleep(JOB_EVICTION_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the stores, start the crawl engine and queue workers with the API worker and stop them on shutdown"""
+    global jobs, result_cache, page_store, events, queue
+    jobs = open_job_store(JOB_STORE_URL, lease_seconds=JOB_LEASE_SECONDS)
+    result_cache = open_result_cache(
+        RESULT_CACHE_URL, ttl=RESULT_CACHE_TTL, max_entries=RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES
+    )
+    if engine.settings.get('RAW_PAGE_STORE_DIR'):
+        page_store = get_page_store(engine.settings.get('RAW_PAGE_STORE_DIR'))
+    events = JobEvents(jobs, poll_interval=JOB_EVENTS_POLL_INTERVAL)
+    queue = JobQueue(
+        jobs, run_job, workers=QUEUE_WORKERS, max_depth=QUEUE_MAX_DEPTH, batch_workers=QUEUE_BATCH_WORKERS
+    )
+    engine.start()
+    await events.start()
+    await queue.start()
+    eviction = asyncio.ensure_future(evict_jobs())
+    yield
+    eviction.cancel()
+    await queue.stop()
+    await events.stop()
+    await engine.stop()
+    shutdown_ocr_ensembles()
+    result_cache.close()
+    jobs.close()
 
-# Job storage (in production, use Redis or database)
-jobs: Dict[str, Dict[str, Any]] = {}
 
 # FastAPI app
 app = FastAPI(
     title="CSGT Traffic Violation Scraper API",
     description="API for checking traffic violations from Vietnamese traffic police website",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -62,20 +192,44 @@ class JobStatus(str, Enum):
     failed = "failed"
 
 
+# Vehicle type aliases the site treats as the same lookup
+CANONICAL_VEHICLE_TYPES = {
+    "car": "oto",
+    "motorcycle": "xemay",
+    "electric_bike": "xedapdien",
+}
+
+
+def lookup_key(license_plate: str, vehicle_type: str) -> str:
+    """Key identifying identical lookups, e.g. "59C1-360.47" / "59c136047" -> "59C136047:xemay" """
+    return f"{canonical_plate(license_plate)}:{CANONICAL_VEHICLE_TYPES.get(vehicle_type, vehicle_type)}"
+
+
+class JobLane(str, Enum):
+    """Queue priority lane"""
+    interactive = "interactive"
+    batch = "batch"
+
+
 class ScrapeRequest(BaseModel):
     """Request model for scraping job"""
     license_plate: str = Field(..., description="License plate number (e.g., 59C136047)", min_length=1)
     vehicle_type: VehicleType = Field(default=VehicleType.xemay, description="Type of vehicle")
     max_retries: int = Field(default=3, description="Maximum captcha retry attempts", ge=1, le=10)
+    lane: JobLane = Field(default=JobLane.interactive, description="Queue lane; interactive jobs run before batch jobs")
+    max_age: Optional[int] = Field(None, description="Accept a cached result at most this many seconds old (default: cache TTL)", ge=0)
+    force_refresh: bool = Field(default=False, description="Ignore cached results and scrape the site")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "license_plate": "59C136047",
-                "vehicle_type": "xemay",
-                "max_retries": 3
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "license_plate": "59C136047",
+            "vehicle_type": "xemay",
+            "max_retries": 3,
+            "lane": "interactive",
+            "max_age": 600,
+            "force_refresh": False
         }
+    })
 
 
 class JobResponse(BaseModel):
@@ -84,86 +238,327 @@ class JobResponse(BaseModel):
     status: JobStatus = Field(..., description="Current job status")
     message: str = Field(..., description="Status message")
     created_at: str = Field(..., description="Job creation timestamp")
+    queue_position: Optional[int] = Field(None, description="Position in the job queue (1 = next)")
+    coalesced: bool = Field(False, description="Joined an identical lookup that was already queued or running")
+    cached: bool = Field(False, description="Answered from the result cache")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "job_id": "550e8400-e29b-41d4-a716-446655440000",
-                "status": "pending",
-                "message": "Job created successfully",
-                "created_at": "2025-10-15T14:30:00"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "job_id": "550e8400-e29b-41d4-a716-446655440000",
+            "status": "pending",
+            "message": "Job created successfully",
+            "created_at": "2025-10-15T14:30:00",
+            "queue_position": 1,
+            "coalesced": False,
+            "cached": False
         }
+    })
 
 
 class JobResult(BaseModel):
     """Response model for job result"""
     job_id: str
     status: JobStatus
-    license_plate: str
-    vehicle_type: str
+    license_plate: Optional[str] = None
+    vehicle_type: Optional[str] = None
     created_at: str
     completed_at: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    lane: Optional[str] = None
+    queue_position: Optional[int] = None
+    cached: bool = False
+    cache_age: Optional[float] = None
+    kind: str = "lookup"
+    progress: Optional[Dict[str, Any]] = Field(None, description="Latest lookup progress, e.g. captcha attempt")
 
 
-def run_scraper(job_id: str, license_plate: str, vehicle_type: str, max_retries: int):
+class BatchPlate(BaseModel):
+    """One plate of a batch"""
+    license_plate: str = Field(..., description="License plate number", min_length=1)
+    vehicle_type: VehicleType = Field(default=VehicleType.xemay, description="Type of vehicle")
+
+
+class BatchRequest(BaseModel):
+    """Request model for a batch of lookups"""
+    plates: List[BatchPlate] = Field(..., description="Plates to check", min_length=1, max_length=BATCH_MAX_PLATES)
+    max_retries: int = Field(default=3, description="Maximum captcha retry attempts per plate", ge=1, le=10)
+    max_age: Optional[int] = Field(None, description="Accept cached results at most this many seconds old", ge=0)
+    force_refresh: bool = Field(default=False, description="Ignore cached results and scrape every plate")
+    
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "plates": [
+                {"license_plate": "59C136047", "vehicle_type": "xemay"},
+                {"license_plate": "30A12345", "vehicle_type": "oto"}
+            ],
+            "max_retries": 3
+        }
+    })
+
+
+class BatchResponse(BaseModel):
+    """Response model for batch submission"""
+    batch_id: str
+    status: JobStatus
+    message: str
+    created_at: str
+    total: int = Field(..., description="Distinct lookups in the batch")
+    duplicates: int = Field(0, description="Entries dropped as repeats of an earlier plate")
+    queue_position: Optional[int] = None
+
+
+class BatchProgress(BaseModel):
+    """Aggregate progress of a batch"""
+    batch_id: str
+    status: JobStatus
+    created_at: str
+    completed_at: Optional[str] = None
+    total: int
+    completed: int
+    succeeded: int
+    failed: int
+    progress: float = Field(..., description="Percentage of lookups finished")
+    error: Optional[str] = None
+    queue_position: Optional[int] = None
+
+
+class ProgressReporter:
     """
-    Run the scraper in background
+    lookup_progress signal handler recording a job's latest progress
+    
+    Each event is stored on the job (so every API worker sees it) and
+    published to the job's event subscribers. Signals are sent on the event
+    loop, so the store writes run in a thread, one at a time; events that
+    arrive during a write are coalesced into the next one (latest wins).
+    """
+    
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.seq = itertools.count(1)
+        # Latest event not written yet, and the task writing events
+        self.latest = None
+        self.writer = None
+    
+    def __call__(self, spider, license_plate, vehicle_type, stage, signal=None, sender=None, **details):
+        self.latest = {
+            'stage': stage,
+            **details,
+            'seq': next(self.seq),
+            'updated_at': datetime.now().isoformat()
+        }
+        if self.writer is None or self.writer.done():
+            self.writer = asyncio.ensure_future(self._write())
+    
+    async def _write(self):
+        while self.latest is not None:
+            progress, self.latest = self.latest, None
+            try:
+                job = await asyncio.to_thread(jobs.update, self.job_id, progress=progress)
+            except Exception:
+                logger.exception(f"Could not record progress of job {self.job_id}")
+                continue
+            events.publish(self.job_id, job)
+    
+    async def drain(self):
+        """Wait until every event so far is written"""
+        if self.writer is not None:
+            await asyncio.gather(self.writer, return_exceptions=True)
+
+
+async def run_scraper(job_id: str, license_plate: str, vehicle_type: str, max_retries: int,
+                      cache_key: Optional[str] = None):
+    """
+    Run the scraper on the shared crawl engine (the queue has marked the job running)
     
     Args:
         job_id: Unique job identifier
         license_plate: License plate to check
         vehicle_type: Type of vehicle
         max_retries: Maximum retry attempts
+        cache_key: Result cache key for a successful lookup
     """
+    progress = ProgressReporter(job_id)
     try:
-        jobs[job_id]['status'] = 'running'
-        
-        # Output file for this job
-        output_file = Path(f"results_{job_id}.json")
-        
-        # Configure and run scraper
-        settings = get_project_settings()
-        settings.set('FEEDS', {
-            str(output_file): {
-                'format': 'json',
-                'encoding': 'utf-8',
-                'overwrite': True,
-            }
-        })
-        
-        # Run spider
-        process = CrawlerProcess(settings)
-        process.crawl(
+        # Run spider on the persistent engine, collecting items in memory
+        results = await engine.collect(
             CsgtSpider,
+            job_id,
+            on_progress=progress,
             license_plate=license_plate,
             vehicle_type=vehicle_type,
             max_retries=max_retries
         )
-        process.start()
+        # Progress is written before the outcome, never after it
+        await progress.drain()
         
-        # Read results
-        if output_file.exists():
-            with open(output_file, 'r', encoding='utf-8') as f:
-                results = json.load(f)
+        if results:
+            # Only successful lookups are cached; errors should be retried
+            if cache_key and results[0].get('status') == 'success':
+                await asyncio.to_thread(result_cache.put, cache_key, results[0])
             
             # Update job with results
-            jobs[job_id]['status'] = 'completed'
-            jobs[job_id]['completed_at'] = datetime.now().isoformat()
-            jobs[job_id]['result'] = results[0] if results else None
-            
-            # Clean up output file
-            output_file.unlink()
+            await asyncio.to_thread(
+                jobs.update,
+                job_id,
+                status='completed',
+                completed_at=datetime.now().isoformat(),
+                result=results[0],
+            )
         else:
-            jobs[job_id]['status'] = 'failed'
-            jobs[job_id]['error'] = 'No results generated'
+            await asyncio.to_thread(jobs.update, job_id, status='failed', error='No results generated')
             
     except Exception as e:
-        jobs[job_id]['status'] = 'failed'
-        jobs[job_id]['error'] = str(e)
-        jobs[job_id]['completed_at'] = datetime.now().isoformat()
+        await progress.drain()
+        await asyncio.to_thread(
+            jobs.update,
+            job_id,
+            status='failed',
+            error=str(e),
+            completed_at=datetime.now().isoformat(),
+        )
+
+
+async def run_batch(job: Dict[str, Any]):
+    """
+    Run a batch job: serve cached plates, then scrape the rest in one crawl
+    
+    All remaining plates go to a single CsgtSpider crawl, which runs them
+    CONCURRENT_LOOKUPS at a time. Each finished plate's result is appended to
+    the batch's results in the job store (see JobStore.append_results) and
+    the counts on the job are updated, at most every BATCH_FLUSH_SECONDS, by
+    one flush at a time running in a thread. A batch put back in the queue
+    (worker shutdown) resumes with the plates that have no result yet.
+    
+    Args:
+        job: Batch job claimed from the queue
+    """
+    batch_id = job['job_id']
+    entries = job['entries']
+    stored = await asyncio.to_thread(jobs.get_results, batch_id)
+    finished = {result['index'] for result in stored}
+    counts = {
+        'succeeded': sum(1 for result in stored if result['status'] == 'success'),
+        'failed': sum(1 for result in stored if result['status'] != 'success'),
+    }
+    # Results and successful items for the result cache not written yet
+    results = []
+    to_cache = []
+    last_flush = time.monotonic()
+    flushing = None
+    lock = asyncio.Lock()
+    
+    # lookup_key -> index of the entry still waiting for a result
+    todo = {entry['lookup_key']: index for index, entry in enumerate(entries) if index not in finished}
+    
+    def write(batch, cache, fields):
+        for key, item in cache:
+            result_cache.put(key, item)
+        # Results first: a reader woken by the new counts finds them
+        jobs.append_results(batch_id, batch)
+        return jobs.update(batch_id, **fields)
+    
+    async def flush(**fields):
+        nonlocal last_flush
+        async with lock:
+            # Taken together, so the counts match the results written so far
+            batch, cache = results[:], to_cache[:]
+            results.clear()
+            to_cache.clear()
+            fields = {**counts, **fields}
+            last_flush = time.monotonic()
+            updated = await asyncio.to_thread(write, batch, cache, fields)
+        events.publish(batch_id, updated)
+    
+    async def flush_in_background():
+        try:
+            await flush()
+        except Exception:
+            logger.exception(f"Could not store results of batch {batch_id}")
+    
+    def record(index, status, result=None, error=None, cache_age=None):
+        nonlocal flushing
+        entry = entries[index]
+        results.append({
+            'index': index,
+            'license_plate': entry['license_plate'],
+            'vehicle_type': entry['vehicle_type'],
+            'status': status,
+            'cached': cache_age is not None,
+            'cache_age': cache_age,
+            'error': error,
+            'result': result,
+        })
+        counts['succeeded' if status == 'success' else 'failed'] += 1
+        if time.monotonic() - last_flush >= BATCH_FLUSH_SECONDS and (flushing is None or flushing.done()):
+            flushing = asyncio.ensure_future(flush_in_background())
+    
+    if not job.get('force_refresh'):
+        def cached_results():
+            return {key: result_cache.get(key, job.get('max_age')) for key in todo}
+        
+        for key, cached in (await asyncio.to_thread(cached_results)).items():
+            if cached is not None:
+                record(todo.pop(key), 'success', cached[0], cache_age=round(cached[1], 1))
+    
+    def on_item(item):
+        key = lookup_key(item.get('license_plate') or '', item.get('vehicle_type') or '')
+        index = todo.pop(key, None)
+        if index is None:
+            return
+        if item.get('status') == 'success':
+            to_cache.append((key, item))
+        record(index, item.get('status') or 'error', item, error=item.get('error_message'))
+    
+    error = None
+    if todo:
+        plates = [(entries[index]['license_plate'], entries[index]['vehicle_type']) for index in todo.values()]
+        try:
+            await engine.collect(
+                CsgtSpider,
+                batch_id,
+                on_item=on_item,
+                plates=plates,
+                max_retries=job['max_retries']
+            )
+        except asyncio.CancelledError:
+            # Keep what finished so the requeued batch resumes from here
+            await flush()
+            raise
+        except Exception as e:
+            error = str(e)
+    
+    # Plates the crawl ended without an item for
+    for index in list(todo.values()):
+        record(index, 'error', error=error or 'No results generated')
+    todo.clear()
+    
+    await flush(status='completed', completed_at=datetime.now().isoformat(), error=error)
+
+
+async def job_json(job: Dict[str, Any]) -> bytes:
+    """Job as returned by the job status endpoints (JobResult fields), as JSON"""
+    queue_position = await queue.position(job['job_id']) if job['status'] == 'pending' else None
+    return JobRecord.from_dict(job).to_json(queue_position=queue_position)
+
+
+async def batch_progress(job: Dict[str, Any]) -> BatchProgress:
+    """Aggregate progress of a batch job"""
+    total = job['total']
+    completed = job.get('succeeded', 0) + job.get('failed', 0)
+    return BatchProgress(
+        batch_id=job['job_id'],
+        status=job['status'],
+        created_at=job['created_at'],
+        completed_at=job.get('completed_at'),
+        total=total,
+        completed=completed,
+        succeeded=job.get('succeeded', 0),
+        failed=job.get('failed', 0),
+        progress=round(completed / total * 100, 1) if total else 100.0,
+        error=job.get('error'),
+        queue_position=await queue.position(job['job_id']) if job['status'] == 'pending' else None
+    )
 
 
 @app.get("/", tags=["General"])
@@ -175,8 +570,11 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "scrape": "POST /api/v1/scrape - Submit scraping job",
+            "batch": "POST /api/v1/scrape/batch - Submit many plates at once",
             "status": "GET /api/v1/jobs/{job_id} - Get job status",
-            "list_jobs": "GET /api/v1/jobs - List all jobs"
+            "events": "GET /api/v1/jobs/{job_id}/events - Follow job status (Server-Sent Events)",
+            "list_jobs": "GET /api/v1/jobs - List all jobs",
+            "page": "GET /api/v1/pages/{page_hash} - Raw results page of a partial result"
         }
     }
 
@@ -191,18 +589,56 @@ async def health_check():
 
 
 @app.post("/api/v1/scrape", response_model=JobResponse, tags=["Scraping"])
-async def scrape_violation(request: ScrapeRequest, background_tasks: BackgroundTasks):
+async def scrape_violation(request: ScrapeRequest):
     """
     Submit a scraping job to check traffic violations
     
-    This endpoint creates a background job that will scrape the CSGT website
-    for violation information. Use the returned job_id to check status.
+    This endpoint queues a job that will scrape the CSGT website for violation
+    information. Use the returned job_id to check status. Returns 429 with a
+    Retry-After header when the queue is full.
+    
+    A successful result for the same plate and vehicle type younger than
+    max_age (default: the cache TTL) completes the job immediately without
+    scraping, unless force_refresh is set.
     """
     # Create unique job ID
     job_id = str(uuid.uuid4())
+    key = lookup_key(request.license_plate, request.vehicle_type.value)
+    
+    # Serve a recent result from the cache
+    cached = None if request.force_refresh else await asyncio.to_thread(result_cache.get, key, request.max_age)
+    if result_cache.enabled and not request.force_refresh:
+        await asyncio.to_thread(jobs.incr, 'cache/hits' if cached else 'cache/misses')
+    
+    if cached is not None:
+        result, age = cached
+        now = datetime.now().isoformat()
+        job = {
+            'job_id': job_id,
+            'status': 'completed',
+            'license_plate': request.license_plate,
+            'vehicle_type': request.vehicle_type.value,
+            'max_retries': request.max_retries,
+            'created_at': now,
+            'completed_at': now,
+            'result': result,
+            'error': None,
+            'lookup_key': key,
+            'lane': request.lane.value,
+            'cached': True,
+            'cache_age': round(age, 1)
+        }
+        await asyncio.to_thread(jobs.create, job)
+        return JobResponse(
+            job_id=job_id,
+            status=job['status'],
+            message=f"Served from cache ({age:.0f}s old). Use job_id to get the result.",
+            created_at=job['created_at'],
+            cached=True
+        )
     
     # Initialize job
-    jobs[job_id] = {
+    job = {
         'job_id': job_id,
         'status': 'pending',
         'license_plate': request.license_plate,
@@ -211,68 +647,241 @@ async def scrape_violation(request: ScrapeRequest, background_tasks: BackgroundT
         'created_at': datetime.now().isoformat(),
         'completed_at': None,
         'result': None,
-        'error': None
+        'error': None,
+        'lookup_key': key
     }
     
-    # Add scraping task to background
-    background_tasks.add_task(
-        run_scraper,
-        job_id,
-        request.license_plate,
-        request.vehicle_type.value,
-        request.max_retries
-    )
+    # Queue the job for the scrape workers, or join an identical one in flight
+    try:
+        job, coalesced = await queue.submit(job, lane=request.lane.value)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"{e}. Try again later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    if coalesced:
+        message = "Joined an identical job already in progress. Use job_id to check status."
+    else:
+        message = "Job created successfully. Use job_id to check status."
     
     return JobResponse(
-        job_id=job_id,
-        status=JobStatus.pending,
-        message="Job created successfully. Use job_id to check status.",
-        created_at=jobs[job_id]['created_at']
+        job_id=job['job_id'],
+        status=job['status'],
+        message=message,
+        created_at=job['created_at'],
+        queue_position=await queue.position(job['job_id']),
+        coalesced=coalesced
     )
 
 
+@app.post("/api/v1/scrape/batch", response_model=BatchResponse, tags=["Scraping"])
+async def scrape_batch(request: BatchRequest):
+    """
+    Submit a batch of plates to check in one crawl
+    
+    Repeated plates (same plate and vehicle type) are checked once. The batch
+    waits in the batch lane of the job queue; use the returned batch_id to
+    follow its progress and stream per-plate results as they finish.
+    """
+    batch_id = str(uuid.uuid4())
+    
+    # Distinct lookups, in submission order
+    entries = {}
+    for plate in request.plates:
+        key = lookup_key(plate.license_plate, plate.vehicle_type.value)
+        if key not in entries:
+            entries[key] = {
+                'license_plate': plate.license_plate,
+                'vehicle_type': plate.vehicle_type.value,
+                'lookup_key': key,
+            }
+    
+    job = {
+        'job_id': batch_id,
+        'kind': 'batch',
+        'status': 'pending',
+        'max_retries': request.max_retries,
+        'max_age': request.max_age,
+        'force_refresh': request.force_refresh,
+        'created_at': datetime.now().isoformat(),
+        'completed_at': None,
+        'error': None,
+        'entries': list(entries.values()),
+        'total': len(entries),
+        'succeeded': 0,
+        'failed': 0
+    }
+    
+    try:
+        job, _ = await queue.submit(job, lane='batch')
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"{e}. Try again later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    return BatchResponse(
+        batch_id=batch_id,
+        status=job['status'],
+        message="Batch created successfully. Use batch_id to follow progress and stream results.",
+        created_at=job['created_at'],
+        total=job['total'],
+        duplicates=len(request.plates) - job['total'],
+        queue_position=await queue.position(batch_id)
+    )
+
+
+async def get_batch(batch_id: str) -> Dict[str, Any]:
+    """Batch job by id, or 404"""
+    job = await asyncio.to_thread(jobs.get, batch_id)
+    if job is None or job.get('kind') != 'batch':
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return job
+
+
+@app.get("/api/v1/scrape/batch/{batch_id}", response_model=BatchProgress, tags=["Scraping"])
+async def get_batch_status(
+    batch_id: str,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS, description="Seconds to wait for progress")
+):
+    """
+    Get the aggregate progress of a batch
+    
+    With wait, the request blocks until the batch makes progress or wait
+    seconds pass (long polling).
+    """
+    job = await get_batch(batch_id)
+    if wait > 0:
+        job = await events.wait(batch_id, wait) or job
+    return await batch_progress(job)
+
+
+@app.get("/api/v1/scrape/batch/{batch_id}/results", tags=["Scraping"])
+async def stream_batch_results(batch_id: str, offset: int = 0):
+    """
+    Stream per-plate results of a batch as newline-delimited JSON
+    
+    Results are sent in the order they finished, starting at offset; the
+    stream stays open until the batch is done. Reconnect with offset set to
+    the number of lines already received to resume.
+    """
+    await get_batch(batch_id)
+    
+    async def results():
+        sent = max(offset, 0)
+        # Woken by every flush of new results (and status changes)
+        async for job in events.subscribe(batch_id):
+            for result in await asyncio.to_thread(jobs.get_results, batch_id, sent):
+                yield json.dumps(result, ensure_ascii=False) + '\n'
+                sent += 1
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @app.get("/api/v1/jobs/{job_id}", response_model=JobResult, tags=["Jobs"])
-async def get_job_status(job_id: str):
+async def get_job_status(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS, description="Seconds to wait for a change"),
+    status: Optional[JobStatus] = Query(None, description="Status last seen; with wait, return at once if it changed since")
+):
     """
     Get the status and result of a scraping job
     
-    Returns the current status of the job and results if completed.
+    Returns the current status of the job and results if completed. With
+    wait, the request blocks until the job changes state (status or
+    progress) or wait seconds pass, replacing a run of short polls (long
+    polling). Pass the status from the previous response as status so a
+    change in between requests is returned immediately.
+    """
+    # Serialized straight from the job record, without a JobResult round trip
+    if wait > 0:
+        job = await events.wait(job_id, wait, status=status.value if status else None)
+        body = await job_json(job) if job is not None else None
+    else:
+        # None unless the job is pending
+        queue_position = await queue.position(job_id)
+        body = await asyncio.to_thread(jobs.get_json, job_id, queue_position=queue_position)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/api/v1/jobs/{job_id}/events", tags=["Jobs"])
+async def follow_job(job_id: str):
+    """
+    Follow a job with Server-Sent Events
+    
+    Sends the job as it is now, then again on every change, and closes the
+    stream once the job has completed or failed. `status` events carry a
+    status transition (pending, running, completed, failed); `progress`
+    events carry lookup progress such as the captcha attempt, or plates
+    finished for a batch. Event data has the shape of GET /api/v1/jobs/{job_id}
+    (GET /api/v1/scrape/batch/{batch_id} for batches).
     """
-    if job_id not in jobs:
+    if await asyncio.to_thread(jobs.get, job_id) is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return JobResult(**jobs[job_id])
+    async def stream():
+        status = None
+        async for job in events.subscribe(job_id, heartbeat=EVENTS_HEARTBEAT_SECONDS):
+            if job is None:
+                yield ": keepalive\n\n"
+                continue
+            
+            event = 'status' if job['status'] != status else 'progress'
+            status = job['status']
+            if job.get('kind') == 'batch':
+                payload = (await batch_progress(job)).model_dump_json()
+            else:
+                payload = (await job_json(job)).decode()
+            yield f"event: {event}\ndata: {payload}\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/api/v1/jobs", tags=["Jobs"])
 async def list_jobs(
     status: Optional[JobStatus] = None,
-    limit: int = 10,
-    offset: int = 0
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     List all scraping jobs
     
-    Optionally filter by status and paginate results.
+    Optionally filter by status. Jobs are listed newest first; pass the
+    returned next_cursor to get the next page (null on the last page).
     """
-    # Filter by status if provided
-    filtered_jobs = jobs.values()
-    if status:
-        filtered_jobs = [j for j in filtered_jobs if j['status'] == status.value]
-    else:
-        filtered_jobs = list(filtered_jobs)
-    
-    # Sort by created_at (newest first)
-    filtered_jobs.sort(key=lambda x: x['created_at'], reverse=True)
+    # Filtered by status if provided, newest first
+    try:
+        total, paginated, next_cursor = await asyncio.to_thread(
+            jobs.list,
+            status=status.value if status else None,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Paginate
-    paginated = filtered_jobs[offset:offset + limit]
+    # Batches are listed without their plates and results
+    paginated = [
+        {k: v for k, v in job.items() if k not in ('entries', 'results')}
+        for job in paginated
+    ]
     
     return {
-        "total": len(filtered_jobs),
-        "offset": offset,
+        "total": total,
         "limit": limit,
-        "jobs": paginated
+        "jobs": paginated,
+        "next_cursor": next_cursor
     }
 
 
@@ -281,36 +890,86 @@ async def delete_job(job_id: str):
     """
     Delete a job from the system
     """
-    if job_id not in jobs:
+    if not await asyncio.to_thread(jobs.delete, job_id):
         raise HTTPException(status_code=404, detail="Job not found")
     
-    del jobs[job_id]
-    
     return {"message": f"Job {job_id} deleted successfully"}
 
 
+@app.get("/api/v1/pages/{page_hash}", tags=["Debugging"])
+async def get_raw_page(page_hash: str, request: Request):
+    """
+    Get a stored raw results page
+    
+    Results the spider could not extract violation data from (status
+    "partial") carry the page's raw_html_hash instead of the page itself.
+    Gzip-stored pages are sent as stored to clients accepting gzip.
+    """
+    if not is_digest(page_hash):
+        raise HTTPException(status_code=400, detail="Invalid page hash")
+    blob = await asyncio.to_thread(page_store.read, page_hash) if page_store is not None else None
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+    
+    data, codec = blob
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    if codec == 'gzip' and 'gzip' in request.headers.get('accept-encoding', ''):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        data = decompress(data, codec)
+    return Response(content=data, media_type="text/html", headers=headers)
+
+
 @app.get("/api/v1/stats", tags=["Statistics"])
 async def get_statistics():
     """
     Get scraping statistics
     """
-    total = len(jobs)
-    pending = sum(1 for j in jobs.values() if j['status'] == 'pending')
-    running = sum(1 for j in jobs.values() if j['status'] == 'running')
-    completed = sum(1 for j in jobs.values() if j['status'] == 'completed')
-    failed = sum(1 for j in jobs.values() if j['status'] == 'failed')
+    counts = await asyncio.to_thread(jobs.counts)
+    total = sum(counts.values())
+    pending = counts['pending']
+    running = counts['running']
+    completed = counts['completed']
+    failed = counts['failed']
     
     # Calculate success rate
     finished = completed + failed
     success_rate = (completed / finished * 100) if finished > 0 else 0
     
+    coalescing = await queue.coalescing_stats()
+    counters = await asyncio.to_thread(jobs.counters)
+    cache_hits = counters.get('cache/hits', 0)
+    cache_lookups = cache_hits + counters.get('cache/misses', 0)
+    cache_hit_rate = (cache_hits / cache_lookups * 100) if cache_lookups > 0 else 0
+    cache = result_cache.stats()
+    
     return {
         "total_jobs": total,
         "pending": pending,
         "running": running,
         "completed": completed,
         "failed": failed,
-        "success_rate": f"{success_rate:.1f}%"
+        "success_rate": f"{success_rate:.1f}%",
+        "queue": {
+            "depth": pending,
+            "max_depth": queue.max_depth,
+            "workers_per_process": queue.workers,
+            "batch_workers_per_process": queue.batch_workers,
+            "jobs_per_minute": round(await queue.throughput() * 60, 1)
+        },
+        "coalescing": {
+            "submitted": coalescing['submitted'],
+            "coalesced": coalescing['coalesced'],
+            "hit_rate": f"{coalescing['hit_rate'] * 100:.1f}%"
+        },
+        "cache": {
+            "hits": cache_hits,
+            "lookups": cache_lookups,
+            "hit_rate": f"{cache_hit_rate:.1f}%",
+            "ttl": cache['ttl'],
+            "entries_per_process": cache['entries'],
+            "bytes_per_process": cache['bytes']
+        }
     }
 
 
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Offline captcha solver benchmark
+
+Replays labeled captchas through every solver method and every preprocessing
+variant and reports accuracy, latency (p50/p95), CPU time and the expected
+number of site round-trips per successful lookup. Results are written as JSON
+so runs from different commits can be diffed.
+
+Labeled captchas come from a directory of images named after their label
+(e.g. "64pnvp.png") and/or from a captcha corpus (CAPTCHA_CORPUS_DIR).
+
+Usage:
+    python benchmark_captcha.py labeled_captchas/ --corpus captcha_corpus -o benchmark_results.json
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add the project to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+from PIL import Image
+
+from csgt_scraper.utils.captcha_corpus import load_corpus_samples, load_labeled_images
+from csgt_scraper.utils.captcha_model import load_model
+from csgt_scraper.utils.captcha_solver import CaptchaSolver
+from csgt_scraper.utils.ocr_backend import get_ocr_backend
+from csgt_scraper.utils.ocr_ensemble import OcrEnsemble
+from csgt_scraper.utils.preprocessing import VARIANTS, CaptchaImage, tesseract_config
+
+# Site requests per attempt (start page, captcha image, AJAX POST) and per
+# successful lookup on top of that (results page)
+REQUESTS_PER_ATTEMPT = 3
+REQUESTS_PER_SUCCESS = 1
+
+
+def _cpu_seconds():
+    """CPU time of this process plus its reaped children (tesseract, pool workers)"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def summarize(answers, labels, latencies, cpu_seconds, max_retries):
+    """
+    Summarize one solver's run
+
+    Args:
+        answers: Solver answers, one per captcha (None when it gave up)
+        labels: True labels
+        latencies: Wall time per captcha in seconds
+        cpu_seconds: Total CPU time spent
+        max_retries: Captcha attempts per lookup (the spider's max_retries)
+
+    Returns:
+        Dict of metrics
+    """
+    correct = sum(answer == label for answer, label in zip(answers, labels))
+    accuracy = correct / len(labels)
+    latencies_ms = np.array(latencies) * 1000
+
+    return {
+        'samples': len(labels),
+        'correct': correct,
+        'accuracy': round(accuracy, 4),
+        'latency_ms': {
+            'mean': round(float(latencies_ms.mean()), 2),
+            'p50': round(float(np.percentile(latencies_ms, 50)), 2),
+            'p95': round(float(np.percentile(latencies_ms, 95)), 2),
+        },
+        'cpu_seconds': round(cpu_seconds, 3),
+        'cpu_ms_per_captcha': round(cpu_seconds / len(labels) * 1000, 2),
+        # Attempts until the first accepted captcha are geometric with p = accuracy
+        'expected_round_trips': (
+            round(REQUESTS_PER_ATTEMPT / accuracy + REQUESTS_PER_SUCCESS, 2) if accuracy else None
+        ),
+        'lookup_success_rate': round(1 - (1 - accuracy) ** max_retries, 4),
+    }
+
+
+def run_solver(solve, samples, max_retries):
+    """Time a solve(image_bytes) callable over all samples"""
+    answers, latencies = [], []
+    cpu_started = _cpu_seconds()
+
+    for image, _ in samples:
+        started = time.perf_counter()
+        answers.append(solve(image))
+        latencies.append(time.perf_counter() - started)
+
+    cpu_seconds = _cpu_seconds() - cpu_started
+    return summarize(answers, [label for _, label in samples], latencies, cpu_seconds, max_retries)
+
+
+def benchmark_solvers(samples, args):
+    """Benchmark each complete solver method"""
+    results = {}
+
+    solver = CaptchaSolver('ocr', ocr_backend=args.backend)
+    print("Benchmarking solver: ocr")
+    results['ocr'] = run_solver(solver.solve_with_ocr, samples, args.max_retries)
+
+    print("Benchmarking solver: ensemble")
+    ensemble = OcrEnsemble(max_workers=args.workers, min_votes=args.min_votes, backend=args.backend)
+    cpu_started = _cpu_seconds()
+    results['ensemble'] = run_solver(lambda image: ensemble.solve(image).text, samples, args.max_retries)
+    # Pool workers only show up in RUSAGE_CHILDREN once they have exited
+    ensemble.shutdown(wait=True)
+    results['ensemble']['cpu_seconds'] = round(_cpu_seconds() - cpu_started, 3)
+    results['ensemble']['cpu_ms_per_captcha'] = round(results['ensemble']['cpu_seconds'] / len(samples) * 1000, 2)
+    results['ensemble']['config_report'] = ensemble.report()
+
+    if Path(args.model).exists():
+        print("Benchmarking solver: model")
+        model = load_model(args.model)
+        results['model'] = run_solver(lambda image: model.solve(image)[0], samples, args.max_retries)
+    else:
+        print(f"Skipping solver: model (no weights at {args.model})")
+
+    return results
+
+
+def benchmark_variants(samples, args):
+    """Benchmark each preprocessing variant as a single-config solver"""
+    ocr = get_ocr_backend(args.backend)
+    results = {}
+
+    for variant in VARIANTS:
+        print(f"Benchmarking variant: {variant.name}")
+        config = tesseract_config(variant)
+
+        def solve(image):
+            array = CaptchaImage(image).apply(variant.steps)
+            return ocr.image_to_string(Image.fromarray(array), config=config).strip()
+
+        results[variant.name] = run_solver(solve, samples, args.max_retries)
+
+    return results
+
+
+def current_commit():
+    """Git commit the benchmark ran on, if available"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark captcha solvers on labeled captchas")
+    parser.add_argument('labeled_dir', nargs='?', help="Directory of labeled captcha images")
+    parser.add_argument('--corpus', help="Captcha corpus directory to take accepted captchas from")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--limit', type=int, help="Only use the first N captchas")
+    parser.add_argument('--backend', default='auto', help="OCR backend: tesserocr, pytesseract or auto")
+    parser.add_argument('--workers', type=int, default=4, help="OCR ensemble pool size")
+    parser.add_argument('--min-votes', type=int, default=3, help="OCR ensemble early-exit majority")
+    parser.add_argument('--model', default='models/captcha_model.npz', help="Captcha model weights")
+    parser.add_argument('--max-retries', type=int, default=3, help="Captcha attempts per lookup")
+    parser.add_argument('--skip-variants', action='store_true', help="Only benchmark complete solvers")
+    args = parser.parse_args()
+
+    if not args.labeled_dir and not args.corpus:
+        parser.error("give a labeled image directory and/or --corpus")
+
+    samples = []
+    if args.labeled_dir:
+        samples.extend(load_labeled_images(args.labeled_dir))
+    if args.corpus:
+        samples.extend(load_corpus_samples(args.corpus))
+    samples = samples[:args.limit] if args.limit else samples
+    if not samples:
+        print("No labeled captchas found!")
+        sys.exit(1)
+
+    print("=" * 60)
+    print(f"Captcha Solver Benchmark ({len(samples)} captchas)")
+    print("=" * 60)
+
+    results = {
+        'commit': current_commit(),
+        'samples': len(samples),
+        'ocr_backend': get_ocr_backend(args.backend).name,
+        'solvers': benchmark_solvers(samples, args),
+        'variants': {} if args.skip_variants else benchmark_variants(samples, args),
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+    print("=" * 60)
+    print(f"{'name':<32} {'acc':>7} {'p50 ms':>8} {'p95 ms':>8} {'trips':>7}")
+    for section in ('solvers', 'variants'):
+        for name, metrics in results[section].items():
+            print(
+                f"{name:<32} {metrics['accuracy']:>7.1%} {metrics['latency_ms']['p50']:>8.1f} "
+                f"{metrics['latency_ms']['p95']:>8.1f} {metrics['expected_round_trips'] or '-':>7}"
+            )
+    print("=" * 60)
+    print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Results page parser benchmark
+
+Measures the per-page cost of extracting violations from results pages,
+before (one `//label[contains(...)]` XPath query per field plus a
+lowercased copy of the page, first violation only) and after (the
+single-pass extractor in csgt_scraper.utils.results_parser, every
+violation), and checks both agree on the first violation.
+
+Pages come from saved results pages (.html files or directories of them)
+and from the raw page store, by the raw_html_hash of partial items. Without
+any, sample pages in the site's markup are generated, with 1, 5 and 20
+violations inside a page layout of typical size.
+
+Usage:
+    python benchmark_parser.py saved_pages/ --repeat 200 -o parser_results.json
+    python benchmark_parser.py <raw_html_hash> ... --page-store raw_pages
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from scrapy.http import HtmlResponse
+
+from csgt_scraper.settings import RAW_PAGE_STORE_DIR
+from csgt_scraper.utils.page_store import get_page_store, is_digest
+from csgt_scraper.utils.results_parser import extract_violations, is_no_results
+
+SAMPLE_URL = 'https://www.csgt.vn/tra-cuu-phuong-tien-vi-pham.html'
+SAMPLE_VIOLATIONS = (1, 5, 20)
+
+LEGACY_TEXT_FIELDS = (
+    ('license_plate', 'Biển kiểm soát:'),
+    ('vehicle_color', 'Màu biển:'),
+    ('vehicle_type', 'Loại phương tiện:'),
+    ('violation_time', 'Thời gian vi phạm'),
+    ('violation_location', 'Địa điểm vi phạm:'),
+    ('violation_behavior', 'Hành vi vi phạm:'),
+)
+
+
+def legacy_extract(response):
+    """The per-field XPath extraction CsgtSpider.parse_results used before"""
+    page_text = response.text.lower()
+    if 'không tìm thấy kết quả' in page_text or 'no results' in page_text:
+        return {}
+
+    value = '//label[contains(.//span/text(), "{}")]/following-sibling::div[@class="col-md-9"]'
+    violation = {}
+    for field, label in LEGACY_TEXT_FIELDS:
+        match = response.xpath(value.format(label) + '/text()').get()
+        if match:
+            violation[field] = match.strip()
+
+    status = response.xpath(value.format('Trạng thái') + '//span/text()').get()
+    if not status:
+        status = response.xpath(value.format('Trạng thái') + '/text()').get()
+    if status:
+        violation['payment_status'] = status.strip()
+
+    unit = response.xpath(value.format('Đơn vị phát hiện vi phạm:') + '/text()').get()
+    if unit:
+        violation['detecting_unit'] = unit.strip()
+
+    resolution = response.xpath(value.format('Nơi giải quyết vụ việc:') + '//text()').getall()
+    if resolution:
+        violation['resolution_location'] = ' '.join([t.strip() for t in resolution if t.strip()])
+    return violation
+
+
+def single_pass_extract(response):
+    """The extraction CsgtSpider.parse_results uses now (every violation on the page)"""
+    violations = extract_violations(response.selector.root)
+    if not violations and is_no_results(response.text):
+        return []
+    return violations
+
+
+METHODS = {
+    'xpath_per_field': legacy_extract,
+    'single_pass': single_pass_extract,
+}
+
+
+def sample_violation(i):
+    """One violation in the results page markup"""
+    row = ('<div class="form-group"><label class="col-md-3"><span>{}</span></label>'
+           '<div class="col-md-9">{}</div></div>\n')
+    return ''.join([
+        row.format('Biển kiểm soát:', '30A12345'),
+        row.format('Màu biển:', 'Nền mầu trắng, chữ và số màu đen'),
+        row.format('Loại phương tiện:', 'Ô tô'),
+        row.format('Thời gian vi phạm:', f'{8 + i % 12}:{i % 60:02d}, {1 + i % 28:02d}/03/2025'),
+        row.format('Địa điểm vi phạm:', f'Km {i}+200, Quốc lộ 1A, Hà Nội'),
+        row.format('Hành vi vi phạm:', '12321.5.a.01.Không chấp hành hiệu lệnh của đèn tín hiệu giao thông'),
+        row.format('Trạng thái:', '<span class="badge badge-danger">Chưa xử phạt</span>'),
+        row.format('Đơn vị phát hiện vi phạm:', 'Đội CSGT đường bộ số 1 - Phòng CSGT Hà Nội'),
+        row.format('Nơi giải quyết vụ việc:',
+                   '<p>1. Đội CSGT đường bộ số 1 - Phòng CSGT Hà Nội</p>'
+                   f'<p>Địa chỉ: số {i} Đường Láng, Hà Nội</p><p>Số điện thoại: 069.000.0000</p>'),
+        '<hr>\n',
+    ])
+
+
+def sample_page(violations):
+    """A results page with some violations inside the site's page layout"""
+    menu = ''.join(f'<li class="nav-item"><a href="/tin-tuc-{i}.html">Mục {i}</a></li>' for i in range(150))
+    news = ''.join(
+        f'<div class="news-item"><a href="/bai-viet-{i}.html"><img src="/img/{i}.jpg">'
+        f'<h4>Tin tức giao thông số {i}</h4></a><p>Tóm tắt bài viết về an toàn giao thông {i}.</p></div>'
+        for i in range(60)
+    )
+    body = ''.join(sample_violation(i) for i in range(violations))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Tra cứu phương tiện vi phạm</title>'
+        '<script>var config = {"site": "csgt", "lang": "vi"};</script></head><body>'
+        f'<nav><ul class="menu">{menu}</ul></nav>'
+        f'<div class="container"><div id="bodyPrint123">{body}</div></div>'
+        f'<aside class="sidebar">{news}</aside><footer>Cục Cảnh sát giao thông</footer></body></html>'
+    )
+
+
+def load_pages(paths, page_store=RAW_PAGE_STORE_DIR):
+    """
+    (name, html) pairs of the pages to benchmark
+
+    Args:
+        paths: Saved pages (.html files or directories of them) and page
+            hashes (raw_html_hash); none for generated samples
+        page_store: Raw page store directory to look hashes up in
+
+    Raises:
+        FileNotFoundError: If a page or a hash cannot be found
+    """
+    if not paths:
+        return [(f'sample_{n}_violations', sample_page(n)) for n in SAMPLE_VIOLATIONS]
+
+    pages = []
+    for path in map(Path, paths):
+        if is_digest(path.name) and not path.exists():
+            page = get_page_store(page_store).get(path.name)
+            if page is None:
+                raise FileNotFoundError(f"Page {path.name} is not in the page store {page_store}")
+            pages.append((path.name, page.decode('utf-8', errors='replace')))
+            continue
+        if not path.exists():
+            raise FileNotFoundError(f"No such page: {path}")
+        files = sorted(path.glob('*.htm*')) if path.is_dir() else [path]
+        for file in files:
+            pages.append((file.name, file.read_text(encoding='utf-8', errors='replace')))
+    return pages
+
+
+def time_method(method, html, repeat):
+    """Per-page extraction times in seconds; the page is parsed into a tree first, as in the spider"""
+    times = []
+    for _ in range(repeat):
+        response = HtmlResponse(SAMPLE_URL, body=html.encode(), encoding='utf-8')
+        response.selector.root  # the tree is built once per response, whichever method runs
+        start = time.perf_counter()
+        method(response)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark results page field extraction')
+    parser.add_argument('pages', nargs='*',
+                        help='Saved results pages (.html files or directories) or raw_html_hash values')
+    parser.add_argument('--page-store', default=RAW_PAGE_STORE_DIR,
+                        help=f'Raw page store to read hashes from (default: {RAW_PAGE_STORE_DIR})')
+    parser.add_argument('--repeat', type=int, default=200, help='Extractions per page and method')
+    parser.add_argument('-o', '--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    try:
+        pages = load_pages(args.pages, args.page_store)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if not pages:
+        parser.error('No pages found')
+
+    results = []
+    print(f"{'page':<32} {'size':>9} {'violations':>10} "
+          + ' '.join(f'{name + " µs":>18}' for name in METHODS) + f" {'speedup':>8}")
+    for name, html in pages:
+        response = HtmlResponse(SAMPLE_URL, body=html.encode(), encoding='utf-8')
+        extracted = {method: fn(response) for method, fn in METHODS.items()}
+        violations = extracted['single_pass']
+        first = violations[0] if violations else {}
+        differ = sorted(
+            field for field in first.keys() | extracted['xpath_per_field'].keys()
+            if first.get(field) != extracted['xpath_per_field'].get(field)
+        )
+        if differ:
+            # e.g. resolution_location: the XPath version joins the value of every violation
+            print(f"  {name}: values differ for {', '.join(differ)}", file=sys.stderr)
+
+        medians = {
+            method: statistics.median(time_method(fn, html, args.repeat)) * 1e6
+            for method, fn in METHODS.items()
+        }
+        speedup = medians['xpath_per_field'] / medians['single_pass']
+        print(f"{name[:32]:<32} {len(html):>9} {len(violations):>10} "
+              + ' '.join(f'{medians[method]:>18.1f}' for method in METHODS) + f" {speedup:>7.1f}x")
+        results.append({
+            'page': name,
+            'size': len(html),
+            'violations': len(violations),
+            'median_us': medians,
+            'speedup': speedup,
+            'differing_fields': differ,
+        })
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'repeat': args.repeat, 'pages': results}, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Persistent Crawl Engine
+
+Keeps one Twisted reactor and one CrawlerRunner alive for the whole lifetime
+of an API worker. Jobs are scheduled onto the running engine instead of
+paying Scrapy/Twisted startup (and hitting the non-restartable reactor) for
+every request.
+"""
+
+import asyncio
+
+from scrapy.crawler import Crawler
+from scrapy.utils.log import configure_logging
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+
+from csgt_scraper.pipelines import ItemCollectorPipeline
+from csgt_scraper.signals import lookup_progress
+
+
+class CrawlEngine:
+    """Long-lived crawl engine running on the worker's asyncio event loop"""
+
+    def __init__(self, settings=None):
+        """
+        Initialize crawl engine
+
+        Args:
+            settings: Scrapy settings (default: project settings)
+        """
+        self.settings = settings if settings is not None else get_project_settings()
+        self.loop = None
+        self.runner = None
+
+    @property
+    def running(self):
+        """Whether the engine has been started"""
+        return self.runner is not None
+
+    def start(self):
+        """
+        Start the engine on the currently running asyncio event loop
+
+        Installs the reactor configured by TWISTED_REACTOR (the asyncio reactor)
+        on top of the loop that is already driving the API, so Scrapy and
+        FastAPI share a single event loop. Must be called from a coroutine.
+        """
+        if self.running:
+            return
+
+        self.loop = asyncio.get_running_loop()
+        install_reactor(self.settings.get('TWISTED_REACTOR'))
+
+        from twisted.internet import reactor
+        from scrapy.crawler import CrawlerRunner
+
+        # The asyncio loop is already running (uvicorn owns it), so only mark
+        # the reactor as started instead of calling reactor.run()
+        if not reactor.running:
+            reactor.startRunning(installSignalHandlers=False)
+
+        configure_logging(self.settings)
+        self.runner = CrawlerRunner(self.settings)
+
+    async def stop(self):
+        """Stop all running crawls and the reactor thread pool"""
+        if not self.running:
+            return
+
+        await self.runner.stop().asFuture(self.loop)
+        self.runner = None
+
+        # reactor.stop() is never called (uvicorn owns the loop), so the
+        # thread pool used for captcha solving has to be stopped explicitly
+        from twisted.internet import reactor
+        if reactor.threadpool is not None:
+            reactor.threadpool.stop()
+
+    def crawl(self, spidercls, settings=None, handlers=None, **spider_kwargs):
+        """
+        Schedule a crawl on the running engine
+
+        Args:
+            spidercls: Spider class to run
+            settings: Optional per-crawl settings overrides
+            handlers: Optional {signal: handler} connected to this crawl's signals
+            **spider_kwargs: Arguments passed to the spider
+
+        Returns:
+            asyncio.Future that resolves when the crawl finishes
+        """
+        if not self.running:
+            raise RuntimeError("Crawl engine is not running")
+
+        crawler_settings = self.settings.copy()
+        if settings:
+            crawler_settings.setdict(settings, priority='cmdline')
+
+        crawler = Crawler(spidercls, crawler_settings)
+        for signal, handler in (handlers or {}).items():
+            crawler.signals.connect(handler, signal=signal)
+        return self.runner.crawl(crawler, **spider_kwargs).asFuture(self.loop)
+
+    async def collect(self, spidercls, job_id, on_item=None, on_progress=None, **spider_kwargs):
+        """
+        Run a crawl for a job and return the items it scraped
+
+        Items are handed over in memory by ItemCollectorPipeline, keyed by
+        job_id, so no feed exporter or temporary file is involved.
+
+        Args:
+            spidercls: Spider class to run
+            job_id: Job identifier the items are collected for
+            on_item: Optional callable receiving each item as soon as it is
+                scraped, for crawls that report progress
+            on_progress: Optional lookup_progress signal handler (see
+                csgt_scraper.signals)
+            **spider_kwargs: Arguments passed to the spider
+
+        Returns:
+            List of scraped items as dicts
+        """
+        items = []
+
+        def collector(item):
+            items.append(item)
+            if on_item is not None:
+                on_item(item)
+
+        handlers = {lookup_progress: on_progress} if on_progress is not None else None
+        ItemCollectorPipeline.register(job_id, collector)
+        try:
+            await self.crawl(spidercls, handlers=handlers, job_id=job_id, **spider_kwargs)
+        finally:
+            ItemCollectorPipeline.unregister(job_id)
+
+        return items
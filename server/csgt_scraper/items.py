@@ -9,12 +9,19 @@ class ViolationItem(scrapy.Item):
     # Input fields
     license_plate = scrapy.Field()
     vehicle_type = scrapy.Field()
+    plate = scrapy.Field()  # license_plate in canonical form, e.g. "59C136047"
     
     # Output fields
     violation_found = scrapy.Field()
+    # One dict per violation: the page's display text plus the typed values added
+    # by NormalizeViolationsPipeline (id, plate, violation_ts, payment_state, fine_vnd)
     violation_details = scrapy.Field()
     scraped_at = scrapy.Field()
-    raw_html = scrapy.Field()
+    scraped_ts = scrapy.Field()  # scraped_at in epoch seconds
+    # Results page kept when no violation data could be extracted from it:
+    # SHA-256 and size of the page in the raw page store (RAW_PAGE_STORE_DIR)
+    raw_html_hash = scrapy.Field()
+    raw_html_size = scrapy.Field()
     
     # Metadata
     url = scrapy.Field()
@@ -3,6 +3,8 @@
 from datetime import datetime
 import json
 
+from csgt_scraper.utils.normalize import canonical_plate, normalize_violation, to_epoch
+
 
 class CsgtScraperPipeline:
     """Pipeline to process scraped violation items"""
@@ -26,3 +28,47 @@ class CsgtScraperPipeline:
         
         return item
 
+
+
+class NormalizeViolationsPipeline:
+    """Pipeline adding typed values (epoch timestamps, states, canonical plates) next to the page text"""
+    
+    def process_item(self, item, spider):
+        """Normalize the item and its violations (see csgt_scraper.utils.normalize)"""
+        item['plate'] = canonical_plate(item.get('license_plate'))
+        item['scraped_ts'] = to_epoch(item.get('scraped_at'))
+        if item.get('violation_details'):
+            item['violation_details'] = [normalize_violation(violation) for violation in item['violation_details']]
+        
+        return item
+
+
+class ItemCollectorPipeline:
+    """Pipeline that hands scraped items straight to the job waiting for them"""
+    
+    # job_id -> callback receiving each scraped item as a dict
+    collectors = {}
+    
+    @classmethod
+    def register(cls, job_id, callback):
+        """
+        Register a callback for items scraped by the spider running job_id
+        
+        Args:
+            job_id: Job identifier passed to the spider
+            callback: Callable receiving each item as a dict
+        """
+        cls.collectors[job_id] = callback
+    
+    @classmethod
+    def unregister(cls, job_id):
+        """Stop collecting items for job_id"""
+        cls.collectors.pop(job_id, None)
+    
+    def process_item(self, item, spider):
+        """Deliver the item to its job's collector, if any"""
+        collector = self.collectors.get(getattr(spider, 'job_id', None))
+        if collector is not None:
+            collector(dict(item))
+        
+        return item
@@ -11,11 +11,17 @@ USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTM
 # Obey robots.txt rules
 ROBOTSTXT_OBEY = False
 
+# Number of plate lookups a crawl runs in parallel. Each lookup has its own
+# cookie jar (site session), so lookups do not interfere with each other
+CONCURRENT_LOOKUPS = 4
+
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
-CONCURRENT_REQUESTS = 1
+CONCURRENT_REQUESTS = 16
 
-# Configure a delay for requests for the same website (default: 0)
-DOWNLOAD_DELAY = 2
+# Politeness budget for csgt.vn: at most this many requests in flight, and this
+# delay (seconds, randomized 0.5x-1.5x) between requests to the same domain
+CONCURRENT_REQUESTS_PER_DOMAIN = 4
+DOWNLOAD_DELAY = 0.5
 
 # Disable cookies (enabled by default)
 COOKIES_ENABLED = True
@@ -23,6 +29,8 @@ COOKIES_ENABLED = True
 # Configure item pipelines
 ITEM_PIPELINES = {
     "csgt_scraper.pipelines.CsgtScraperPipeline": 300,
+    "csgt_scraper.pipelines.NormalizeViolationsPipeline": 400,
+    "csgt_scraper.pipelines.ItemCollectorPipeline": 900,
 }
 
 # Enable and configure HTTP caching (disabled by default)
@@ -44,6 +52,39 @@ DOWNLOAD_TIMEOUT = 30
 RETRY_ENABLED = True
 RETRY_TIMES = 3
 
+# Captcha OCR ensemble: size of the OCR process pool and the number of
+# agreeing 6-character answers needed to stop voting early
+CAPTCHA_OCR_WORKERS = 4
+CAPTCHA_OCR_MIN_VOTES = 3
+
+# OCR backend: "tesserocr" (warm libtesseract engines, images passed in memory),
+# "pytesseract" (one tesseract process per call) or "auto" (tesserocr if installed)
+CAPTCHA_OCR_BACKEND = "auto"
+
+# Captcha solver: "ocr" (OCR ensemble) or "model" (trained character classifier,
+# falling back to the OCR ensemble when it is less sure than the minimum confidence)
+CAPTCHA_SOLVER = "ocr"
+CAPTCHA_MODEL_PATH = "models/captcha_model.npz"
+CAPTCHA_MODEL_MIN_CONFIDENCE = 0.5
+
+# Append every submitted captcha, its guess, per-config votes and whether the
+# site accepted it to this corpus directory (set to None to disable)
+CAPTCHA_CORPUS_DIR = "captcha_corpus"
+
+# After an accepted captcha, submit further plates of the same crawl through
+# the solved session without a new captcha; a '404' falls back to a new solve
+CAPTCHA_SESSION_REUSE = True
+
+# Long violation histories are split over several results pages. All pages of a
+# lookup are fetched concurrently in its session and merged into one item, up to
+# this many pages per plate
+RESULTS_MAX_PAGES = 10
+
+# Results pages no violation data could be extracted from are kept here for
+# debugging (compressed, stored once per content); items only carry the page's
+# hash and size. Set to None to disable
+RAW_PAGE_STORE_DIR = "raw_pages"
+
 # Log level
 LOG_LEVEL = "INFO"
 
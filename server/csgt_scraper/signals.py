@@ -0,0 +1,16 @@
+"""
+Custom Scrapy signals
+
+lookup_progress is sent by CsgtSpider as a lookup moves through the site's
+flow, so whoever runs the crawl (e.g. the API) can report progress before
+the item is scraped. Handlers receive:
+
+    spider: The spider sending the signal
+    license_plate, vehicle_type: The lookup's plate
+    stage: 'captcha' (solving captcha number `attempt`), 'captcha_rejected'
+        (the site refused captcha number `attempt`), 'session_rejected' (a
+        reused captcha session expired) or 'results' (fetching the results page)
+    **details: Stage details such as attempt and max_attempts
+"""
+
+lookup_progress = object()
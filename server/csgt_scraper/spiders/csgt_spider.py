@@ -7,10 +7,114 @@ given a license plate number, vehicle type, and captcha solution.
 
 import scrapy
 import base64
+import itertools
 import os
 from datetime import datetime
 from pathlib import Path
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.threads import deferToThread
 from csgt_scraper.items import ViolationItem
+from csgt_scraper.signals import lookup_progress
+from csgt_scraper.utils.captcha_corpus import get_corpus
+from csgt_scraper.utils.captcha_model import load_model
+from csgt_scraper.utils.normalize import Violation
+from csgt_scraper.utils.ocr_ensemble import get_ocr_ensemble
+from csgt_scraper.utils.page_store import get_page_store
+from csgt_scraper.utils.preprocessing import VARIANTS
+from csgt_scraper.utils.results_parser import extract_page_links, extract_violations, is_no_results
+
+
+class Lookup:
+    """One plate lookup with its own cookie jar (site session) and captcha attempt counter"""
+    
+    def __init__(self, license_plate, vehicle_type, cookiejar):
+        self.license_plate = license_plate
+        self.vehicle_type = vehicle_type
+        self.cookiejar = cookiejar
+        self.attempts = 0
+    
+    def __repr__(self):
+        return f"Lookup({self.license_plate!r}, {self.vehicle_type!r}, cookiejar={self.cookiejar})"
+
+
+class ResultPages:
+    """Results pages of one lookup, merged into a single item once every page arrived"""
+    
+    def __init__(self, item, max_pages, session=None):
+        self.item = item
+        self.max_pages = max_pages
+        # Meta of the first results page: the lookup's session, for next_plate
+        self.session = session or {}
+        # Page URL -> its violations (None until fetched), in request order
+        self.pages = {}
+        # Other URLs of requested pages, e.g. "?page=1" for the first page
+        self.aliases = set()
+        self.pending = 0
+        self.failed = 0
+        self.truncated = False
+    
+    def add(self, url, violations, aliases=()):
+        """Record the violations of a fetched page"""
+        self.pages[url] = violations
+        self.aliases.update(aliases)
+    
+    def claim(self, links):
+        """
+        Take the pages not requested yet, up to max_pages in total
+        
+        Args:
+            links: Page URLs found on a results page
+            
+        Returns:
+            URLs to request
+        """
+        new = []
+        for link in links:
+            if link in self.pages or link in self.aliases:
+                continue
+            if len(self.pages) >= self.max_pages:
+                self.truncated = True
+                break
+            self.pages[link] = None
+            new.append(link)
+        self.pending += len(new)
+        return new
+    
+    def violations(self):
+        """Violations of all fetched pages in page order, each listed once"""
+        merged = []
+        seen = set()
+        for violations in self.pages.values():
+            for violation in violations or ():
+                # Typed form: the same violation formatted differently is still a duplicate
+                key = Violation.from_details(violation)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(violation)
+        return merged
+
+
+def parse_plates(plates, vehicle_type="oto"):
+    """
+    Normalize a plates argument to (plate, vehicle_type) pairs
+    
+    Args:
+        plates: Iterable of plates or (plate, vehicle_type) pairs, or a
+            comma-separated string such as "59C136047:xemay,30A12345"
+        vehicle_type: Vehicle type of plates given without one
+        
+    Yields:
+        (plate, vehicle_type) pairs, lazily, so plates can be a stream
+    """
+    if isinstance(plates, str):
+        plates = [entry.split(':', 1) for entry in plates.split(',')]
+    
+    for entry in plates or []:
+        if isinstance(entry, str):
+            entry = (entry,)
+        plate = entry[0].strip()
+        if plate:
+            yield plate, (entry[1].strip() if len(entry) > 1 and entry[1] else vehicle_type)
 
 
 class CsgtSpider(scrapy.Spider):
@@ -18,53 +122,143 @@ class CsgtSpider(scrapy.Spider):
     allowed_domains = ["csgt.vn"]
     start_urls = ["https://www.csgt.vn/tra-cuu-phuong-tien-vi-pham.html"]
     
+    # Concurrency and politeness (CONCURRENT_REQUESTS_PER_DOMAIN, DOWNLOAD_DELAY,
+    # CONCURRENT_LOOKUPS) come from the project/crawler settings
     custom_settings = {
-        'DOWNLOAD_DELAY': 2,
         'COOKIES_ENABLED': True,
         'COOKIES_DEBUG': True,  # Enable cookie debugging
         'HTTPCACHE_ENABLED': False,  # Disable cache for this spider
-        'CONCURRENT_REQUESTS': 1,  # Process one request at a time to maintain session
     }
     
-    def __init__(self, license_plate=None, vehicle_type="oto", max_retries=3, *args, **kwargs):
+    def __init__(self, license_plate=None, vehicle_type="oto", max_retries=3, plates=None,
+                 concurrency=None, *args, **kwargs):
         """
         Initialize spider with search parameters
         
         Args:
             license_plate: License plate number (e.g., "30A12345")
             vehicle_type: Type of vehicle - "oto" (car), "xemay" (motorcycle), "xedapdien" (electric bike)
-            max_retries: Maximum number of captcha retry attempts (default: 3)
+            max_retries: Maximum number of captcha retry attempts per plate (default: 3)
+            plates: Further plates as a list or stream of plates or (plate, vehicle_type)
+                pairs, or a string like "59C136047:xemay,30A12345:oto"; plates without
+                a vehicle type use vehicle_type. With CAPTCHA_SESSION_REUSE they are
+                submitted through already solved sessions.
+            concurrency: Number of lookups (sessions) to run in parallel
+                (default: the CONCURRENT_LOOKUPS setting)
         """
         super(CsgtSpider, self).__init__(*args, **kwargs)
         self.license_plate = license_plate
         self.vehicle_type = vehicle_type
         self.max_retries = int(max_retries)
-        self.retry_count = 0
+        self.concurrency = int(concurrency) if concurrency else None
+        
+        # Plates still to look up, consumed lazily by new lookups
+        self.plates = itertools.chain(
+            parse_plates([license_plate] if license_plate else [], vehicle_type),
+            parse_plates(plates, vehicle_type),
+        )
+        
+        # Each lookup gets its own cookie jar, so sessions do not interfere
+        self.cookiejars = itertools.count(1)
+        
+        # Whether a solved session accepts further plates without a new captcha:
+        # None until the first reuse attempt tells us
+        self.session_reusable = None
+        
+        # Per-config OCR answers of each solved captcha, keyed by image path
+        self.captcha_votes = {}
         
         # Create directory for captcha images
         self.captcha_dir = Path("captcha_images")
         self.captcha_dir.mkdir(exist_ok=True)
         
         # Validate inputs
-        if not self.license_plate:
+        if not self.license_plate and not plates:
             self.logger.warning("No license plate provided! Use -a license_plate=<plate>")
     
+    async def start(self):
+        """Start the first CONCURRENT_LOOKUPS lookups (Scrapy >= 2.13)"""
+        for request in self.start_requests():
+            yield request
+    
     def start_requests(self):
-        """Override start_requests to explicitly set cookie jar"""
-        for url in self.start_urls:
-            self.logger.info(f"Starting request to: {url} with cookiejar=1")
-            yield scrapy.Request(
-                url=url,
-                callback=self.parse,
-                meta={'cookiejar': 1},  # Explicitly use cookie jar 1 from the start
-                dont_filter=True
-            )
+        """
+        Start the first CONCURRENT_LOOKUPS lookups, each in its own cookie jar
+        
+        Every finished lookup starts the next one (see next_plate), so this many
+        sessions stay in flight until the plates run out.
+        """
+        concurrency = self.concurrency or self.settings.getint('CONCURRENT_LOOKUPS', 1)
+        for _ in range(max(concurrency, 1)):
+            lookup = self.new_lookup()
+            if lookup is None:
+                break
+            self.logger.info(f"Starting lookup {lookup}")
+            yield self.lookup_request(lookup)
+    
+    def new_lookup(self, cookiejar=None):
+        """
+        Take the next plate off the plates stream
+        
+        Args:
+            cookiejar: Cookie jar to use (default: a new one)
+            
+        Returns:
+            Lookup, or None when there are no plates left
+        """
+        plate = next(self.plates, None)
+        if plate is None:
+            return None
+        
+        self.crawler.stats.inc_value('lookups/started')
+        return Lookup(*plate, cookiejar=cookiejar or next(self.cookiejars))
+    
+    def report_progress(self, lookup, stage, **details):
+        """
+        Send the lookup_progress signal for a lookup (see csgt_scraper.signals)
+        
+        Args:
+            lookup: Lookup that progressed
+            stage: Stage the lookup reached
+            **details: Stage details, e.g. attempt
+        """
+        self.crawler.signals.send_catch_log(
+            signal=lookup_progress,
+            spider=self,
+            license_plate=lookup.license_plate,
+            vehicle_type=lookup.vehicle_type,
+            stage=stage,
+            **details
+        )
+    
+    def lookup_request(self, lookup, priority=0):
+        """
+        Request the search page to start a full lookup (new captcha) for a plate
+        
+        Args:
+            lookup: Lookup to start
+            priority: Scheduler priority
+        """
+        return scrapy.Request(
+            url=self.start_urls[0],
+            callback=self.parse,
+            errback=self.lookup_failed,
+            meta={
+                'cookiejar': lookup.cookiejar,  # Explicitly use the lookup's cookie jar from the start
+                'lookup': lookup,
+                'license_plate': lookup.license_plate,
+                'vehicle_type': lookup.vehicle_type,
+            },
+            dont_filter=True,
+            priority=priority,
+        )
     
     def parse(self, response):
         """Parse the main search page and extract captcha"""
         self.logger.info(f"Parsing main page: {response.url}")
         
-        if not self.license_plate:
+        lookup = response.meta.get('lookup')
+        if lookup is None or not lookup.license_plate:
             self.logger.error("License plate is required!")
             return
         
@@ -79,16 +273,19 @@ class CsgtSpider(scrapy.Spider):
                 captcha_url = response.urljoin(captcha_url)
             
             self.logger.info("IMPORTANT: Maintaining session cookies for captcha validation")
+            self.report_progress(lookup, 'captcha', attempt=lookup.attempts + 1, max_attempts=self.max_retries)
             
             # Download and save captcha image
             # IMPORTANT: We need to maintain the session that was created with the main page
             yield scrapy.Request(
                 captcha_url,
                 callback=self.save_captcha,
+                errback=self.lookup_failed,
                 meta={
                     'main_response': response,  # Store the ENTIRE response object
                     'dont_cache': True,
-                    'cookiejar': 1,  # Use cookie jar 1
+                    'cookiejar': lookup.cookiejar,  # Use the lookup's cookie jar
+                    'lookup': lookup,
                 },
                 dont_filter=True,  # Allow multiple captcha downloads
                 priority=10  # High priority
@@ -96,12 +293,17 @@ class CsgtSpider(scrapy.Spider):
         else:
             self.logger.error("Could not find captcha image!")
             # Try to submit without captcha or with user input
-            yield from self.submit_form(response, "")
+            yield from self.submit_form(response, "", lookup)
     
-    def save_captcha(self, response):
-        """Save captcha image and prompt for manual input"""
+    async def save_captcha(self, response):
+        """
+        Save captcha image, solve it and submit the form
+        
+        Solving runs on the reactor thread pool, so other in-flight requests
+        keep moving while OCR is busy.
+        """
         # Save captcha image
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         captcha_filename = self.captcha_dir / f"captcha_{timestamp}.png"
         
         with open(captcha_filename, 'wb') as f:
@@ -128,8 +330,10 @@ class CsgtSpider(scrapy.Spider):
         
         self.logger.info("=" * 60)
         
-        # Try to solve captcha automatically (basic implementation)
-        captcha_text = self.solve_captcha(captcha_filename)
+        # Try to solve captcha automatically, off the reactor thread
+        captcha_text = await maybe_deferred_to_future(
+            deferToThread(self.solve_captcha, captcha_filename)
+        )
         
         if not captcha_text:
             # If automatic solving fails, you can implement manual input here
@@ -137,6 +341,13 @@ class CsgtSpider(scrapy.Spider):
             self.logger.info("You can implement manual captcha input or use OCR")
             captcha_text = ""  # Empty for now
         
+        # Keep what was guessed, so the site's verdict can be recorded in the corpus
+        captcha_record = {
+            'image': response.body,
+            'guess': captcha_text,
+            'votes': self.captcha_votes.pop(str(captcha_filename), {}),
+        }
+        
         # Get the main page response from meta
         main_response = response.meta.get('main_response')
         
@@ -145,11 +356,32 @@ class CsgtSpider(scrapy.Spider):
         self.logger.info(f"Submitting form directly with session cookies (not reloading page)")
         
         # Submit the form directly with the captcha text
-        yield from self.submit_form(main_response, captcha_text)
+        for request in self.submit_form(
+            main_response,
+            captcha_text,
+            response.meta['lookup'],
+            captcha_record=captcha_record,
+        ):
+            yield request
+    
+    @property
+    def ocr_ensemble(self):
+        """Process-wide OCR ensemble configured from the crawler settings"""
+        return get_ocr_ensemble(
+            max_workers=self.settings.getint('CAPTCHA_OCR_WORKERS', 4),
+            min_votes=self.settings.getint('CAPTCHA_OCR_MIN_VOTES', 3),
+            backend=self.settings.get('CAPTCHA_OCR_BACKEND', 'auto'),
+        )
     
     def solve_captcha(self, image_path):
         """
-        Attempt to solve captcha automatically using OCR with multiple preprocessing methods
+        Attempt to solve captcha automatically
+        
+        With CAPTCHA_SOLVER = "model" the trained character classifier is tried
+        first; its answer is used when it is at least CAPTCHA_MODEL_MIN_CONFIDENCE
+        sure. Otherwise all preprocessing/Tesseract configurations run on the
+        parallel OCR ensemble and voting stops early once a 6-character answer
+        reaches the configured majority (CAPTCHA_OCR_MIN_VOTES).
         
         Args:
             image_path: Path to captcha image
@@ -157,306 +389,108 @@ class CsgtSpider(scrapy.Spider):
         Returns:
             Captcha text or None if solving fails
         """
+        if self.settings.get('CAPTCHA_SOLVER', 'ocr') == 'model':
+            captcha_text = self.solve_captcha_with_model(image_path)
+            if captcha_text:
+                return captcha_text
+        
         try:
-            import pytesseract
-            from PIL import Image, ImageEnhance, ImageFilter, ImageOps
-            from collections import Counter
-            import numpy as np
-            
-            img = Image.open(image_path)
-            
-            # Save original size for later
-            original_width, original_height = img.size
-            
-            # Try multiple preprocessing and OCR configurations
-            results = []
-            
-            # Configuration 0: Remove gray pixels (convert to white) - BEST FOR NOISY CAPTCHAS
-            try:
-                import numpy as np
-                gray = img.convert('L')
-                img_array = np.array(gray)
-                
-                # Convert gray pixels (anything not very dark) to white
-                # Pixels darker than threshold stay black, others become white
-                threshold = 100  # Adjust this: lower = more aggressive
-                img_array = np.where(img_array > threshold, 255, 0)
-                
-                cleaned = Image.fromarray(img_array.astype('uint8'))
-                text = pytesseract.image_to_string(
-                    cleaned,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 0 (gray removed, psm 8): {text}")
-            except Exception as e:
-                self.logger.debug(f"Config 0 failed: {e}")
-                pass
-            
-            # Configuration 1: Original image, PSM 8 (single word)
-            try:
-                text = pytesseract.image_to_string(
-                    img, 
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 1 (original, psm 8): {text}")
-            except:
-                pass
-            
-            # Configuration 2: Grayscale
-            try:
-                gray = img.convert('L')
-                text = pytesseract.image_to_string(
-                    gray,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 2 (grayscale, psm 8): {text}")
-            except:
-                pass
-            
-            # Configuration 3: High contrast
-            try:
-                gray = img.convert('L')
-                enhancer = ImageEnhance.Contrast(gray)
-                high_contrast = enhancer.enhance(2.5)
-                text = pytesseract.image_to_string(
-                    high_contrast,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 3 (high contrast, psm 8): {text}")
-            except:
-                pass
-            
-            # Configuration 4: Remove gray pixels + sharpen
-            try:
-                import numpy as np
-                gray = img.convert('L')
-                img_array = np.array(gray)
-                
-                # More aggressive gray removal
-                img_array = np.where(img_array > 80, 255, 0)
-                cleaned = Image.fromarray(img_array.astype('uint8'))
-                
-                # Apply sharpening
-                sharpened = cleaned.filter(ImageFilter.SHARPEN)
-                
-                text = pytesseract.image_to_string(
-                    sharpened,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 4 (gray removed+sharp, psm 8): {text}")
-            except Exception as e:
-                self.logger.debug(f"Config 4 failed: {e}")
-                pass
-            
-            # Configuration 5: Sharpen image
-            try:
-                sharpened = img.filter(ImageFilter.SHARPEN)
-                text = pytesseract.image_to_string(
-                    sharpened,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 5 (sharpened, psm 8): {text}")
-            except:
-                pass
-            
-            # Configuration 6: Gray removal with different threshold
-            try:
-                import numpy as np
-                gray = img.convert('L')
-                img_array = np.array(gray)
-                
-                # Try different threshold
-                img_array = np.where(img_array > 120, 255, 0)
-                cleaned = Image.fromarray(img_array.astype('uint8'))
-                
-                text = pytesseract.image_to_string(
-                    cleaned,
-                    config='--psm 7 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 6 (gray removed, psm 7): {text}")
-            except Exception as e:
-                self.logger.debug(f"Config 6 failed: {e}")
-                pass
-            
-            # Configuration 7: Median filter to remove noise, then gray removal
-            try:
-                gray = img.convert('L')
-                
-                # Apply median filter to remove salt-and-pepper noise
-                filtered = gray.filter(ImageFilter.MedianFilter(size=3))
-                img_array = np.array(filtered)
-                
-                # Remove gray pixels
-                img_array = np.where(img_array > 100, 255, 0)
-                cleaned = Image.fromarray(img_array.astype('uint8'))
-                
-                text = pytesseract.image_to_string(
-                    cleaned,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 7 (median+gray removed, psm 8): {text}")
-            except Exception as e:
-                self.logger.debug(f"Config 7 failed: {e}")
-                pass
-            
-            # Configuration 8: Upscale + Gray removal (better for small/stylized fonts)
-            try:
-                # Upscale image 2x for better OCR
-                upscaled = img.resize((original_width * 2, original_height * 2), Image.LANCZOS)
-                gray = upscaled.convert('L')
-                img_array = np.array(gray)
-                
-                # Remove gray pixels
-                img_array = np.where(img_array > 100, 255, 0)
-                cleaned = Image.fromarray(img_array.astype('uint8'))
-                
-                text = pytesseract.image_to_string(
-                    cleaned,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 8 (upscaled+gray removed, psm 8): {text}")
-            except Exception as e:
-                self.logger.debug(f"Config 8 failed: {e}")
-                pass
-            
-            # Configuration 9: Erosion to separate touching characters
-            try:
-                from scipy import ndimage
-                
-                gray = img.convert('L')
-                img_array = np.array(gray)
-                
-                # Binarize
-                img_array = np.where(img_array > 100, 255, 0)
-                
-                # Erode slightly to separate touching characters
-                img_array = ndimage.binary_erosion(img_array == 0, iterations=1).astype(np.uint8) * 255
-                img_array = 255 - img_array  # Invert back
-                
-                cleaned = Image.fromarray(img_array.astype('uint8'))
-                
-                text = pytesseract.image_to_string(
-                    cleaned,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 9 (erosion, psm 8): {text}")
-            except Exception as e:
-                self.logger.debug(f"Config 9 failed: {e}")
-                pass
-            
-            # Configuration 10: Adaptive thresholding (better for uneven lighting)
-            try:
-                from PIL import ImageOps
-                
-                gray = img.convert('L')
-                
-                # Invert if needed
-                img_array = np.array(gray)
-                
-                # Adaptive threshold using local mean
-                from scipy import ndimage
-                local_mean = ndimage.uniform_filter(img_array.astype(float), size=15)
-                binary = img_array > local_mean - 10
-                img_array = (binary * 255).astype(np.uint8)
-                
-                cleaned = Image.fromarray(img_array)
-                
-                text = pytesseract.image_to_string(
-                    cleaned,
-                    config='--psm 8 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 10 (adaptive threshold, psm 8): {text}")
-            except Exception as e:
-                self.logger.debug(f"Config 10 failed: {e}")
-                pass
+            with open(image_path, 'rb') as f:
+                image_bytes = f.read()
             
-            # Configuration 11: PSM 13 (raw line, no OSD or deskewing)
-            try:
-                gray = img.convert('L')
-                img_array = np.array(gray)
-                img_array = np.where(img_array > 100, 255, 0)
-                cleaned = Image.fromarray(img_array.astype('uint8'))
-                
-                text = pytesseract.image_to_string(
-                    cleaned,
-                    config='--psm 13 -c tessedit_char_whitelist=0123456789abcdefghijklmnopqrstuvwxyz'
-                ).strip()
-                if text and len(text) >= 4:
-                    results.append(text)
-                    self.logger.info(f"OCR Config 11 (psm 13): {text}")
-            except Exception as e:
-                self.logger.debug(f"Config 11 failed: {e}")
-                pass
+            result = self.ocr_ensemble.solve(image_bytes, logger=self.logger)
+            self._record_ocr_votes(result)
+            self.captcha_votes[str(image_path)] = {
+                VARIANTS[index].name: answer for index, answer in result.votes.items()
+            }
             
-            if results:
-                # Filter results to only include 6-character captchas
-                valid_results = [r for r in results if len(r) == 6]
-                
-                if valid_results:
-                    # Use voting on 6-character results
-                    counter = Counter(valid_results)
-                    most_common = counter.most_common(1)[0]
-                    captcha_text = most_common[0]
-                    confidence = most_common[1] / len(valid_results) * 100
-                    
-                    self.logger.info(f"OCR FINAL RESULT (6 chars): '{captcha_text}' (confidence: {confidence:.1f}%, {most_common[1]}/{len(valid_results)} valid votes)")
-                    return captcha_text
-                else:
-                    # No 6-character results found, log all results for debugging
-                    self.logger.warning(f"No 6-character results found. Got: {results}")
-                    self.logger.warning(f"Result lengths: {[len(r) for r in results]}")
-                    
-                    # Still use voting on whatever we got (fallback)
-                    counter = Counter(results)
-                    most_common = counter.most_common(1)[0]
-                    captcha_text = most_common[0]
-                    confidence = most_common[1] / len(results) * 100
-                    
-                    self.logger.warning(f"OCR FALLBACK RESULT: '{captcha_text}' (length: {len(captcha_text)}, confidence: {confidence:.1f}%)")
-                    return captcha_text
-            else:
+            if result.text is None:
                 self.logger.warning("OCR could not extract text from captcha with any configuration")
                 return None
+            
+            if len(result.text) == 6:
+                self.logger.info(f"OCR FINAL RESULT (6 chars): '{result.text}' (confidence: {result.confidence:.1f}%, {len(result.votes)} answers, early exit: {result.early_exit})")
+            else:
+                self.logger.warning(f"No 6-character results found. Got: {list(result.votes.values())}")
+                self.logger.warning(f"OCR FALLBACK RESULT: '{result.text}' (length: {len(result.text)}, confidence: {result.confidence:.1f}%)")
+            
+            return result.text
                 
         except ImportError:
-            self.logger.warning("pytesseract not installed. Install with: pip install pytesseract")
+            self.logger.warning("No OCR backend installed. Install with: pip install tesserocr (or pytesseract)")
             self.logger.warning("Also install Tesseract-OCR on your system")
             return None
         except Exception as e:
             self.logger.error(f"Error solving captcha: {e}")
             return None
     
-    def submit_form(self, response, captcha_text):
+    def solve_captcha_with_model(self, image_path):
+        """
+        Solve captcha with the trained character classifier
+        
+        Args:
+            image_path: Path to captcha image
+            
+        Returns:
+            Captcha text, or None if the model is missing or not confident enough
+        """
+        try:
+            model = load_model(self.settings.get('CAPTCHA_MODEL_PATH', 'models/captcha_model.npz'))
+            text, confidence = model.solve(image_path)
+            self.captcha_votes[str(image_path)] = {'model': text}
+        except FileNotFoundError:
+            self.logger.warning("Captcha model weights not found, falling back to OCR")
+            return None
+        except Exception as e:
+            # Corrupt weights or an unreadable image: OCR still gets its turn
+            self.logger.error(f"Error solving captcha with the model, falling back to OCR: {e}")
+            self.crawler.stats.inc_value('captcha/model/errors')
+            return None
+        
+        min_confidence = self.settings.getfloat('CAPTCHA_MODEL_MIN_CONFIDENCE', 0.5)
+        self.logger.info(f"MODEL RESULT: '{text}' (confidence: {confidence:.2f})")
+        self.crawler.stats.inc_value('captcha/model/solves')
+        
+        if confidence < min_confidence:
+            self.crawler.stats.inc_value('captcha/model/low_confidence')
+            self.logger.info(f"Model confidence below {min_confidence}, falling back to OCR")
+            return None
+        
+        return text
+    
+    def _record_ocr_votes(self, result):
+        """Record per-config answers and agreement in the crawler stats"""
+        stats = self.crawler.stats
+        stats.inc_value('captcha/ocr/solves')
+        if result.early_exit:
+            stats.inc_value('captcha/ocr/early_exit')
+        for index, answer in result.votes.items():
+            stats.inc_value(f'captcha/ocr/config_{index}/answers')
+            if answer == result.text:
+                stats.inc_value(f'captcha/ocr/config_{index}/agreed')
+    
+    def closed(self, reason):
+        """Log cumulative per-config OCR latency and agreement"""
+        for row in self.ocr_ensemble.report():
+            if row['runs']:
+                self.logger.info(
+                    f"OCR config {row['index']} ({row['name']}): runs={row['runs']} "
+                    f"mean={row['mean_ms']}ms agreement={row['agreement']} cancelled={row['cancelled']}"
+                )
+    
+    def submit_form(self, response, captcha_text, lookup, captcha_record=None, reused_session=False):
         """
         Submit the search form with license plate, vehicle type, and captcha via AJAX
         
         Args:
-            response: Original response object
+            response: Response of the search page the form is on (only its URL is used)
             captcha_text: Solved captcha text
+            lookup: Lookup the plate, vehicle type and cookie jar are taken from
+            captcha_record: Optional captcha image, guess and votes to record with the outcome
+            reused_session: Whether this resubmits an already accepted captcha for another plate
         """
-        self.logger.info(f"Submitting AJAX request with license_plate={self.license_plate}, vehicle_type={self.vehicle_type}, captcha={captcha_text}")
+        license_plate, vehicle_type = lookup.license_plate, lookup.vehicle_type
+        self.logger.info(f"Submitting AJAX request with license_plate={license_plate}, vehicle_type={vehicle_type}, captcha={captcha_text}")
         
         # Map vehicle types to form values
         vehicle_type_map = {
@@ -468,12 +502,12 @@ class CsgtSpider(scrapy.Spider):
             'electric_bike': '3'
         }
         
-        vehicle_type_value = vehicle_type_map.get(self.vehicle_type.lower(), '1')
+        vehicle_type_value = vehicle_type_map.get(vehicle_type.lower(), '1')
         
         # Prepare AJAX data (matching the actual form submission)
         # Note: cUrl should be the current page URL, ipClient can be empty or an IP
         formdata = {
-            'BienKS': self.license_plate.upper(),  # Biển kiểm soát
+            'BienKS': license_plate.upper(),       # Biển kiểm soát
             'Xe': vehicle_type_value,              # Loại phương tiện (1=oto, 2=xemay, 3=xedapdien)
             'captcha': captcha_text,               # Mã bảo mật
             'ipClient': '0.0.0.0',                 # IP client (use placeholder)
@@ -489,12 +523,13 @@ class CsgtSpider(scrapy.Spider):
         
         # Log cookies being sent
         self.logger.info(f"Response URL we're submitting from: {response.url}")
-        self.logger.info(f"Cookie jar ID: {response.meta.get('cookiejar', 'default')}")
+        self.logger.info(f"Cookie jar ID: {lookup.cookiejar}")
         
         yield scrapy.FormRequest(
             url=ajax_url,
             formdata=formdata,
             callback=self.parse_ajax_response,
+            errback=self.lookup_failed,
             dont_filter=True,
             method='POST',
             headers={
@@ -503,12 +538,63 @@ class CsgtSpider(scrapy.Spider):
                 'Referer': response.url,  # Important: include referer
             },
             meta={
-                'license_plate': self.license_plate, 
-                'vehicle_type': self.vehicle_type,
-                'cookiejar': 1,  # Use the same cookie jar as before
+                'license_plate': license_plate,
+                'vehicle_type': vehicle_type,
+                'cookiejar': lookup.cookiejar,  # Use the same cookie jar as before
+                'lookup': lookup,
+                'captcha_record': captcha_record,
+                # Kept so the next plate can be submitted through this session
+                'captcha_text': captcha_text,
+                'form_response': response,
+                'reused_session': reused_session,
             }
         )
     
+    def next_plate(self, meta, session_valid=False):
+        """
+        Finish a lookup and start the next one from the plates stream, if any
+        
+        After an accepted captcha the next plate is submitted through the same
+        session with the same captcha (CAPTCHA_SESSION_REUSE), so each parallel
+        session runs plates one after another until the site asks for a new
+        captcha. That happens only once the lookup's results (every results
+        page) are in: a session never has two plates in flight, as the site
+        keeps one search per session. A '404' on a reused session falls back
+        to the full flow for that plate (see parse_ajax_response). Otherwise
+        the next plate starts a full lookup in a new cookie jar.
+        
+        Args:
+            meta: Meta of the lookup's last response, with its lookup and
+                (after a form submission) form_response and captcha_text
+            session_valid: Whether the site accepted the lookup's captcha
+        """
+        self.crawler.stats.inc_value('lookups/finished')
+        
+        form_response = meta.get('form_response')
+        captcha_text = meta.get('captcha_text')
+        reuse = (
+            session_valid
+            and self.settings.getbool('CAPTCHA_SESSION_REUSE', True)
+            and self.session_reusable is not False
+            and form_response is not None
+            and captcha_text
+            and meta.get('lookup') is not None
+        )
+        
+        if not reuse:
+            lookup = self.new_lookup()
+            if lookup is not None:
+                yield self.lookup_request(lookup)
+            return
+        
+        lookup = self.new_lookup(cookiejar=meta['lookup'].cookiejar)
+        if lookup is None:
+            return
+        
+        self.logger.info(f"Reusing solved session for {lookup.license_plate} (no new captcha)")
+        self.crawler.stats.inc_value('captcha/session/reuse_attempts')
+        yield from self.submit_form(form_response, captcha_text, lookup, reused_session=True)
+    
     def parse_ajax_response(self, response):
         """Parse the AJAX JSON response and follow redirect URL"""
         self.logger.info(f"Parsing AJAX response from: {response.url}")
@@ -521,33 +607,39 @@ class CsgtSpider(scrapy.Spider):
             self.logger.info(f"AJAX Response: {response_text}")
             
             # Check if it's an error response
+            if response_text == '404' and response.meta.get('reused_session'):
+                # The session needs a new captcha after all: full flow for this plate
+                self.crawler.stats.inc_value('captcha/session/reuse_rejected')
+                if self.session_reusable is None:
+                    # Never worked for this site, so stop trying
+                    self.session_reusable = False
+                lookup = response.meta['lookup']
+                self.logger.info(f"Session reuse rejected for {lookup.license_plate}, solving a new captcha")
+                self.report_progress(lookup, 'session_rejected')
+                # Leave the reused session to its owner and start over in a new cookie jar
+                lookup.cookiejar = next(self.cookiejars)
+                yield self.lookup_request(lookup, priority=10)
+                return
+            
             if response_text == '404':
-                self.retry_count += 1
-                self.logger.error(f"Captcha verification failed! (Error 404) - Attempt {self.retry_count}/{self.max_retries}")
+                self.record_captcha_outcome(response, accepted=False)
+                lookup = response.meta['lookup']
+                lookup.attempts += 1
+                self.logger.error(f"Captcha verification failed for {lookup.license_plate}! (Error 404) - Attempt {lookup.attempts}/{self.max_retries}")
+                self.report_progress(lookup, 'captcha_rejected', attempt=lookup.attempts, max_attempts=self.max_retries)
                 
                 # Retry if we haven't exceeded max retries
-                if self.retry_count < self.max_retries:
-                    self.logger.info(f"Retrying... Getting new captcha (attempt {self.retry_count + 1})")
-                    # Start over from the beginning
-                    yield scrapy.Request(
-                        url=self.start_urls[0],
-                        callback=self.parse,
-                        meta={'cookiejar': response.meta.get('cookiejar', 1)},
-                        dont_filter=True,
-                        priority=10
-                    )
+                if lookup.attempts < self.max_retries:
+                    self.logger.info(f"Retrying... Getting new captcha (attempt {lookup.attempts + 1})")
+                    # Start over from the beginning, in the same cookie jar
+                    yield self.lookup_request(lookup, priority=10)
                     return
                 else:
                     self.logger.error(f"Max retries ({self.max_retries}) exceeded. Giving up.")
-                    item = ViolationItem()
-                    item['license_plate'] = response.meta.get('license_plate', self.license_plate)
-                    item['vehicle_type'] = response.meta.get('vehicle_type', self.vehicle_type)
-                    item['url'] = response.url
-                    item['scraped_at'] = datetime.now().isoformat()
-                    item['violation_found'] = False
-                    item['status'] = 'error'
-                    item['error_message'] = f'Captcha verification failed after {self.max_retries} attempts'
-                    yield item
+                    yield self.error_item(
+                        lookup, response.url, f'Captcha verification failed after {self.max_retries} attempts'
+                    )
+                    yield from self.next_plate(response.meta)
                     return
             
             # Try to parse JSON response
@@ -555,35 +647,111 @@ class CsgtSpider(scrapy.Spider):
                 # Clean up any extra whitespace
                 response_text = response_text.replace('\n', '').replace('\r', '').strip()
                 result = json.loads(response_text)
+                self.record_captcha_outcome(response, accepted=bool(result.get('success')))
+                
+                if result.get('success') and response.meta.get('reused_session'):
+                    self.session_reusable = True
+                    self.crawler.stats.inc_value('captcha/session/reused')
                 
                 if result.get('success'):
                     # Get the redirect URL
                     redirect_url = result.get('href')
                     if redirect_url:
                         self.logger.info(f"Following redirect to: {redirect_url}")
-                        # Follow the redirect URL to get actual results
+                        self.report_progress(response.meta['lookup'], 'results')
+                        # Follow the redirect URL to get actual results; the next
+                        # plate starts once they are in (see next_plate)
                         yield scrapy.Request(
                             url=response.urljoin(redirect_url),
                             callback=self.parse_results,
+                            errback=self.results_failed,
                             dont_filter=True,
                             meta={
                                 'license_plate': response.meta.get('license_plate'),
                                 'vehicle_type': response.meta.get('vehicle_type'),
-                                'cookiejar': 1,  # Continue using same cookie jar
+                                'cookiejar': response.meta['cookiejar'],  # Continue using same cookie jar
+                                'lookup': response.meta['lookup'],
+                                'captcha_text': response.meta.get('captcha_text'),
+                                'form_response': response.meta.get('form_response'),
                             }
                         )
                     else:
                         self.logger.error("No redirect URL in success response")
+                        yield from self.next_plate(response.meta, session_valid=True)
                 else:
                     self.logger.error("AJAX request was not successful")
                     self.logger.error(f"Response: {response_text}")
+                    yield from self.next_plate(response.meta)
                     
             except json.JSONDecodeError as e:
                 self.logger.error(f"Failed to parse JSON response: {e}")
                 self.logger.error(f"Response text: {response_text}")
+                yield from self.next_plate(response.meta)
                 
         except Exception as e:
             self.logger.error(f"Error parsing AJAX response: {e}")
+            lookup = response.meta.get('lookup')
+            if lookup is not None:
+                yield self.error_item(lookup, response.url, f'Error parsing AJAX response: {e}')
+            yield from self.next_plate(response.meta)
+    
+    def error_item(self, lookup, url, message):
+        """
+        Item reporting a lookup that failed
+        
+        Args:
+            lookup: Lookup that failed
+            url: URL of the request that failed
+            message: What went wrong
+        """
+        item = ViolationItem()
+        item['license_plate'] = lookup.license_plate
+        item['vehicle_type'] = lookup.vehicle_type
+        item['url'] = url
+        item['scraped_at'] = datetime.now().isoformat()
+        item['violation_found'] = False
+        item['status'] = 'error'
+        item['error_message'] = message
+        return item
+    
+    def lookup_failed(self, failure):
+        """
+        A request of a lookup (search page, captcha or form submission) failed
+        
+        Reports the plate as an error and starts the next plate, so a dead
+        connection does not cost one of the parallel lookups for good.
+        """
+        request = failure.request
+        self.logger.error(f"Request {request.url} failed: {failure.value!r}")
+        self.crawler.stats.inc_value('lookups/failed')
+        lookup = request.meta.get('lookup')
+        if lookup is not None:
+            yield self.error_item(lookup, request.url, f'Request failed: {failure.value!r}')
+        yield from self.next_plate(request.meta)
+    
+    def record_captcha_outcome(self, response, accepted):
+        """
+        Append the submitted captcha and the site's verdict to the captcha corpus
+        
+        Args:
+            response: AJAX response to the form submission
+            accepted: Whether the site accepted the captcha
+        """
+        corpus_dir = self.settings.get('CAPTCHA_CORPUS_DIR')
+        captcha_record = response.meta.get('captcha_record')
+        if not corpus_dir or not captcha_record or not captcha_record['guess']:
+            return
+        
+        try:
+            get_corpus(corpus_dir).append(
+                captcha_record['image'],
+                captcha_record['guess'],
+                accepted,
+                votes=captcha_record['votes'],
+            )
+            self.crawler.stats.inc_value(f"captcha/corpus/{'accepted' if accepted else 'rejected'}")
+        except OSError as e:
+            self.logger.error(f"Could not record captcha in corpus: {e}")
     
     def parse_results(self, response):
         """Parse the search results page with actual violation data"""
@@ -591,94 +759,147 @@ class CsgtSpider(scrapy.Spider):
         
         # Create item to store results
         item = ViolationItem()
-        item['license_plate'] = response.meta.get('license_plate', self.license_plate)
-        item['vehicle_type'] = response.meta.get('vehicle_type', self.vehicle_type)
+        item['license_plate'] = response.meta.get('license_plate')
+        item['vehicle_type'] = response.meta.get('vehicle_type')
         item['url'] = response.url
         item['scraped_at'] = datetime.now().isoformat()
         
-        # Check for "No results found" or "Không tìm thấy kết quả"
-        page_text = response.text.lower()
-        if 'không tìm thấy kết quả' in page_text or 'no results' in page_text:
+        # Extract violation details from the structured data in one pass over the
+        # <label>Field:</label> <div class="col-md-9">Value</div> pairs
+        violations = extract_violations(response.selector.root)
+        for violation in violations:
+            self.logger.debug(f"Violation: {violation}")
+        
+        # Without violation data, check for "No results found" or "Không tìm thấy kết quả"
+        if not violations and is_no_results(response.text):
             self.logger.info("No violations found for this license plate")
             item['violation_found'] = False
             item['violation_details'] = []
             item['status'] = 'success'
             yield item
+            yield from self.next_plate(response.meta, session_valid=True)
             return
         
-        # Extract violation details from the structured data
-        # The structure is: <label>Field:</label> followed by <div class="col-md-9">Value</div>
-        violation = {}
-        
-        # Extract license plate
-        license_match = response.xpath('//label[contains(.//span/text(), "Biển kiểm soát:")]/following-sibling::div[@class="col-md-9"]/text()').get()
-        if license_match:
-            violation['license_plate'] = license_match.strip()
-            self.logger.info(f"Found license plate: {violation['license_plate']}")
-        
-        # Extract vehicle color
-        color_match = response.xpath('//label[contains(.//span/text(), "Màu biển:")]/following-sibling::div[@class="col-md-9"]/text()').get()
-        if color_match:
-            violation['vehicle_color'] = color_match.strip()
-            self.logger.info(f"Vehicle color: {violation['vehicle_color']}")
-        
-        # Extract vehicle type
-        vehicle_type_match = response.xpath('//label[contains(.//span/text(), "Loại phương tiện:")]/following-sibling::div[@class="col-md-9"]/text()').get()
-        if vehicle_type_match:
-            violation['vehicle_type'] = vehicle_type_match.strip()
-            self.logger.info(f"Vehicle type: {violation['vehicle_type']}")
-        
-        # Extract violation time
-        time_match = response.xpath('//label[contains(.//span/text(), "Thời gian vi phạm")]/following-sibling::div[@class="col-md-9"]/text()').get()
-        if time_match:
-            violation['violation_time'] = time_match.strip()
-            self.logger.info(f"Violation time: {violation['violation_time']}")
-        
-        # Extract violation location
-        location_match = response.xpath('//label[contains(.//span/text(), "Địa điểm vi phạm:")]/following-sibling::div[@class="col-md-9"]/text()').get()
-        if location_match:
-            violation['violation_location'] = location_match.strip()
-            self.logger.info(f"Violation location: {violation['violation_location']}")
-        
-        # Extract violation type/behavior
-        behavior_match = response.xpath('//label[contains(.//span/text(), "Hành vi vi phạm:")]/following-sibling::div[@class="col-md-9"]/text()').get()
-        if behavior_match:
-            violation['violation_behavior'] = behavior_match.strip()
-            self.logger.info(f"Violation behavior: {violation['violation_behavior']}")
-        
-        # Extract status (might be in a span with class)
-        status_match = response.xpath('//label[contains(.//span/text(), "Trạng thái")]/following-sibling::div[@class="col-md-9"]//span/text()').get()
-        if not status_match:
-            status_match = response.xpath('//label[contains(.//span/text(), "Trạng thái")]/following-sibling::div[@class="col-md-9"]/text()').get()
-        if status_match:
-            violation['payment_status'] = status_match.strip()
-            self.logger.info(f"Payment status: {violation['payment_status']}")
-        
-        # Extract unit that detected violation
-        unit_match = response.xpath('//label[contains(.//span/text(), "Đơn vị phát hiện vi phạm:")]/following-sibling::div[@class="col-md-9"]/text()').get()
-        if unit_match:
-            violation['detecting_unit'] = unit_match.strip()
-            self.logger.info(f"Detecting unit: {violation['detecting_unit']}")
-        
-        # Extract resolution location
-        resolution_match = response.xpath('//label[contains(.//span/text(), "Nơi giải quyết vụ việc:")]/following-sibling::div[@class="col-md-9"]//text()').getall()
-        if resolution_match:
-            violation['resolution_location'] = ' '.join([t.strip() for t in resolution_match if t.strip()])
-            self.logger.info(f"Resolution location: {violation['resolution_location']}")
-        
-        # Check if we found any violation data
-        if violation:
-            self.logger.info(f"Successfully extracted violation data: {len(violation)} fields")
-            item['violation_found'] = True
-            item['violation_details'] = [violation]  # List with one violation record
-            item['status'] = 'success'
-        else:
-            # If no structured data found, save raw HTML for debugging
-            self.logger.warning("Could not extract structured violation data, saving raw HTML")
+        if not violations:
+            # If no structured data found, keep the page for debugging
+            self.logger.warning("Could not extract structured violation data, storing the raw page")
             item['violation_found'] = False
             item['violation_details'] = []
-            item['raw_html'] = response.text
+            self.store_raw_page(response, item)
             item['status'] = 'partial'
+            yield item
+            yield from self.next_plate(response.meta, session_valid=True)
+            return
         
-        yield item
-
+        # Long histories are paginated: the item is complete once every page is in
+        pages = ResultPages(item, self.settings.getint('RESULTS_MAX_PAGES', 10), session=response.meta)
+        yield from self.follow_result_pages(response, pages, violations)
+    
+    def results_failed(self, failure):
+        """The results page of an accepted lookup could not be fetched: go on with the next plate"""
+        self.logger.error(f"Could not fetch results page {failure.request.url}: {failure.value!r}")
+        lookup = failure.request.meta.get('lookup')
+        if lookup is not None:
+            yield self.error_item(lookup, failure.request.url, f'Could not fetch results page: {failure.value!r}')
+        yield from self.next_plate(failure.request.meta, session_valid=True)
+    
+    def store_raw_page(self, response, item):
+        """
+        Store a results page in the raw page store and record its hash and size on the item
+        
+        Args:
+            response: Results page
+            item: ViolationItem of the lookup
+        """
+        store_dir = self.settings.get('RAW_PAGE_STORE_DIR')
+        if not store_dir:
+            return
+        try:
+            item['raw_html_hash'], item['raw_html_size'] = get_page_store(store_dir).put(response.body)
+            self.crawler.stats.inc_value('results/raw_pages_stored')
+            self.logger.info(f"Raw page stored as {item['raw_html_hash']}")
+        except OSError as e:
+            self.logger.error(f"Could not store raw page: {e}")
+    
+    def follow_result_pages(self, response, pages, violations):
+        """
+        Request the results pages linked from a page that were not requested yet
+        
+        All pages are requested at once, in the lookup's cookie jar (the site
+        session the results belong to), and run concurrently within the
+        per-domain limits. Pages found on later pages are followed as well,
+        up to RESULTS_MAX_PAGES in total. The merged item is yielded when no
+        page is pending any more, and the lookup's session moves on to the next
+        plate.
+        
+        Args:
+            response: Results page just parsed
+            pages: ResultPages of the lookup
+            violations: Violations extracted from the page
+        """
+        links, current = extract_page_links(response.selector.root, response.url)
+        pages.add(response.meta.get('results_url', response.url), violations, current)
+        for url in pages.claim(links):
+            yield scrapy.Request(
+                url,
+                callback=self.parse_results_page,
+                errback=self.results_page_failed,
+                dont_filter=True,
+                priority=10,  # Finish this lookup before starting further ones
+                meta={
+                    'cookiejar': response.meta['cookiejar'],
+                    'result_pages': pages,
+                    'results_url': url,
+                },
+            )
+        
+        if pages.pending == 0:
+            yield self.finish_results(pages)
+            yield from self.next_plate(pages.session, session_valid=True)
+    
+    def parse_results_page(self, response):
+        """Parse a further page of a paginated results list"""
+        pages = response.meta['result_pages']
+        pages.pending -= 1
+        violations = extract_violations(response.selector.root)
+        self.logger.info(f"Results page {response.url}: {len(violations)} violation(s)")
+        yield from self.follow_result_pages(response, pages, violations)
+    
+    def results_page_failed(self, failure):
+        """A further results page could not be fetched: finish with the pages that were"""
+        pages = failure.request.meta['result_pages']
+        pages.pending -= 1
+        pages.failed += 1
+        self.logger.error(f"Could not fetch results page {failure.request.url}: {failure.value!r}")
+        if pages.pending == 0:
+            yield self.finish_results(pages)
+            yield from self.next_plate(pages.session, session_valid=True)
+    
+    def finish_results(self, pages):
+        """
+        Merge the violations of all results pages into the lookup's item
+        
+        Args:
+            pages: ResultPages of the lookup
+            
+        Returns:
+            ViolationItem
+        """
+        item = pages.item
+        violations = pages.violations()
+        item['violation_found'] = True
+        item['violation_details'] = violations
+        item['status'] = 'success'
+        
+        self.crawler.stats.inc_value('results/pages', len(pages.pages))
+        if pages.truncated:
+            self.crawler.stats.inc_value('results/truncated')
+            self.logger.warning(f"More than {pages.max_pages} results pages for {item['license_plate']}, "
+                                f"kept the first {pages.max_pages}")
+        if pages.failed:
+            item['status'] = 'partial'
+            item['error_message'] = f"{pages.failed} of {len(pages.pages)} results pages could not be fetched"
+        
+        self.logger.info(f"Successfully extracted {len(violations)} violation(s) "
+                         f"from {len(pages.pages)} page(s)")
+        return item
@@ -0,0 +1,200 @@
+"""
+Captcha Corpus
+
+Append-only dataset of solved captchas and their outcome at the site. Each
+record links the captcha image to the guess that was submitted, the per-config
+OCR votes and whether the site accepted it, which gives ground truth for
+tuning and benchmarking solvers offline without hand-labelling.
+
+Layout of a corpus directory:
+
+    shard-<writer>-00000.bin   raw image bytes, concatenated
+    index-<writer>.jsonl       one JSON record per captcha (shard, offset, length, ...)
+
+Every writer (process) appends to its own shards and index, so several API
+workers can share one corpus directory without locking each other.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from csgt_scraper.utils.captcha_model import ALPHABET, CAPTCHA_LENGTH
+
+
+class CaptchaCorpus:
+    """Sharded append-only captcha dataset"""
+
+    def __init__(self, root, shard_size=64 * 1024 * 1024):
+        """
+        Initialize corpus
+
+        Args:
+            root: Corpus directory
+            shard_size: Start a new shard once the current one reaches this size (bytes)
+        """
+        self.root = Path(root)
+        self.shard_size = shard_size
+        self.writer = f"{socket.gethostname()}-{os.getpid()}"
+        self._lock = threading.Lock()
+        self._shard_number = None
+
+    @property
+    def index_path(self):
+        return self.root / f"index-{self.writer}.jsonl"
+
+    def _shard_path(self, number, writer=None):
+        return self.root / f"shard-{writer or self.writer}-{number:05d}.bin"
+
+    def _current_shard(self):
+        """Shard to append to, moving on to a new one when it is full"""
+        if self._shard_number is None:
+            self._shard_number = 0
+            while self._shard_path(self._shard_number + 1).exists():
+                self._shard_number += 1
+
+        path = self._shard_path(self._shard_number)
+        if path.exists() and path.stat().st_size >= self.shard_size:
+            self._shard_number += 1
+            path = self._shard_path(self._shard_number)
+
+        return path
+
+    def append(self, image_bytes, guess, accepted, votes=None, **extra):
+        """
+        Append a captcha and its outcome
+
+        Args:
+            image_bytes: Raw captcha image
+            guess: Text submitted to the site
+            accepted: Whether the site accepted the guess
+            votes: Optional dict of config name -> OCR answer
+            **extra: Additional JSON-serializable fields to store
+
+        Returns:
+            The stored index record
+        """
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            shard = self._current_shard()
+
+            with open(shard, 'ab') as f:
+                offset = f.tell()
+                f.write(image_bytes)
+
+            record = {
+                'id': uuid.uuid4().hex,
+                'shard': shard.name,
+                'offset': offset,
+                'length': len(image_bytes),
+                'guess': guess,
+                'accepted': accepted,
+                'votes': votes or {},
+                'timestamp': time.time(),
+                **extra,
+            }
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+            return record
+
+    def records(self, accepted=None):
+        """
+        Iterate over index records of all writers
+
+        Args:
+            accepted: If set, only yield records with this outcome
+
+        Yields:
+            Index records (dicts)
+        """
+        for index_path in sorted(self.root.glob('index-*.jsonl')):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if accepted is None or record['accepted'] == accepted:
+                        yield record
+
+    def read_image(self, record):
+        """Read the image bytes of a record"""
+        with open(self.root / record['shard'], 'rb') as f:
+            f.seek(record['offset'])
+            return f.read(record['length'])
+
+    def labeled(self):
+        """
+        Iterate over accepted captchas, whose guess is their true label
+
+        Yields:
+            (image bytes, label) pairs
+        """
+        for record in self.records(accepted=True):
+            yield self.read_image(record), record['guess']
+
+
+def _valid_label(label):
+    return len(label) == CAPTCHA_LENGTH and all(c in ALPHABET for c in label)
+
+
+def load_labeled_images(directory):
+    """
+    Load labeled captcha images from a directory
+
+    The label is the file name up to the first underscore or dot,
+    e.g. "64pnvp.png" or "64pnvp_20251015.png".
+
+    Args:
+        directory: Directory of images named after their label
+
+    Returns:
+        List of (image bytes, label) pairs
+    """
+    samples = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() not in ('.png', '.jpg', '.jpeg', '.gif'):
+            continue
+
+        label = path.name.split('_')[0].split('.')[0].lower()
+        if not _valid_label(label):
+            print(f"Skipping {path.name}: not a {CAPTCHA_LENGTH}-character label")
+            continue
+
+        samples.append((path.read_bytes(), label))
+
+    return samples
+
+
+def load_corpus_samples(corpus_dir):
+    """
+    Load the captchas the site accepted from a corpus, labeled by their guess
+
+    Args:
+        corpus_dir: Corpus directory (CAPTCHA_CORPUS_DIR)
+
+    Returns:
+        List of (image bytes, label) pairs
+    """
+    return [
+        (image, label.lower())
+        for image, label in CaptchaCorpus(corpus_dir).labeled()
+        if _valid_label(label.lower())
+    ]
+
+
+_corpora = {}
+_corpora_lock = threading.Lock()
+
+
+def get_corpus(root):
+    """Return the process-wide corpus writer for a directory"""
+    root = str(root)
+    with _corpora_lock:
+        if root not in _corpora:
+            _corpora[root] = CaptchaCorpus(root)
+        return _corpora[root]
@@ -0,0 +1,220 @@
+"""
+Captcha Character Model
+
+csgt.vn captchas are always 6 lowercase alphanumerics. Instead of running a
+general OCR engine a dozen times, this model segments the 6 characters by
+column projection and classifies each one with a small softmax classifier
+over a downscaled bitmap. Prediction is a handful of NumPy operations and
+runs on CPU in milliseconds.
+
+Weights are stored in a .npz file produced by train_captcha_model.py.
+"""
+
+import threading
+
+import numpy as np
+from PIL import Image
+
+from csgt_scraper.utils.preprocessing import CaptchaImage
+
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+CAPTCHA_LENGTH = 6
+
+# Each character is scaled to CHAR_SIZE x CHAR_SIZE pixels
+CHAR_SIZE = 16
+
+# Preprocessing used to find the ink (dark strokes) in a captcha
+INK_STEPS = (('median', 3), ('threshold', 100))
+
+
+def _column_spans(ink, min_width=2):
+    """Runs of adjacent columns that contain ink, as (start, end) pairs"""
+    columns = np.concatenate(([0], ink.any(axis=0).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(columns))
+    return [(start, end) for start, end in zip(edges[::2], edges[1::2]) if end - start >= min_width]
+
+
+def _fit_spans(spans, count, width):
+    """Split the widest / merge the narrowest spans until there are exactly count"""
+    spans = list(spans) or [(0, width)]
+
+    while len(spans) < count:
+        i = max(range(len(spans)), key=lambda k: spans[k][1] - spans[k][0])
+        start, end = spans[i]
+        if end - start < 2:
+            break
+        middle = (start + end) // 2
+        spans[i:i + 1] = [(start, middle), (middle, end)]
+
+    while len(spans) > count:
+        i = min(range(len(spans)), key=lambda k: spans[k][1] - spans[k][0])
+        if i == 0:
+            j = 1
+        elif i == len(spans) - 1:
+            j = i - 1
+        else:
+            # Merge with the closer neighbour
+            left_gap = spans[i][0] - spans[i - 1][1]
+            right_gap = spans[i + 1][0] - spans[i][1]
+            j = i - 1 if left_gap <= right_gap else i + 1
+        a, b = sorted((i, j))
+        spans[a:b + 1] = [(spans[a][0], spans[b][1])]
+
+    # Too little ink to split into count characters: fall back to equal widths
+    if len(spans) < count:
+        edges = np.linspace(0, width, count + 1).astype(int)
+        spans = list(zip(edges[:-1], edges[1:]))
+
+    return spans
+
+
+def segment_characters(image, count=CAPTCHA_LENGTH, size=CHAR_SIZE):
+    """
+    Segment a captcha into character bitmaps
+
+    Args:
+        image: Raw image bytes, a path, a PIL Image or a CaptchaImage
+        count: Number of characters to extract
+        size: Side length each character is scaled to
+
+    Returns:
+        float32 array of shape (count, size * size) with values in [0, 1]
+    """
+    captcha = image if isinstance(image, CaptchaImage) else CaptchaImage(image)
+    ink = captcha.apply(INK_STEPS) == 0
+
+    spans = _fit_spans(_column_spans(ink), count, ink.shape[1])
+
+    features = np.zeros((count, size * size), dtype=np.float32)
+    for i, (start, end) in enumerate(spans):
+        crop = ink[:, start:end]
+        rows = np.flatnonzero(crop.any(axis=1))
+        if rows.size:
+            crop = crop[rows[0]:rows[-1] + 1]
+
+        bitmap = Image.fromarray(crop.astype(np.uint8) * 255).resize((size, size), Image.BILINEAR)
+        features[i] = np.asarray(bitmap, dtype=np.float32).ravel() / 255
+
+    return features
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class CaptchaModel:
+    """Softmax classifier over segmented character bitmaps"""
+
+    def __init__(self, weights, bias, alphabet=ALPHABET, char_size=CHAR_SIZE):
+        """
+        Initialize model
+
+        Args:
+            weights: (char_size * char_size, len(alphabet)) weight matrix
+            bias: (len(alphabet),) bias vector
+            alphabet: Characters the classes map to
+            char_size: Side length of the character bitmaps
+        """
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.alphabet = alphabet
+        self.char_size = char_size
+
+    @classmethod
+    def load(cls, path):
+        """Load a model from a .npz weights file"""
+        with np.load(path) as data:
+            return cls(
+                data['weights'],
+                data['bias'],
+                alphabet=str(data['alphabet']),
+                char_size=int(data['char_size']),
+            )
+
+    def save(self, path):
+        """Save the model to a .npz weights file"""
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=self.bias,
+            alphabet=np.array(self.alphabet),
+            char_size=np.array(self.char_size),
+        )
+
+    def predict_proba(self, features):
+        """Class probabilities for each character bitmap"""
+        return _softmax(features @ self.weights + self.bias)
+
+    def solve(self, image):
+        """
+        Read a captcha
+
+        Args:
+            image: Raw image bytes, a path, a PIL Image or a CaptchaImage
+
+        Returns:
+            Tuple of (captcha text, confidence), where confidence is the
+            probability of the least certain character
+        """
+        features = segment_characters(image, size=self.char_size)
+        proba = self.predict_proba(features)
+        best = proba.argmax(axis=1)
+
+        text = ''.join(self.alphabet[i] for i in best)
+        confidence = float(proba[np.arange(len(best)), best].min())
+        return text, confidence
+
+
+def train_model(samples, epochs=300, learning_rate=0.5, l2=1e-4, char_size=CHAR_SIZE):
+    """
+    Train a model on labeled captchas
+
+    Uses full-batch gradient descent on the softmax cross-entropy loss.
+
+    Args:
+        samples: Iterable of (image, label) pairs; labels are 6-character strings
+        epochs: Number of gradient descent steps
+        learning_rate: Step size
+        l2: L2 regularization strength
+        char_size: Side length of the character bitmaps
+
+    Returns:
+        Trained CaptchaModel
+    """
+    features = []
+    targets = []
+    for image, label in samples:
+        features.append(segment_characters(image, count=len(label), size=char_size))
+        targets.extend(ALPHABET.index(c) for c in label)
+
+    if not features:
+        raise ValueError("No training samples")
+
+    x = np.concatenate(features)
+    y = np.zeros((len(targets), len(ALPHABET)), dtype=np.float32)
+    y[np.arange(len(targets)), targets] = 1
+
+    weights = np.zeros((x.shape[1], len(ALPHABET)), dtype=np.float32)
+    bias = np.zeros(len(ALPHABET), dtype=np.float32)
+
+    for _ in range(epochs):
+        error = (_softmax(x @ weights + bias) - y) / len(x)
+        weights -= learning_rate * (x.T @ error + l2 * weights)
+        bias -= learning_rate * error.sum(axis=0)
+
+    return CaptchaModel(weights, bias, char_size=char_size)
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(path):
+    """Load a model once per process and cache it by path"""
+    path = str(path)
+    with _models_lock:
+        if path not in _models:
+            _models[path] = CaptchaModel.load(path)
+        return _models[path]
@@ -2,27 +2,35 @@
 Captcha Solver Utility
 
 This module provides various methods to solve captchas:
-1. OCR using Tesseract
-2. Manual input
-3. Third-party API integration (placeholder)
+1. OCR using Tesseract (warm tesserocr engine or pytesseract)
+2. Trained character classifier (see train_captcha_model.py)
+3. Manual input
+4. Third-party API integration (placeholder)
 """
 
 import os
-from PIL import Image, ImageEnhance, ImageFilter
-import pytesseract
+from PIL import Image
+
+from csgt_scraper.utils.captcha_model import load_model
+from csgt_scraper.utils.ocr_backend import get_ocr_backend
+from csgt_scraper.utils.preprocessing import CaptchaImage
 
 
 class CaptchaSolver:
     """Class to handle captcha solving using various methods"""
     
-    def __init__(self, method='ocr'):
+    def __init__(self, method='ocr', ocr_backend='auto', model_path='models/captcha_model.npz'):
         """
         Initialize captcha solver
         
         Args:
-            method: 'ocr', 'manual', or 'api'
+            method: 'ocr', 'model', 'manual', or 'api'
+            ocr_backend: 'tesserocr', 'pytesseract' or 'auto' (tesserocr if installed)
+            model_path: Weights file for the 'model' method
         """
         self.method = method
+        self.ocr_backend = ocr_backend
+        self.model_path = model_path
     
     def solve(self, image_path):
         """
@@ -36,6 +44,8 @@ class CaptchaSolver:
         """
         if self.method == 'ocr':
             return self.solve_with_ocr(image_path)
+        elif self.method == 'model':
+            return self.solve_with_model(image_path)
         elif self.method == 'manual':
             return self.solve_manually(image_path)
         elif self.method == 'api':
@@ -53,23 +63,13 @@ class CaptchaSolver:
         Returns:
             Preprocessed PIL Image
         """
-        img = Image.open(image_path)
-        
-        # Convert to grayscale
-        img = img.convert('L')
-        
-        # Increase contrast
-        enhancer = ImageEnhance.Contrast(img)
-        img = enhancer.enhance(2)
+        captcha = CaptchaImage(image_path)
         
-        # Apply threshold to get binary image
-        threshold = 128
-        img = img.point(lambda x: 255 if x > threshold else 0)
+        # Increase contrast, apply threshold to get binary image, then
+        # apply median filter to reduce noise
+        steps = (('contrast', 2), ('threshold', 128), ('median', 3))
         
-        # Apply filters to reduce noise
-        img = img.filter(ImageFilter.MedianFilter(size=3))
-        
-        return img
+        return Image.fromarray(captcha.apply(steps))
     
     def solve_with_ocr(self, image_path):
         """
@@ -84,6 +84,7 @@ class CaptchaSolver:
         try:
             # Preprocess image
             img = self.preprocess_image(image_path)
+            ocr = get_ocr_backend(self.ocr_backend)
             
             # Try different OCR configurations
             configs = [
@@ -93,7 +94,7 @@ class CaptchaSolver:
             ]
             
             for config in configs:
-                text = pytesseract.image_to_string(img, config=config)
+                text = ocr.image_to_string(img, config=config)
                 text = text.strip()
                 
                 if text and len(text) >= 4:  # Assuming captcha is at least 4 characters
@@ -105,6 +106,28 @@ class CaptchaSolver:
             print(f"OCR Error: {e}")
             return None
     
+    def solve_with_model(self, image_path):
+        """
+        Solve captcha with the trained character classifier
+        
+        Args:
+            image_path: Path to captcha image
+            
+        Returns:
+            Captcha text or None if the model is unavailable
+        """
+        try:
+            model = load_model(self.model_path)
+            text, _ = model.solve(image_path)
+            return text
+            
+        except FileNotFoundError:
+            print(f"Model Error: weights not found at {self.model_path}. Train with: python train_captcha_model.py")
+            return None
+        except Exception as e:
+            print(f"Model Error: {e}")
+            return None
+    
     def solve_manually(self, image_path):
         """
         Solve captcha by asking for manual input
@@ -0,0 +1,158 @@
+"""
+Violation Normalization
+
+The results page gives every value as display text: "16:39, 01/10/2025",
+"Chưa xử phạt", "800.000 đ", plates as "59C1-360.47". The item pipeline
+(NormalizeViolationsPipeline) adds typed values next to the text, so
+consumers can index, sort and compare violations without re-parsing:
+
+    plate          canonical plate, e.g. "59C136047"
+    violation_ts   epoch seconds (the site shows Vietnam time, UTC+7)
+    payment_state  PaymentState value: "unpaid", "paid" or "unknown"
+    fine_vnd       fine in dong, when the page lists one
+    id             16 hex digits identifying the violation (time, plate,
+                   behavior and location), stable across lookups and
+                   payment status changes
+
+Violation is the compact form of one violation: a named tuple of the
+typed values, with '' and 0 for missing ones (never None, so any two
+compare). It is hashable and sorts by time, so sets and sorted lists of
+violations from different lookups can be diffed directly.
+"""
+
+import hashlib
+import re
+import unicodedata
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+
+# The site shows local time in Vietnam (no daylight saving)
+VIETNAM_TZ = timezone(timedelta(hours=7), 'ICT')
+
+TIME = re.compile(r'(\d{1,2}):(\d{2})(?::(\d{2}))?')
+DATE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+NOT_PLATE = re.compile(r'[^0-9A-Za-z]')
+NOT_DIGIT = re.compile(r'\D')
+
+
+class PaymentState(str, Enum):
+    """Whether a violation has been dealt with"""
+    unpaid = "unpaid"
+    paid = "paid"
+    unknown = "unknown"
+
+
+# Status text (lowercase) starting with -> state
+PAYMENT_STATES = (
+    ('chưa', PaymentState.unpaid),   # "Chưa xử phạt"
+    ('đã', PaymentState.paid),       # "Đã xử phạt"
+)
+
+
+def canonical_plate(plate):
+    """Plate in canonical form, e.g. "59C1-360.47" / "59c1 36047" -> "59C136047" """
+    return NOT_PLATE.sub('', plate or '').upper()
+
+
+def parse_violation_time(text):
+    """
+    Violation time as shown on the results page -> epoch seconds
+
+    Accepts the time and date in either order, e.g. "16:39, 01/10/2025" or
+    "01/10/2025 16:39:05".
+
+    Returns:
+        Epoch seconds, or None if the text has no valid date
+    """
+    if not text:
+        return None
+    date = DATE.search(text)
+    if date is None:
+        return None
+    time_match = TIME.search(text)
+    hour, minute, second = (
+        (int(time_match.group(1)), int(time_match.group(2)), int(time_match.group(3) or 0))
+        if time_match else (0, 0, 0)
+    )
+    day, month, year = (int(group) for group in date.groups())
+    try:
+        moment = datetime(year, month, day, hour, minute, second, tzinfo=VIETNAM_TZ)
+    except ValueError:
+        return None
+    return int(moment.timestamp())
+
+
+def payment_state(text):
+    """Payment status text -> PaymentState value"""
+    status = unicodedata.normalize('NFC', (text or '').strip()).lower()
+    for prefix, state in PAYMENT_STATES:
+        if status.startswith(prefix):
+            return state.value
+    return PaymentState.unknown.value
+
+
+def parse_amount(text):
+    """Amount in dong from text like "800.000 đ" or "800,000 VND" (None without digits)"""
+    digits = NOT_DIGIT.sub('', text or '')
+    return int(digits) if digits else None
+
+
+def to_epoch(timestamp):
+    """ISO 8601 timestamp (naive: server local time) -> epoch seconds (None stays None)"""
+    if not timestamp:
+        return None
+    return int(datetime.fromisoformat(timestamp).timestamp())
+
+
+class Violation(namedtuple('Violation', [
+    'violation_ts', 'plate', 'payment_state', 'fine_vnd', 'violation_behavior', 'violation_location',
+    'vehicle_type', 'vehicle_color', 'detecting_unit', 'resolution_location',
+])):
+    """Compact, typed form of one violation (see module docstring)"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_details(cls, violation):
+        """Build from a violation dict of the results page (display text fields)"""
+        return cls(
+            violation_ts=parse_violation_time(violation.get('violation_time')) or 0,
+            plate=canonical_plate(violation.get('license_plate')),
+            payment_state=payment_state(violation.get('payment_status')),
+            fine_vnd=parse_amount(violation.get('fine_amount')) or 0,
+            violation_behavior=violation.get('violation_behavior') or '',
+            violation_location=violation.get('violation_location') or '',
+            vehicle_type=violation.get('vehicle_type') or '',
+            vehicle_color=violation.get('vehicle_color') or '',
+            detecting_unit=violation.get('detecting_unit') or '',
+            resolution_location=violation.get('resolution_location') or '',
+        )
+
+    @property
+    def id(self):
+        """Identity of the violation: the same in every lookup, whatever its payment state"""
+        key = f"{self.violation_ts}\x1f{self.plate}\x1f{self.violation_behavior}\x1f{self.violation_location}"
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def normalize_violation(violation):
+    """
+    Add the typed values to a violation dict
+
+    Args:
+        violation: Violation dict of the results page
+
+    Returns:
+        New dict with the display fields plus id, plate, violation_ts,
+        payment_state and (when listed) fine_vnd
+    """
+    record = Violation.from_details(violation)
+    normalized = dict(violation)
+    normalized['id'] = record.id
+    normalized['plate'] = record.plate
+    normalized['violation_ts'] = record.violation_ts or None
+    normalized['payment_state'] = record.payment_state
+    if violation.get('fine_amount'):
+        normalized['fine_vnd'] = record.fine_vnd
+    return normalized
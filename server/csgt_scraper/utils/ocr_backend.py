@@ -0,0 +1,124 @@
+"""
+OCR Backends
+
+pytesseract starts a new tesseract binary and round-trips the image through
+temp files on every call. When tesserocr is installed, the tesserocr backend
+keeps a warm libtesseract engine per thread instead and hands it images in
+memory. Both backends expose the same image_to_string(image, config) call.
+"""
+
+import shlex
+import threading
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+def parse_tesseract_config(config):
+    """
+    Parse a tesseract command line config string
+
+    Args:
+        config: Config string (e.g. '--psm 8 -c tessedit_char_whitelist=abc')
+
+    Returns:
+        Tuple of (page segmentation mode or None, dict of variables)
+    """
+    psm = None
+    variables = {}
+
+    args = shlex.split(config or '')
+    for i, arg in enumerate(args):
+        if arg == '--psm' and i + 1 < len(args):
+            psm = int(args[i + 1])
+        elif arg == '-c' and i + 1 < len(args) and '=' in args[i + 1]:
+            name, value = args[i + 1].split('=', 1)
+            variables[name] = value
+
+    return psm, variables
+
+
+class PytesseractBackend:
+    """OCR through the tesseract command line tool (one process per call)"""
+
+    name = 'pytesseract'
+
+    def __init__(self, lang='eng'):
+        self.lang = lang
+
+    def image_to_string(self, image, config=''):
+        import pytesseract
+
+        return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+
+class TesserocrBackend:
+    """OCR through libtesseract, keeping one warm engine per thread"""
+
+    name = 'tesserocr'
+
+    # Variables reset on every call so one config's whitelist can't leak into the next
+    RESET_VARIABLES = ('tessedit_char_whitelist',)
+
+    def __init__(self, lang='eng'):
+        if tesserocr is None:
+            raise ImportError("tesserocr not installed. Install with: pip install tesserocr")
+        self.lang = lang
+        self._local = threading.local()
+
+    def _engine(self):
+        engine = getattr(self._local, 'engine', None)
+        if engine is None:
+            engine = tesserocr.PyTessBaseAPI(lang=self.lang)
+            self._local.engine = engine
+        return engine
+
+    def image_to_string(self, image, config=''):
+        psm, variables = parse_tesseract_config(config)
+        engine = self._engine()
+
+        engine.SetPageSegMode(psm if psm is not None else tesserocr.PSM.SINGLE_BLOCK)
+        for name in self.RESET_VARIABLES:
+            variables.setdefault(name, '')
+        for name, value in variables.items():
+            engine.SetVariable(name, value)
+
+        engine.SetImage(image)
+        return engine.GetUTF8Text()
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_ocr_backend(name='auto', lang='eng'):
+    """
+    Return a shared OCR backend
+
+    Backends are cached per process, so engines stay warm across captchas
+    (and across tasks in OCR pool workers).
+
+    Args:
+        name: 'tesserocr', 'pytesseract' or 'auto' (tesserocr when installed)
+        lang: Tesseract language
+
+    Returns:
+        OCR backend instance
+    """
+    if name == 'auto':
+        name = 'tesserocr' if tesserocr is not None else 'pytesseract'
+
+    backend_classes = {
+        'tesserocr': TesserocrBackend,
+        'pytesseract': PytesseractBackend,
+    }
+    if name not in backend_classes:
+        raise ValueError(f"Unknown OCR backend: {name}")
+
+    key = (name, lang)
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = backend_classes[name](lang=lang)
+        return _backends[key]
@@ -0,0 +1,247 @@
+"""
+Parallel OCR Ensemble
+
+Runs the captcha preprocessing/Tesseract configurations on a bounded process
+pool and votes on the answers as they come in. Voting stops as soon as one
+6-character answer collects enough votes; configurations that have not
+started yet are never run.
+"""
+
+import multiprocessing
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from csgt_scraper.utils.ocr_backend import get_ocr_backend
+from csgt_scraper.utils.preprocessing import VARIANTS, build_variants, tesseract_config
+
+# Captchas on csgt.vn are always this long
+CAPTCHA_LENGTH = 6
+
+
+def run_variant(index, array, config, backend='auto'):
+    """
+    OCR a single preprocessed variant (executed in a pool worker)
+
+    Pool workers are long-lived, so the OCR backend (and its warm tesseract
+    engine, with tesserocr) is reused across captchas.
+
+    Args:
+        index: Index of the variant in the batch
+        array: Preprocessed uint8 image array
+        config: Tesseract config string
+        backend: OCR backend name (see get_ocr_backend)
+
+    Returns:
+        Tuple of (index, recognized text, elapsed seconds)
+    """
+    from PIL import Image
+
+    started = time.perf_counter()
+    text = get_ocr_backend(backend).image_to_string(Image.fromarray(array), config=config).strip()
+
+    return index, text, time.perf_counter() - started
+
+
+EnsembleResult = namedtuple('EnsembleResult', ['text', 'confidence', 'votes', 'early_exit'])
+
+
+class OcrEnsemble:
+    """Bounded, early-exit OCR voting ensemble"""
+
+    def __init__(self, max_workers=4, min_votes=3, backend='auto'):
+        """
+        Initialize OCR ensemble
+
+        Args:
+            max_workers: Size of the OCR process pool
+            min_votes: Votes a 6-character answer needs to stop early
+            backend: OCR backend used by the pool workers
+        """
+        self.max_workers = max_workers
+        self.min_votes = min_votes
+        self.backend = backend
+        self._pool = None
+        self._lock = threading.Lock()
+
+        # Per-config counters used to spot configurations that never win
+        self.stats = [
+            {'name': name, 'runs': 0, 'cancelled': 0,
+             'valid': 0, 'agreed': 0, 'total_time': 0.0}
+            for name, _, _, _ in VARIANTS
+        ]
+
+    @property
+    def pool(self):
+        """Lazily created process pool, shared by all solves"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._pool
+
+    def shutdown(self, wait=False):
+        """Shut down the process pool, optionally waiting for the workers to exit"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+    def solve(self, image_bytes, logger=None):
+        """
+        Solve a captcha with all configurations in parallel
+
+        The captcha is decoded and preprocessed once (see build_variants) and
+        the resulting batch of variants is handed to the OCR pool.
+
+        Args:
+            image_bytes: Raw captcha image
+            logger: Optional logger for per-config results
+
+        Returns:
+            EnsembleResult, with text None if no configuration produced an answer
+        """
+        batch = [
+            (array, tesseract_config(variant))
+            for variant, array in build_variants(image_bytes)
+        ]
+
+        # Keep at most max_workers configurations in flight and submit the
+        # next one as each finishes, so an early exit really skips the rest
+        remaining = list(range(len(batch)))
+        in_flight = set()
+
+        votes = {}
+        valid_votes = Counter()
+        early_exit = False
+
+        while remaining or in_flight:
+            while remaining and len(in_flight) < self.max_workers:
+                index = remaining.pop(0)
+                array, config = batch[index]
+                in_flight.add(self.pool.submit(run_variant, index, array, config, self.backend))
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    index, text, elapsed = future.result()
+                except ImportError:
+                    for pending in in_flight:
+                        pending.cancel()
+                    raise
+                except BrokenProcessPool:
+                    # A worker died; drop the pool so the next solve starts a fresh one
+                    self.shutdown()
+                    raise
+                except Exception as e:
+                    _log(logger, 'debug', f"OCR config failed: {e}")
+                    continue
+
+                with self._lock:
+                    self.stats[index]['runs'] += 1
+                    self.stats[index]['total_time'] += elapsed
+
+                if not text or len(text) < 4:
+                    continue
+
+                votes[index] = text
+                _log(logger, 'info', f"OCR Config {index} ({VARIANTS[index].name}): {text} [{elapsed * 1000:.0f} ms]")
+
+                if len(text) == CAPTCHA_LENGTH:
+                    valid_votes[text] += 1
+                    if valid_votes[text] >= self.min_votes:
+                        early_exit = True
+
+            if early_exit:
+                break
+
+        if early_exit:
+            # Configurations still running finish in the background; their
+            # answers are ignored
+            for pending in in_flight:
+                pending.cancel()
+            with self._lock:
+                for index in remaining:
+                    self.stats[index]['cancelled'] += 1
+            _log(logger, 'info', f"OCR early exit after {len(votes)} answers, cancelled {len(remaining)} configs")
+
+        return self._vote(votes, valid_votes, early_exit)
+
+    def _vote(self, votes, valid_votes, early_exit):
+        """Pick the winning answer and update agreement counters"""
+        if not votes:
+            return EnsembleResult(None, 0.0, votes, early_exit)
+
+        if valid_votes:
+            text, count = valid_votes.most_common(1)[0]
+            confidence = count / sum(valid_votes.values()) * 100
+        else:
+            # No 6-character answers, still vote on whatever we got (fallback)
+            text, count = Counter(votes.values()).most_common(1)[0]
+            confidence = count / len(votes) * 100
+
+        with self._lock:
+            for index, answer in votes.items():
+                if len(answer) == CAPTCHA_LENGTH:
+                    self.stats[index]['valid'] += 1
+                if answer == text:
+                    self.stats[index]['agreed'] += 1
+
+        return EnsembleResult(text, confidence, votes, early_exit)
+
+    def report(self):
+        """
+        Per-config latency and agreement
+
+        Returns:
+            List of dicts with runs, mean latency (ms) and agreement rate per config
+        """
+        with self._lock:
+            return [
+                {
+                    'index': index,
+                    'name': stat['name'],
+                    'runs': stat['runs'],
+                    'cancelled': stat['cancelled'],
+                    'mean_ms': round(stat['total_time'] / stat['runs'] * 1000, 1) if stat['runs'] else None,
+                    'valid_rate': round(stat['valid'] / stat['runs'], 3) if stat['runs'] else None,
+                    'agreement': round(stat['agreed'] / stat['runs'], 3) if stat['runs'] else None,
+                }
+                for index, stat in enumerate(self.stats)
+            ]
+
+
+
+def _log(logger, level, message):
+    if logger is not None:
+        getattr(logger, level)(message)
+
+
+_ensembles = {}
+_ensembles_lock = threading.Lock()
+
+
+def get_ocr_ensemble(max_workers=4, min_votes=3, backend='auto'):
+    """
+    Return the process-wide OCR ensemble for the given pool size, majority and backend
+
+    Spiders come and go with every job, so the pool (and its warm worker
+    processes) and the per-config statistics are kept per API worker.
+    """
+    key = (max_workers, min_votes, backend)
+    with _ensembles_lock:
+        if key not in _ensembles:
+            _ensembles[key] = OcrEnsemble(max_workers=max_workers, min_votes=min_votes, backend=backend)
+        return _ensembles[key]
+
+
+def shutdown_ocr_ensembles():
+    """Shut down the process pools of all ensembles"""
+    with _ensembles_lock:
+        for ensemble in _ensembles.values():
+            ensemble.shutdown()
@@ -0,0 +1,191 @@
+"""
+Raw Page Store
+
+Results pages the spider could not extract violations from are kept for
+debugging. Rather than travelling on the item (through the job store, the
+result of every status response and the API workers' memory), a page is
+written here once and the item only records its hash and size.
+
+Pages are content-addressed by the SHA-256 of their bytes, so the same page
+seen by many lookups (e.g. after a site layout change) is stored once. They
+are compressed with zstd when the zstandard package is installed, gzip
+otherwise:
+
+    <root>/ab/ab12...ef.html.zst
+    <root>/ab/ab12...ef.html.gz
+
+Blobs are written to a temporary file and renamed into place, so several
+API workers can share one directory and readers never see a partial blob.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Codec -> blob file extension, in lookup order
+EXTENSIONS = {
+    'zstd': '.html.zst',
+    'gzip': '.html.gz',
+}
+
+DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+def is_digest(value):
+    """Whether a string is a page hash (lowercase hex SHA-256)"""
+    return bool(DIGEST.match(value))
+
+
+def compress(data, codec):
+    """Compress page bytes with a codec"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def decompress(blob, codec):
+    """Decompress a stored blob"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Page was stored with zstd, but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+class PageStore:
+    """Compressed, content-addressed store of raw pages"""
+
+    def __init__(self, root, codec=None):
+        """
+        Initialize store
+
+        Args:
+            root: Store directory
+            codec: 'zstd' or 'gzip' for new blobs (default: zstd if installed)
+        """
+        self.root = Path(root)
+        self.codec = codec or ('zstd' if zstandard is not None else 'gzip')
+
+    def _path(self, digest, codec):
+        return self.root / digest[:2] / f"{digest}{EXTENSIONS[codec]}"
+
+    def find(self, digest):
+        """
+        Locate a stored page
+
+        Returns:
+            Tuple of (path, codec), or None if the page is not stored
+        """
+        if not is_digest(digest):
+            return None
+        for codec in EXTENSIONS:
+            path = self._path(digest, codec)
+            if path.exists():
+                return path, codec
+        return None
+
+    def put(self, data):
+        """
+        Store a page (once per content)
+
+        Args:
+            data: Page bytes (str is encoded as UTF-8)
+
+        Returns:
+            Tuple of (hex SHA-256 digest, size in bytes)
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+
+        found = self.find(digest)
+        if found is not None:
+            # Seen again: keep it from being pruned
+            os.utime(found[0])
+            return digest, len(data)
+
+        path = self._path(digest, self.codec)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compress(data, self.codec))
+            # mkstemp creates the file readable by its owner only
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return digest, len(data)
+
+    def read(self, digest):
+        """
+        Read a stored page as stored
+
+        Returns:
+            Tuple of (compressed blob, codec), or None if the page is not stored
+        """
+        found = self.find(digest)
+        if found is None:
+            return None
+        path, codec = found
+        try:
+            return path.read_bytes(), codec
+        except FileNotFoundError:
+            # Pruned in between
+            return None
+
+    def get(self, digest):
+        """Stored page bytes, or None if the page is not stored"""
+        blob = self.read(digest)
+        if blob is None:
+            return None
+        return decompress(*blob)
+
+    def prune(self, before):
+        """
+        Delete pages not stored or seen since a point in time
+
+        Args:
+            before: Epoch seconds
+
+        Returns:
+            Number of pages deleted
+        """
+        if not self.root.exists():
+            return 0
+        pruned = 0
+        for directory in self.root.iterdir():
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                try:
+                    if path.stat().st_mtime < before:
+                        path.unlink()
+                        pruned += 1
+                except FileNotFoundError:
+                    pass
+        return pruned
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_page_store(root):
+    """Return the process-wide page store for a directory"""
+    root = str(root)
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = PageStore(root)
+        return _stores[root]
@@ -0,0 +1,164 @@
+"""
+Captcha Preprocessing
+
+Decodes a captcha once and builds every OCR variant from one shared
+grayscale array with vectorized NumPy/scipy operations.
+
+Variants are declared as chains of steps. Intermediate results are cached
+by step prefix, so variants sharing a prefix (e.g. the threshold at 100 used
+by four of them) compute it only once.
+"""
+
+import io
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+from scipy import ndimage
+
+WHITELIST = '0123456789abcdefghijklmnopqrstuvwxyz'
+WHITELIST_MIXED = WHITELIST + 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# PIL's ImageFilter.SHARPEN kernel
+SHARPEN_KERNEL = np.array([
+    [-2, -2, -2],
+    [-2, 32, -2],
+    [-2, -2, -2],
+], dtype=np.float32) / 16
+
+
+Variant = namedtuple('Variant', ['name', 'steps', 'psm', 'whitelist'], defaults=(WHITELIST,))
+
+
+def tesseract_config(variant):
+    """Tesseract config string for a variant"""
+    return f'--psm {variant.psm} -c tessedit_char_whitelist={variant.whitelist}'
+
+
+# OCR variants, in the order they are submitted. Steps start from the
+# grayscale array; ('original',) switches to the decoded color image.
+VARIANTS = [
+    Variant('gray removed, psm 8', (('threshold', 100),), 8),
+    Variant('original, psm 8', (('original',),), 8),
+    Variant('grayscale, psm 8', (), 8),
+    Variant('high contrast, psm 8', (('contrast', 2.5),), 8),
+    Variant('gray removed+sharp, psm 8', (('threshold', 80), ('sharpen',)), 8, WHITELIST_MIXED),
+    Variant('sharpened, psm 8', (('original',), ('sharpen',)), 8, WHITELIST_MIXED),
+    Variant('gray removed, psm 7', (('threshold', 120),), 7),
+    Variant('median+gray removed, psm 8', (('median', 3), ('threshold', 100)), 8),
+    Variant('upscaled+gray removed, psm 8', (('upscale', 2), ('threshold', 100)), 8),
+    Variant('erosion, psm 8', (('threshold', 100), ('erode',)), 8),
+    Variant('adaptive threshold, psm 8', (('adaptive', 15, 10),), 8),
+    Variant('psm 13', (('threshold', 100),), 13),
+]
+
+
+def _to_uint8(array):
+    return np.clip(np.rint(array), 0, 255).astype(np.uint8)
+
+
+def _original(array, captcha):
+    return captcha.color
+
+
+def _threshold(array, captcha, level):
+    """Pixels brighter than level become white, the rest black"""
+    return (array > level).astype(np.uint8) * 255
+
+
+def _contrast(array, captcha, factor):
+    """Same as PIL's ImageEnhance.Contrast"""
+    mean = int(array.mean() + 0.5)
+    return _to_uint8(mean + (array.astype(np.float32) - mean) * factor)
+
+
+def _sharpen(array, captcha):
+    kernel = SHARPEN_KERNEL if array.ndim == 2 else SHARPEN_KERNEL[:, :, np.newaxis]
+    return _to_uint8(ndimage.convolve(array.astype(np.float32), kernel, mode='nearest'))
+
+
+def _median(array, captcha, size):
+    return ndimage.median_filter(array, size=size, mode='nearest')
+
+
+def _upscale(array, captcha, factor):
+    height, width = array.shape[:2]
+    upscaled = Image.fromarray(array).resize((width * factor, height * factor), Image.LANCZOS)
+    return np.asarray(upscaled)
+
+
+def _erode(array, captcha):
+    """Erode dark strokes slightly to separate touching characters"""
+    return 255 - ndimage.binary_erosion(array == 0, iterations=1).astype(np.uint8) * 255
+
+
+def _adaptive(array, captcha, size, offset):
+    """Threshold against the local mean (better for uneven lighting)"""
+    local_mean = ndimage.uniform_filter(array.astype(np.float32), size=size)
+    return (array > local_mean - offset).astype(np.uint8) * 255
+
+
+STEPS = {
+    'original': _original,
+    'threshold': _threshold,
+    'contrast': _contrast,
+    'sharpen': _sharpen,
+    'median': _median,
+    'upscale': _upscale,
+    'erode': _erode,
+    'adaptive': _adaptive,
+}
+
+
+class CaptchaImage:
+    """A decoded captcha with cached intermediate preprocessing results"""
+
+    def __init__(self, image):
+        """
+        Initialize captcha image
+
+        Args:
+            image: Raw image bytes, a path or a PIL Image
+        """
+        if isinstance(image, bytes):
+            image = Image.open(io.BytesIO(image))
+        elif not isinstance(image, Image.Image):
+            image = Image.open(image)
+
+        self.color = np.asarray(image.convert('RGB'))
+        self.gray = np.asarray(image.convert('L'))
+        self._cache = {(): self.gray}
+
+    def apply(self, steps):
+        """
+        Apply a chain of steps to the grayscale array
+
+        Args:
+            steps: Tuple of (step name, *params) tuples
+
+        Returns:
+            Resulting uint8 array
+        """
+        steps = tuple(steps)
+        if steps in self._cache:
+            return self._cache[steps]
+
+        name, *params = steps[-1]
+        array = STEPS[name](self.apply(steps[:-1]), self, *params)
+        self._cache[steps] = array
+        return array
+
+
+def build_variants(image, variants=None):
+    """
+    Build all OCR variants of a captcha from a single decode
+
+    Args:
+        image: Raw image bytes, a path or a PIL Image
+        variants: Variants to build (default: VARIANTS)
+
+    Returns:
+        List of (variant, uint8 array) pairs
+    """
+    captcha = CaptchaImage(image)
+    return [(variant, captcha.apply(variant.steps)) for variant in (variants or VARIANTS)]
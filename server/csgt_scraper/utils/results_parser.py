@@ -0,0 +1,213 @@
+"""
+Results Page Parser
+
+Extracts the violations on a CSGT results page in a single pass.
+
+The page lists each violation as a block of labels followed by their values:
+
+    <div class="form-group">
+        <label class="col-md-3"><span>Biển kiểm soát:</span></label>
+        <div class="col-md-9">30A12345</div>
+    </div>
+    ...
+    <hr>
+
+Instead of one `//label[contains(...)]` XPath query per field, each of which
+walks the whole document, the parser visits every <label> once, normalizes
+its text and looks it up in LABEL_FIELDS. A label with more text after a
+known one, e.g. "Thời gian vi phạm (ngày/giờ):", matches by prefix; labels
+matching nothing are logged (debug) once each. The no-results check searches the
+page text for the message's casings rather than lowercasing a copy of the page.
+
+Long histories are split over several pages; extract_page_links finds the
+other pages in the page's pagination control.
+"""
+
+import logging
+import unicodedata
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from lxml import etree
+
+# How a value is read from the value <div>
+TEXT = 'text'            # first direct text node
+SPAN_TEXT = 'span_text'  # first text inside a <span> (status badge), else TEXT
+ALL_TEXT = 'all_text'    # every text node, joined
+
+# Normalized label text -> (violation field, how its value is read)
+LABEL_FIELDS = {
+    'biển kiểm soát': ('license_plate', TEXT),
+    'màu biển': ('vehicle_color', TEXT),
+    'loại phương tiện': ('vehicle_type', TEXT),
+    'thời gian vi phạm': ('violation_time', TEXT),
+    'địa điểm vi phạm': ('violation_location', TEXT),
+    'hành vi vi phạm': ('violation_behavior', TEXT),
+    'trạng thái': ('payment_status', SPAN_TEXT),
+    'đơn vị phát hiện vi phạm': ('detecting_unit', TEXT),
+    'nơi giải quyết vụ việc': ('resolution_location', ALL_TEXT),
+    'mức phạt': ('fine_amount', TEXT),
+    'số tiền phạt': ('fine_amount', TEXT),
+}
+
+# Keys to match labels with extra text by, longest first
+LABEL_PREFIXES = sorted(LABEL_FIELDS, key=len, reverse=True)
+
+VALUE_CLASS = 'col-md-9'
+
+# Links of a pagination control (<ul class="pagination">), and those of them
+# marking the current page (class="active" on the link or an ancestor)
+PAGINATION = '//*[contains(concat(" ", normalize-space(@class), " "), " pagination ")]//a'
+ACTIVE = 'ancestor-or-self::*[contains(concat(" ", normalize-space(@class), " "), " active ")]'
+PAGE_LINKS = etree.XPath(f'{PAGINATION}[not({ACTIVE})]/@href')
+CURRENT_PAGE_LINKS = etree.XPath(f'{PAGINATION}[{ACTIVE}]/@href')
+
+# The "no results" message in the casings it appears in. Plain substring
+# checks: a case-insensitive regex over the page is slower than the extraction.
+NO_RESULTS_MARKERS = tuple(
+    variant
+    for marker in ('không tìm thấy kết quả', 'no results')
+    for variant in (marker, marker.capitalize(), marker.upper(), marker.title())
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_label(text):
+    """Label text -> LABEL_FIELDS key (NFC, lowercase, single spaces, no trailing colon)"""
+    text = unicodedata.normalize('NFC', ' '.join(text.split()))
+    return text.rstrip(': ').lower()
+
+
+@lru_cache(maxsize=256)
+def field_for_label(text):
+    """Raw label text -> (field, how its value is read), or None for other labels"""
+    label = normalize_label(text)
+    entry = LABEL_FIELDS.get(label)
+    if entry is not None:
+        return entry
+    # A known label followed by more words, e.g. "thời gian vi phạm (ngày/giờ)"
+    for key in LABEL_PREFIXES:
+        if label.startswith(key) and not label[len(key)].isalnum():
+            return LABEL_FIELDS[key]
+    logger.debug("Unknown results page label: %r", label)
+    return None
+
+
+def is_no_results(text):
+    """Whether a results page says the plate has no violations"""
+    return any(marker in text for marker in NO_RESULTS_MARKERS)
+
+
+def _resolve_links(hrefs, url):
+    """Absolute URLs of page links, in order, without duplicates or anchors"""
+    links = []
+    for href in hrefs:
+        href = href.strip()
+        if not href or href.startswith(('#', 'javascript:')):
+            continue
+        link = urljoin(url, href)
+        if link not in links:
+            links.append(link)
+    return links
+
+
+def extract_page_links(root, url):
+    """
+    Results pages linked from a page's pagination
+
+    Args:
+        root: lxml root of the page
+        url: URL of the page, to resolve relative links against
+
+    Returns:
+        Tuple of (URLs of the other pages, URLs the pagination uses for this
+        page itself), in link order
+    """
+    current = _resolve_links(CURRENT_PAGE_LINKS(root), url)
+    links = [link for link in _resolve_links(PAGE_LINKS(root), url) if link != url and link not in current]
+    return links, current
+
+
+def _first_text(element):
+    """First non-blank direct text node of an element, stripped (None if there is none)"""
+    if element.text and element.text.strip():
+        return element.text.strip()
+    for child in element:
+        if child.tail and child.tail.strip():
+            return child.tail.strip()
+    return None
+
+
+def _value_div(label):
+    """The value <div> following a label"""
+    sibling = label.getnext()
+    if sibling is not None and sibling.tag == 'div' and sibling.get('class') == VALUE_CLASS:
+        return sibling
+    for sibling in label.itersiblings():
+        if sibling.tag == 'div' and sibling.get('class') == VALUE_CLASS:
+            return sibling
+    return None
+
+
+def _read_value(div, how):
+    """Read a value <div> as LABEL_FIELDS says"""
+    if how == ALL_TEXT:
+        parts = [text.strip() for text in div.itertext() if text.strip()]
+        return ' '.join(parts) or None
+    if how == SPAN_TEXT:
+        for span in div.iter('span'):
+            value = _first_text(span)
+            if value:
+                return value
+    return _first_text(div)
+
+
+def extract_violations(root):
+    """
+    Extract every violation on a results page
+
+    Labels and <hr> separators are visited once, in document order. Each
+    <hr> ends a violation, so each block of label/value pairs becomes one
+    violation, with no per-block queries. Should the separator be missing, a
+    label whose field the current violation already has starts the next one.
+
+    Args:
+        root: lxml root of the page (e.g. response.selector.root)
+
+    Returns:
+        List of violation dicts (field -> value), in page order
+    """
+    violations = []
+    violation = {}
+    seen = set()
+    for label in root.iter('label', 'hr'):
+        if label.tag == 'hr':
+            if violation:
+                violations.append(violation)
+            violation = {}
+            seen = set()
+            continue
+
+        entry = field_for_label(etree.tostring(label, method='text', encoding='unicode', with_tail=False))
+        if entry is None:
+            continue
+        field, how = entry
+        if field in seen:
+            if violation:
+                violations.append(violation)
+            violation = {}
+            seen = set()
+        # A label with an empty value still belongs to this violation
+        seen.add(field)
+
+        div = _value_div(label)
+        if div is None:
+            continue
+        value = _read_value(div, how)
+        if value:
+            violation[field] = value
+
+    if violation:
+        violations.append(violation)
+    return violations
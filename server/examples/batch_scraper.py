@@ -3,34 +3,39 @@
 Batch scraper for multiple license plates
 
 This script demonstrates how to scrape violations for multiple vehicles
+without the API. With the API running, POST /api/v1/scrape/batch does the
+same in one request and streams results as they finish (see API_GUIDE.md).
 """
 
 import subprocess
 import json
-import time
 from pathlib import Path
 
 
-def scrape_license_plate(license_plate, vehicle_type='oto'):
+def scrape_license_plates(license_plates, concurrency=4):
     """
-    Scrape a single license plate
+    Scrape several license plates in one crawl
+    
+    The spider runs `concurrency` lookups in parallel, each in its own
+    session; politeness limits come from csgt_scraper/settings.py.
     
     Args:
-        license_plate: License plate number
-        vehicle_type: Vehicle type
+        license_plates: List of (license_plate, vehicle_type) pairs
+        concurrency: Number of parallel lookups
         
     Returns:
-        dict: Results or None if error
+        list: One result per plate that produced an item
     """
-    print(f"Processing: {license_plate} ({vehicle_type})")
+    print(f"Processing: {len(license_plates)} license plates, {concurrency} at a time")
     
     # Temporary output file
-    temp_output = f"temp_{license_plate.replace(' ', '_')}.json"
+    temp_output = "temp_batch.json"
+    plates = ','.join(f"{plate}:{vehicle_type}" for plate, vehicle_type in license_plates)
     
     cmd = [
         'scrapy', 'crawl', 'csgt',
-        '-a', f'license_plate={license_plate}',
-        '-a', f'vehicle_type={vehicle_type}',
+        '-a', f'plates={plates}',
+        '-a', f'concurrency={concurrency}',
         '-O', temp_output,
         '--loglevel=ERROR',  # Suppress most logs
     ]
@@ -46,13 +51,13 @@ def scrape_license_plate(license_plate, vehicle_type='oto'):
             # Clean up temp file
             Path(temp_output).unlink()
             
-            return results[0] if results else None
+            return results
         else:
-            return None
+            return []
             
     except Exception as e:
         print(f"  Error: {e}")
-        return None
+        return []
 
 
 def main():
@@ -71,34 +76,27 @@ def main():
         # Add more license plates here
     ]
     
-    results = []
+    results = scrape_license_plates(license_plates)
     
-    for plate, vehicle_type in license_plates:
-        result = scrape_license_plate(plate, vehicle_type)
-        
-        if result:
-            results.append(result)
-            print(f"  ✓ Success")
-        else:
-            print(f"  ✗ Failed")
-        
-        # Add delay between requests to be respectful
-        time.sleep(3)
-        print()
+    for result in results:
+        mark = '✓' if result.get('status') == 'success' else '✗'
+        print(f"  {mark} {result.get('license_plate')}: {result.get('status')}")
+    print()
     
     # Save all results
     output_file = "batch_results.json"
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
     
+    successful = sum(1 for result in results if result.get('status') == 'success')
+    
     print("=" * 60)
     print(f"Batch scraping completed!")
     print(f"Processed: {len(license_plates)} license plates")
-    print(f"Successful: {len(results)}")
+    print(f"Successful: {successful}")
     print(f"Results saved to: {output_file}")
     print("=" * 60)
 
 
 if __name__ == '__main__':
     main()
-
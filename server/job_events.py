@@ -0,0 +1,205 @@
+"""
+Job Events
+
+Pushes job changes to clients instead of having them poll. A client
+subscribes to a job and receives it again whenever its state changes: a
+status transition (pending, running, completed/failed) or a progress update
+(captcha attempt n, results, batch plates finished). Long-polling clients
+wait() for the next change instead.
+
+The job store stays the source of truth. Changes made in this process (the
+worker running the job) are published directly and reach subscribers
+immediately. Changes made by other API processes are picked up by one
+watcher task per process, which re-reads each watched job every
+poll_interval, however many clients follow it. Store reads run in threads,
+off the event loop.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+def job_state(job):
+    """What a subscriber is told about: status plus progress"""
+    progress = job.get('progress') or {}
+    return (
+        job['status'],
+        progress.get('seq'),
+        job.get('succeeded', 0) + job.get('failed', 0),
+    )
+
+
+class JobEvents:
+    """Publish/subscribe hub for job state changes"""
+
+    def __init__(self, store, poll_interval=1.0):
+        """
+        Initialize hub
+
+        Args:
+            store: JobStore holding the jobs
+            poll_interval: Seconds between checks for changes made by other processes
+        """
+        self.store = store
+        self.poll_interval = poll_interval
+
+        # job_id -> queues of the subscribers following it
+        self._subscribers = {}
+        # job_id -> last state delivered to the subscribers
+        self._states = {}
+        self._task = None
+
+    async def start(self):
+        """Start watching the store for changes made by other processes"""
+        self._task = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        """Stop the watcher"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def publish(self, job_id, job):
+        """
+        Tell subscribers a job changed
+
+        Args:
+            job_id: Job that changed
+            job: The job as stored (None if it was deleted)
+        """
+        if job_id in self._subscribers:
+            self._deliver(job_id, job)
+
+    async def refresh(self, job_id):
+        """Tell subscribers a job changed, reading it from the store"""
+        if job_id in self._subscribers:
+            self._deliver(job_id, await asyncio.to_thread(self.store.get, job_id))
+
+    async def subscribe(self, job_id, heartbeat=None):
+        """
+        Follow a job
+
+        Yields the job as it is now, then again after every state change, and
+        stops after it finished or was deleted.
+
+        Args:
+            job_id: Job to follow
+            heartbeat: If set, yield None after this many idle seconds (for keepalives)
+
+        Yields:
+            Job dicts (or None heartbeats)
+        """
+        queue = self._add(job_id)
+        try:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            last = None
+            while job is not None:
+                state = job_state(job)
+                if state != last:
+                    last = state
+                    yield job
+                if job['status'] in FINISHED_STATUSES:
+                    return
+
+                try:
+                    job = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._remove(job_id, queue)
+
+    async def wait(self, job_id, timeout, status=None):
+        """
+        Wait until a job changes state (long polling)
+
+        Args:
+            job_id: Job to wait on
+            timeout: Maximum seconds to wait
+            status: Status the caller last saw; if the job's status already
+                differs, return at once instead of waiting for the next change
+
+        Returns:
+            The job after the change, or as it is at the timeout; None if it
+            does not exist (or was deleted)
+        """
+        # Subscribe before reading, so a change in between is not missed
+        queue = self._add(job_id)
+        try:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job['status'] in FINISHED_STATUSES:
+                return job
+            if status is not None and job['status'] != status:
+                return job
+
+            state = job_state(job)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return job
+                try:
+                    changed = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    return job
+                if changed is None or job_state(changed) != state:
+                    return changed
+        finally:
+            self._remove(job_id, queue)
+
+    def subscribers(self, job_id=None):
+        """Number of subscribers of one job, or of all jobs"""
+        if job_id is not None:
+            return len(self._subscribers.get(job_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def _add(self, job_id):
+        """Register a subscriber queue for a job"""
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def _remove(self, job_id, queue):
+        """Unregister a subscriber queue"""
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+                self._states.pop(job_id, None)
+
+    def _deliver(self, job_id, job):
+        """Hand a changed job (None if deleted) to its subscribers"""
+        state = job_state(job) if job is not None else None
+        if job_id in self._states and self._states[job_id] == state:
+            return
+        self._states[job_id] = state
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(job)
+
+    def _read(self, job_ids):
+        """Watched jobs as stored now (runs in a thread); unreadable ones are left out"""
+        found = {}
+        for job_id in job_ids:
+            try:
+                found[job_id] = self.store.get(job_id)
+            except Exception:
+                logger.exception(f"Could not check job {job_id} for changes")
+        return found
+
+    async def _watch(self):
+        """Deliver changes made by other processes to this process's subscribers"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._subscribers:
+                continue
+            found = await asyncio.to_thread(self._read, list(self._subscribers))
+            for job_id, job in found.items():
+                # Subscribers may have left while the jobs were read
+                if job_id in self._subscribers:
+                    self._deliver(job_id, job)
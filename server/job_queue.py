@@ -0,0 +1,264 @@
+"""
+Job Queue
+
+Bounded queue between the API and the scrape workers. Pending jobs in the
+job store are the queue, so every API process sees the same depth and queue
+positions; each process runs a fixed pool of asyncio workers that claim jobs
+from it. This caps how many scrapes (and OCR solves) run at once regardless
+of how fast jobs are submitted.
+
+Jobs are queued in priority lanes: interactive jobs (a user waiting on the
+result) are always claimed before batch jobs. Batch jobs run for minutes, so
+at most batch_workers of them (by default one less than the workers) run at
+once in each process: the other workers stay free for interactive jobs.
+
+Identical lookups are coalesced: a job whose lookup_key matches a pending or
+running job is not queued again, the submitter gets the existing job.
+
+Store calls run in threads (asyncio.to_thread), so a write waiting on the
+store's lock never blocks the event loop the API and the crawls share.
+
+A worker renews the lease of the job it runs every third of the store's
+lease_seconds. Each process also sweeps the store for running jobs whose
+lease expired (their worker died with its process) and requeues them, or
+fails them after max_attempts claims.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+
+from job_store import MAX_ATTEMPTS, DepthExceeded
+
+logger = logging.getLogger(__name__)
+
+# Priority lane -> job priority (lower is claimed first)
+LANES = {
+    'interactive': 0,
+    'batch': 1,
+}
+
+# Seconds of finished jobs the throughput for Retry-After estimates is measured over
+THROUGHPUT_WINDOW = 300
+
+
+class QueueFull(Exception):
+    """The queue is at its maximum depth"""
+
+    def __init__(self, depth, retry_after):
+        super().__init__(f"Job queue is full ({depth} jobs pending)")
+        self.depth = depth
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """Bounded, prioritized job queue served by a pool of asyncio workers"""
+
+    def __init__(self, store, handler, workers=2, max_depth=100, poll_interval=0.5, max_attempts=MAX_ATTEMPTS,
+                 batch_workers=None):
+        """
+        Initialize queue
+
+        Args:
+            store: JobStore holding the jobs
+            handler: Coroutine function called with each claimed job
+            workers: Number of jobs this process runs at once
+            batch_workers: Number of batch lane jobs this process runs at once
+                (default: workers - 1, but at least 1)
+            max_depth: Maximum number of pending jobs (all processes)
+            poll_interval: Seconds between queue checks when idle, to pick up
+                jobs submitted through other processes
+            max_attempts: Claims of a job whose worker keeps dying before it
+                is failed instead of requeued
+        """
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_depth = max_depth
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.batch_workers = batch_workers if batch_workers is not None else max(workers - 1, 1)
+        self._batches_running = 0
+        # Lease renewals (and expired lease checks) per lease period
+        self.heartbeat_interval = store.lease_seconds / 3
+
+        # Moving average of job run time, for Retry-After estimates
+        self.average_seconds = 30.0
+        # (monotonic time, jobs finished by all processes) samples over THROUGHPUT_WINDOW
+        self._finished = deque()
+        self._wakeup = None
+        self._tasks = []
+
+    async def start(self):
+        """Start the worker pool on the running loop"""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._recover()))
+
+    async def stop(self):
+        """Stop the worker pool; running jobs go back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, job, lane='interactive'):
+        """
+        Queue a new job, or join the active job for the same lookup
+
+        Args:
+            job: Job dict (job_id, status 'pending', created_at, optional lookup_key, ...)
+            lane: Priority lane, see LANES
+
+        Returns:
+            Tuple of (queued job, or the existing job it was coalesced with;
+            whether it was coalesced)
+
+        Raises:
+            QueueFull: If max_depth jobs are already pending
+        """
+        job['lane'] = lane
+        job['priority'] = LANES[lane]
+        # Coalesced submissions add no work, so only new jobs count against the
+        # depth; the store checks it in the same transaction that inserts the job
+        try:
+            existing, created = await asyncio.to_thread(self.store.join, job, max_depth=self.max_depth)
+        except DepthExceeded as e:
+            raise QueueFull(e.depth, await self.retry_after(e.depth))
+        await asyncio.to_thread(self.store.incr, 'jobs/submitted')
+        if created:
+            if self._wakeup is not None:
+                self._wakeup.set()
+            return existing, False
+
+        await asyncio.to_thread(self.store.incr, 'jobs/coalesced')
+
+        # An interactive request for a queued batch job moves it to the interactive lane
+        if existing['status'] == 'pending' and LANES[lane] < existing.get('priority', 0):
+            moved = await asyncio.to_thread(self.store.update, existing['job_id'], lane=lane, priority=LANES[lane])
+            existing = moved or existing
+        return existing, True
+
+    async def coalescing_stats(self):
+        """Submissions, coalesced submissions and the coalescing hit rate (all processes)"""
+        counters = await asyncio.to_thread(self.store.counters)
+        submitted = counters.get('jobs/submitted', 0)
+        coalesced = counters.get('jobs/coalesced', 0)
+        return {
+            'submitted': submitted,
+            'coalesced': coalesced,
+            'hit_rate': coalesced / submitted if submitted else 0.0,
+        }
+
+    async def position(self, job_id):
+        """1-based queue position of a pending job, or None"""
+        return await asyncio.to_thread(self.store.queue_position, job_id)
+
+    async def throughput(self):
+        """
+        Jobs finished per second by the workers of all processes
+
+        Measured from the store's jobs/finished counter over the last
+        THROUGHPUT_WINDOW seconds. Until jobs have finished in that window,
+        estimated from the jobs running in all processes and the average run
+        time of this process's jobs.
+        """
+        counters = await asyncio.to_thread(self.store.counters)
+        now = time.monotonic()
+        finished = counters.get('jobs/finished', 0)
+        self._sample(now, finished)
+        since, before = self._finished[0]
+        if finished > before and now - since >= 1:
+            return (finished - before) / (now - since)
+        counts = await asyncio.to_thread(self.store.counts)
+        return max(counts['running'], 1) / self.average_seconds
+
+    async def retry_after(self, depth=None):
+        """Seconds until a slot is likely to free up, for the Retry-After header"""
+        depth = await asyncio.to_thread(self.store.queue_depth) if depth is None else depth
+        wait = (depth - self.max_depth + 1) / await self.throughput()
+        return max(1, math.ceil(wait))
+
+    def _sample(self, now, finished):
+        """Record the finished jobs counter, dropping samples older than the window"""
+        self._finished.append((now, finished))
+        while len(self._finished) > 1 and now - self._finished[1][0] >= THROUGHPUT_WINDOW:
+            self._finished.popleft()
+
+    async def _worker(self, number):
+        """Claim and run jobs until cancelled"""
+        while True:
+            # Cleared before claiming, so a submit in between is not missed
+            self._wakeup.clear()
+            # With batch_workers batch jobs running, only interactive jobs are
+            # claimed. The slot is taken before claiming, as claims run in threads.
+            batch_slot = self._batches_running < self.batch_workers
+            if batch_slot:
+                self._batches_running += 1
+            try:
+                job = await asyncio.to_thread(self.store.claim, None if batch_slot else LANES['interactive'])
+            except BaseException:
+                if batch_slot:
+                    self._batches_running -= 1
+                raise
+            batch = job is not None and job.get('priority', 0) > LANES['interactive']
+            if batch_slot and not batch:
+                self._batches_running -= 1
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            started = time.monotonic()
+            lease = asyncio.ensure_future(self._heartbeat(job['job_id']))
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                # Shutting down: leave the job for another worker
+                await asyncio.to_thread(self.store.update, job['job_id'], status='pending')
+                raise
+            except Exception:
+                logger.exception(f"Worker {number}: job {job['job_id']} failed")
+            finally:
+                lease.cancel()
+                if batch:
+                    self._batches_running -= 1
+                    # A batch slot is free: idle workers may claim batch jobs again
+                    self._wakeup.set()
+                elapsed = time.monotonic() - started
+                self.average_seconds = 0.8 * self.average_seconds + 0.2 * elapsed
+            await asyncio.to_thread(self.store.incr, 'jobs/finished')
+
+    async def _heartbeat(self, job_id):
+        """Renew the lease of a job this process is running, until cancelled"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                running = await asyncio.to_thread(self.store.heartbeat, job_id)
+            except Exception:
+                logger.exception(f"Could not renew the lease of job {job_id}")
+                continue
+            if not running:
+                logger.warning(f"Job {job_id} is no longer running here (lease expired, finished or deleted)")
+                return
+
+    async def _recover(self):
+        """Requeue or fail jobs left running by dead workers, and sample throughput, until cancelled"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                requeued, failed = await asyncio.to_thread(self.store.recover, self.max_attempts)
+                counters = await asyncio.to_thread(self.store.counters)
+            except Exception:
+                logger.exception("Could not recover jobs with expired leases")
+                continue
+            # Keeps the throughput window filled between Retry-After estimates
+            self._sample(time.monotonic(), counters.get('jobs/finished', 0))
+            if requeued or failed:
+                logger.warning(f"Jobs with expired leases: {requeued} requeued, {failed} failed")
+            if requeued:
+                self._wakeup.set()
@@ -0,0 +1,181 @@
+"""
+Compact Job Records
+
+The in-memory job store can retain tens of thousands of jobs. A plain job
+dict carries a hash table, ISO 8601 timestamp strings and its own copy of
+every status, vehicle type and lane string, and the status endpoint
+re-validates it through Pydantic on every read.
+
+JobRecord keeps the same job in fixed slots instead:
+
+- timestamps as integer microseconds since the epoch (naive local time,
+  like the ISO strings the API writes, so they convert back exactly)
+- status, kind, vehicle type and lane as interned strings shared by all jobs
+- the result encoded to JSON bytes once, when it is stored, and spliced
+  verbatim into every status response
+
+Rarely set fields (progress, cache details, batch data) live in a small
+extra dict. Python 3.9 compatible: explicit __slots__, no dataclass(slots=True).
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_us(timestamp):
+    """ISO 8601 timestamp -> integer microseconds since the epoch (None stays None)"""
+    if timestamp is None:
+        return None
+    return (datetime.fromisoformat(timestamp) - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(epoch_us):
+    """Integer microseconds since the epoch -> ISO 8601 timestamp (None stays None)"""
+    if epoch_us is None:
+        return None
+    return (_EPOCH + epoch_us * _MICROSECOND).isoformat()
+
+
+def _intern(value):
+    """Share one copy of small enum-like strings between all records"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class JobRecord:
+    """Compact representation of one job (see module docstring)"""
+
+    __slots__ = (
+        'job_id', 'status', 'kind', 'license_plate', 'vehicle_type', 'lookup_key',
+        'lane', 'priority', 'max_retries', 'created', 'completed', 'claimed', 'heartbeat', 'attempts',
+        'error', 'result_json', 'extra',
+    )
+
+    # Fields of the status response (api.JobResult) taken from extra
+    RESPONSE_EXTRA = ('cached', 'cache_age', 'progress')
+
+    def __init__(self, job_id, status, created, kind='lookup', license_plate=None, vehicle_type=None,
+                 lookup_key=None, lane=None, priority=0, max_retries=None, completed=None, claimed=None,
+                 heartbeat=None, attempts=0, error=None, result_json=None, extra=None):
+        self.job_id = job_id
+        self.status = _intern(status)
+        self.kind = _intern(kind)
+        self.license_plate = license_plate
+        self.vehicle_type = _intern(vehicle_type)
+        self.lookup_key = lookup_key
+        self.lane = _intern(lane)
+        self.priority = priority
+        self.max_retries = max_retries
+        self.created = created
+        self.completed = completed
+        self.claimed = claimed
+        self.heartbeat = heartbeat
+        self.attempts = attempts
+        self.error = error
+        self.result_json = result_json
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, job):
+        """Build a record from a job dict"""
+        record = cls(job['job_id'], job['status'], to_epoch_us(job['created_at']))
+        record.update(**{key: value for key, value in job.items() if key not in ('job_id', 'created_at')})
+        return record
+
+    def update(self, **fields):
+        """Set job dict fields on the record"""
+        for key, value in fields.items():
+            if key == 'status':
+                self.status = _intern(value)
+            elif key == 'result':
+                self.result_json = json.dumps(value, ensure_ascii=False).encode() if value is not None else None
+            elif key == 'completed_at':
+                self.completed = to_epoch_us(value)
+            elif key == 'created_at':
+                self.created = to_epoch_us(value)
+            elif key == 'claimed_at':
+                self.claimed = to_epoch_us(value)
+            elif key == 'heartbeat_at':
+                self.heartbeat = to_epoch_us(value)
+            elif key in ('kind', 'vehicle_type', 'lane'):
+                setattr(self, key, _intern(value))
+            elif key in ('license_plate', 'lookup_key', 'priority', 'max_retries', 'attempts', 'error', 'job_id'):
+                setattr(self, key, value)
+            elif value is None and (self.extra is None or key not in self.extra):
+                # An unset optional field: nothing to store
+                continue
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    @property
+    def created_at(self):
+        return from_epoch_us(self.created)
+
+    @property
+    def result(self):
+        return json.loads(self.result_json) if self.result_json is not None else None
+
+    def to_dict(self):
+        """The job as a plain dict (what JobStore methods return)"""
+        job = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'kind': self.kind,
+            'license_plate': self.license_plate,
+            'vehicle_type': self.vehicle_type,
+            'lookup_key': self.lookup_key,
+            'lane': self.lane,
+            'priority': self.priority,
+            'max_retries': self.max_retries,
+            'created_at': self.created_at,
+            'completed_at': from_epoch_us(self.completed),
+            'claimed_at': from_epoch_us(self.claimed),
+            'heartbeat_at': from_epoch_us(self.heartbeat),
+            'attempts': self.attempts,
+            'error': self.error,
+            'result': self.result,
+        }
+        if self.extra:
+            job.update(self.extra)
+        return job
+
+    def to_json(self, **fields):
+        """
+        The job as a status response body (the fields of api.JobResult)
+
+        The stored result bytes are spliced in as they are, so the result is
+        neither decoded nor re-encoded.
+
+        Args:
+            **fields: Response fields computed at read time, e.g. queue_position
+
+        Returns:
+            UTF-8 JSON bytes
+        """
+        extra = self.extra or {}
+        body = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'license_plate': self.license_plate,
+            'vehicle_type': self.vehicle_type,
+            'created_at': self.created_at,
+            'completed_at': from_epoch_us(self.completed),
+            'error': self.error,
+            'lane': self.lane,
+            'queue_position': None,
+            'cached': extra.get('cached', False),
+            'cache_age': extra.get('cache_age'),
+            'kind': self.kind,
+            'progress': extra.get('progress'),
+        }
+        body.update(fields)
+        head = json.dumps(body, ensure_ascii=False).encode()
+        return head[:-1] + b', "result": ' + (self.result_json or b'null') + b'}'
+
+    def __repr__(self):
+        return f"JobRecord({self.job_id!r}, {self.status!r})"
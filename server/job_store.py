@@ -0,0 +1,1285 @@
+"""
+Job Store
+
+Scraping jobs must be visible to every API worker (uvicorn --workers N) and,
+with a network backend, to every node. The API talks to a JobStore; the
+backend is picked by URL (JOB_STORE_URL):
+
+    memory://                       this process only (development, tests)
+    sqlite:///jobs.db               local file shared by all workers (WAL mode)
+    sqlite:////app/data/jobs.db     same, absolute path
+    redis://localhost:6379/0        any Redis-protocol server, shared by all nodes
+
+Jobs are plain dicts with at least job_id, status and created_at (ISO 8601).
+
+Pending jobs double as the job queue: claim() atomically hands the next one
+(lowest priority value first, then oldest) to a worker and marks it running,
+so workers of every process pull from the same queue.
+
+Running jobs are leased: claim() stamps claimed_at and heartbeat_at, and the
+worker running the job renews the lease with heartbeat(). A running job whose
+heartbeat is older than lease_seconds was left behind by a worker that died;
+recover() puts it back in the queue, or fails it after max_attempts claims.
+
+Jobs with a lookup_key are coalesced: join() returns the active (pending or
+running with a live lease) job with the same key instead of creating a second
+one.
+
+Jobs that produce many results (the plates of a batch) append them with
+append_results(): they are stored apart from the job, one entry each, so
+adding results never rewrites the job or the results before them, and
+readers fetch only the results after the ones they have.
+
+Every backend keeps its listing order (newest first) and per-status counts
+up to date on write, so list() pages with a cursor and counts() is constant
+time however many jobs are retained; evict() drops old finished jobs.
+"""
+
+import bisect
+import heapq
+import itertools
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlparse
+
+from job_record import JobRecord, to_epoch_us
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for redis:// job stores
+    redis = None
+
+STATUSES = ('pending', 'running', 'completed', 'failed')
+ACTIVE_STATUSES = ('pending', 'running')
+FINISHED_STATUSES = ('completed', 'failed')
+
+# Seconds a running job stays leased to its worker without a heartbeat
+LEASE_SECONDS = 60
+
+# Claims of a job before recover() fails it instead of requeueing it
+MAX_ATTEMPTS = 3
+
+
+def _timestamp(created_at):
+    """Sort key for an ISO 8601 created_at"""
+    return datetime.fromisoformat(created_at).timestamp()
+
+
+class DepthExceeded(Exception):
+    """join() would queue a job beyond max_depth pending jobs"""
+
+    def __init__(self, depth):
+        super().__init__(f"{depth} jobs pending")
+        self.depth = depth
+
+
+def _now():
+    """Current time as an ISO 8601 timestamp, like created_at"""
+    return datetime.now().isoformat()
+
+
+def _lease_cutoff(lease_seconds):
+    """heartbeat_at before which a running job's lease has expired"""
+    return (datetime.now() - timedelta(seconds=lease_seconds)).isoformat()
+
+
+def _expired(job, cutoff):
+    """Whether a job is running on an expired lease (ISO timestamps compare as strings)"""
+    return job['status'] == 'running' and (job.get('heartbeat_at') or '') < cutoff
+
+
+def _claim_fields(job):
+    """Fields of a job claimed by a worker now"""
+    now = _now()
+    return {'status': 'running', 'claimed_at': now, 'heartbeat_at': now, 'attempts': (job.get('attempts') or 0) + 1}
+
+
+def _recovery_fields(job, superseded, max_attempts):
+    """
+    Fields of a running job whose lease expired, once recovered
+
+    The job goes back to the queue, unless it already had max_attempts
+    claims or a newer job has taken over its lookup (join() ignores expired
+    jobs); then it fails.
+    """
+    if superseded:
+        error = 'Worker lost; superseded by a newer job for the same lookup'
+    elif (job.get('attempts') or 0) >= max_attempts:
+        error = f"Worker lost on each of {job.get('attempts')} attempts"
+    else:
+        return {'status': 'pending'}
+    return {'status': 'failed', 'error': error, 'completed_at': _now()}
+
+
+def make_cursor(job):
+    """Cursor for the page after this job (see JobStore.list)"""
+    return f"{job['created_at']}|{job['job_id']}"
+
+
+def parse_cursor(cursor):
+    """
+    Split a cursor into (created_at, job_id)
+
+    Raises:
+        ValueError: If it is not a cursor made by make_cursor
+    """
+    created_at, separator, job_id = cursor.partition('|')
+    if not separator or not job_id:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    _timestamp(created_at)
+    return created_at, job_id
+
+
+class JobStore:
+    """Interface of all job store backends"""
+
+    lease_seconds = LEASE_SECONDS
+
+    def create(self, job):
+        """Store a new job"""
+        raise NotImplementedError
+
+    def find_active(self, lookup_key):
+        """Return the pending or running job with this lookup_key, or None (running jobs on an expired lease are ignored)"""
+        raise NotImplementedError
+
+    def join(self, job, max_depth=None):
+        """
+        Store a new job unless an active job with the same lookup_key exists
+
+        Check and insert are atomic, so concurrent identical submissions from
+        different workers end up on one job, and concurrent submissions
+        cannot take the queue beyond max_depth.
+
+        Args:
+            job: New pending job
+            max_depth: Refuse to store it if this many jobs are pending
+                (joining an existing job is always allowed)
+
+        Returns:
+            Tuple of (stored or existing job, whether the job was created)
+
+        Raises:
+            DepthExceeded: If the job would have been stored beyond max_depth
+        """
+        raise NotImplementedError
+
+    def get(self, job_id):
+        """Return a job, or None if it does not exist"""
+        raise NotImplementedError
+
+    def get_json(self, job_id, **fields):
+        """
+        Return a job as a status response body (see JobRecord.to_json)
+
+        Args:
+            job_id: Job to return
+            **fields: Response fields computed at read time, e.g. queue_position
+
+        Returns:
+            UTF-8 JSON bytes, or None if the job does not exist
+        """
+        job = self.get(job_id)
+        return JobRecord.from_dict(job).to_json(**fields) if job is not None else None
+
+    def update(self, job_id, **fields):
+        """
+        Update fields of a job
+
+        Returns:
+            The updated job, or None if it does not exist
+        """
+        raise NotImplementedError
+
+    def delete(self, job_id):
+        """Delete a job; returns whether it existed"""
+        raise NotImplementedError
+
+    def append_results(self, job_id, results):
+        """
+        Append results of a job (e.g. finished plates of a batch)
+
+        Args:
+            job_id: Job the results belong to (deleted with it)
+            results: List of JSON-serializable results
+        """
+        raise NotImplementedError
+
+    def get_results(self, job_id, offset=0):
+        """Results of a job from offset on, in the order they were appended"""
+        raise NotImplementedError
+
+    def list(self, status=None, limit=10, cursor=None):
+        """
+        List jobs, newest first
+
+        Args:
+            status: Only jobs with this status
+            limit: Page size
+            cursor: next_cursor of the previous page, None for the first page
+
+        Returns:
+            Tuple of (total matching jobs, page of jobs, cursor of the next
+            page or None if this is the last)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        raise NotImplementedError
+
+    def counts(self):
+        """Number of jobs per status (constant time)"""
+        raise NotImplementedError
+
+    def evict(self, before=None, keep=None):
+        """
+        Delete finished (completed or failed) jobs
+
+        Args:
+            before: Delete finished jobs created before this ISO 8601 time
+            keep: Keep at most this many finished jobs, deleting the oldest
+
+        Returns:
+            Number of jobs deleted
+        """
+        raise NotImplementedError
+
+    def claim(self, max_priority=None):
+        """
+        Take the next pending job off the queue, mark it running and lease it
+
+        The job's claimed_at and heartbeat_at are set to now and its attempts
+        counted up.
+
+        Args:
+            max_priority: Only claim jobs with at most this priority (e.g. only
+                the interactive lane); None for any job
+
+        Returns:
+            The claimed job, or None if no such job is pending
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, job_id):
+        """
+        Renew the lease of a running job
+
+        Returns:
+            Whether the job is still running (False if it was recovered,
+            finished or deleted meanwhile)
+        """
+        raise NotImplementedError
+
+    def recover(self, max_attempts=MAX_ATTEMPTS):
+        """
+        Requeue or fail running jobs whose lease expired
+
+        Args:
+            max_attempts: Claims of a job after which it fails instead
+
+        Returns:
+            Tuple of (jobs requeued, jobs failed)
+        """
+        raise NotImplementedError
+
+    def queue_position(self, job_id):
+        """1-based position of a pending job in the queue, or None if it is not pending"""
+        raise NotImplementedError
+
+    def queue_depth(self):
+        """Number of pending jobs"""
+        return self.counts()['pending']
+
+    def incr(self, name, amount=1):
+        """Increment a shared counter"""
+        raise NotImplementedError
+
+    def counters(self):
+        """All shared counters, as a dict"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release connections"""
+
+
+class MemoryJobStore(JobStore):
+    """
+    Jobs in a dict of this process
+
+    Jobs are held as compact JobRecords (see job_record). Sorted lists of
+    (created, job_id), one for all jobs and one per status, are kept in step
+    with every write; they give listing order, cursor seeks by bisection and
+    counts by length.
+    """
+
+    def __init__(self, lease_seconds=LEASE_SECONDS):
+        """
+        Initialize store
+
+        Args:
+            lease_seconds: Seconds a running job stays leased without a heartbeat
+        """
+        self.lease_seconds = lease_seconds
+        self._jobs = {}
+        self._order = []
+        self._by_status = {status: [] for status in STATUSES}
+        # Queue order keys of pending jobs
+        self._queue = {}
+        # lookup_key -> job_id of active jobs
+        self._active = {}
+        # job_id -> appended results
+        self._results = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _add(self, record):
+        self._jobs[record.job_id] = record
+        key = (record.created, record.job_id)
+        bisect.insort(self._order, key)
+        bisect.insort(self._by_status.setdefault(record.status, []), key)
+        self._requeue(record)
+
+    def _reindex(self, record, old_status):
+        if record.status != old_status:
+            key = (record.created, record.job_id)
+            _discard(self._by_status[old_status], key)
+            bisect.insort(self._by_status.setdefault(record.status, []), key)
+        self._requeue(record)
+
+    def _requeue(self, record):
+        if record.status == 'pending':
+            self._queue[record.job_id] = (record.priority or 0, record.created)
+        else:
+            self._queue.pop(record.job_id, None)
+
+        lookup_key = record.lookup_key
+        if lookup_key is not None:
+            if record.status in ACTIVE_STATUSES:
+                self._active[lookup_key] = record.job_id
+            elif self._active.get(lookup_key) == record.job_id:
+                del self._active[lookup_key]
+
+    def _live(self, lookup_key):
+        """Active record of a lookup, unless it is running on an expired lease"""
+        job_id = self._active.get(lookup_key)
+        if job_id is None:
+            return None
+        record = self._jobs[job_id]
+        if record.status == 'running' and (record.heartbeat or 0) < to_epoch_us(_lease_cutoff(self.lease_seconds)):
+            return None
+        return record
+
+    def create(self, job):
+        with self._lock:
+            self._add(JobRecord.from_dict(job))
+
+    def find_active(self, lookup_key):
+        with self._lock:
+            record = self._live(lookup_key)
+            return record.to_dict() if record is not None else None
+
+    def join(self, job, max_depth=None):
+        with self._lock:
+            record = self._live(job.get('lookup_key'))
+            if record is not None:
+                return record.to_dict(), False
+            if max_depth is not None and len(self._queue) >= max_depth:
+                raise DepthExceeded(len(self._queue))
+            self._add(JobRecord.from_dict(job))
+            return dict(job), True
+
+    def get(self, job_id):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return record.to_dict() if record is not None else None
+
+    def get_json(self, job_id, **fields):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return record.to_json(**fields) if record is not None else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is None:
+                return None
+            old_status = record.status
+            record.update(**fields)
+            self._reindex(record, old_status)
+            return record.to_dict()
+
+    def delete(self, job_id):
+        with self._lock:
+            return self._delete(job_id)
+
+    def _delete(self, job_id):
+        record = self._jobs.pop(job_id, None)
+        if record is None:
+            return False
+        self._results.pop(job_id, None)
+        key = (record.created, record.job_id)
+        _discard(self._order, key)
+        _discard(self._by_status[record.status], key)
+        record.status = 'deleted'
+        self._requeue(record)
+        return True
+
+    def append_results(self, job_id, results):
+        with self._lock:
+            if job_id in self._jobs:
+                self._results.setdefault(job_id, []).extend(results)
+
+    def get_results(self, job_id, offset=0):
+        with self._lock:
+            return list(self._results.get(job_id, ())[offset:])
+
+    def list(self, status=None, limit=10, cursor=None):
+        if cursor:
+            created_at, job_id = parse_cursor(cursor)
+            cursor_key = (to_epoch_us(created_at), job_id)
+        with self._lock:
+            index = self._by_status.get(status, []) if status else self._order
+            # Newest first: walk the ascending index backwards from the cursor
+            end = bisect.bisect_left(index, cursor_key) if cursor else len(index)
+            keys = index[max(end - limit, 0):end][::-1] if limit > 0 else []
+            page = [self._jobs[job_id].to_dict() for _, job_id in keys]
+            more = end - len(keys) > 0
+        return len(index), page, (make_cursor(page[-1]) if page and more else None)
+
+    def counts(self):
+        with self._lock:
+            return {status: len(index) for status, index in self._by_status.items()}
+
+    def evict(self, before=None, keep=None):
+        before = to_epoch_us(before)
+        with self._lock:
+            completed, failed = self._by_status['completed'], self._by_status['failed']
+            excess = len(completed) + len(failed) - keep if keep is not None else 0
+            doomed = []
+            # Oldest first; stop at the first job that is both recent and within keep
+            for created, job_id in heapq.merge(completed, failed):
+                if len(doomed) >= excess and (before is None or created >= before):
+                    break
+                doomed.append(job_id)
+            for job_id in doomed:
+                self._delete(job_id)
+        return len(doomed)
+
+    def claim(self, max_priority=None):
+        with self._lock:
+            queue = self._queue
+            if max_priority is not None:
+                queue = {job_id: key for job_id, key in queue.items() if key[0] <= max_priority}
+            if not queue:
+                return None
+            job_id = min(queue, key=queue.get)
+            record = self._jobs[job_id]
+            record.update(**_claim_fields({'attempts': record.attempts}))
+            self._reindex(record, 'pending')
+            return record.to_dict()
+
+    def heartbeat(self, job_id):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is None or record.status != 'running':
+                return False
+            record.heartbeat = to_epoch_us(_now())
+            return True
+
+    def recover(self, max_attempts=MAX_ATTEMPTS):
+        cutoff = to_epoch_us(_lease_cutoff(self.lease_seconds))
+        recovered = {'pending': 0, 'failed': 0}
+        with self._lock:
+            for _, job_id in list(self._by_status['running']):
+                record = self._jobs[job_id]
+                if (record.heartbeat or 0) >= cutoff:
+                    continue
+                superseded = record.lookup_key is not None and self._active.get(record.lookup_key) != job_id
+                fields = _recovery_fields({'attempts': record.attempts}, superseded, max_attempts)
+                record.update(**fields)
+                self._reindex(record, 'running')
+                recovered[fields['status']] += 1
+        return recovered['pending'], recovered['failed']
+
+    def queue_position(self, job_id):
+        with self._lock:
+            key = self._queue.get(job_id)
+            if key is None:
+                return None
+            return 1 + sum(1 for other in self._queue.values() if other < key)
+
+    def queue_depth(self):
+        with self._lock:
+            return len(self._queue)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+def _discard(index, key):
+    """Remove a key from a sorted list, if present"""
+    i = bisect.bisect_left(index, key)
+    if i < len(index) and index[i] == key:
+        del index[i]
+
+
+class SqliteJobStore(JobStore):
+    """
+    Jobs in a local SQLite database in WAL mode
+
+    WAL lets readers (status polls from any worker) run concurrently with the
+    writer. status, priority and created_at are columns with indexes; the job
+    is stored as JSON, with its result in a column of its own, so status
+    responses splice the stored result in without decoding it. Triggers keep
+    per-status counts in job_counts as rows are inserted, updated and deleted.
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS):
+        """
+        Initialize store
+
+        Args:
+            path: Database file (created if missing)
+            lease_seconds: Seconds a running job stays leased without a heartbeat
+        """
+        self.path = str(path)
+        self.lease_seconds = lease_seconds
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' job_id TEXT PRIMARY KEY,'
+                ' status TEXT NOT NULL,'
+                ' priority INTEGER NOT NULL DEFAULT 0,'
+                ' lookup_key TEXT,'
+                ' heartbeat_at TEXT,'
+                ' created_at TEXT NOT NULL,'
+                ' data TEXT NOT NULL,'
+                # UTF-8 JSON of the job's result
+                ' result BLOB)'
+            )
+            # Listing order, with job_id breaking created_at ties for cursors
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_order ON jobs (created_at, job_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_status_order ON jobs (status, created_at, job_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, created_at)')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS jobs_active ON jobs (lookup_key)'
+                " WHERE status IN ('pending', 'running')"
+            )
+
+            # Appended results, one row each, deleted with their job
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS job_results ('
+                ' job_id TEXT NOT NULL,'
+                ' seq INTEGER NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' PRIMARY KEY (job_id, seq)) WITHOUT ROWID'
+            )
+            conn.execute(
+                'CREATE TRIGGER IF NOT EXISTS jobs_results_delete AFTER DELETE ON jobs BEGIN'
+                ' DELETE FROM job_results WHERE job_id = OLD.job_id;'
+                ' END'
+            )
+
+            # Per-status counts, kept by triggers
+            conn.execute('CREATE TABLE IF NOT EXISTS job_counts (status TEXT PRIMARY KEY, count INTEGER NOT NULL)')
+            conn.execute(
+                'CREATE TRIGGER IF NOT EXISTS jobs_count_insert AFTER INSERT ON jobs BEGIN'
+                ' INSERT INTO job_counts (status, count) VALUES (NEW.status, 1)'
+                ' ON CONFLICT (status) DO UPDATE SET count = count + 1;'
+                ' END'
+            )
+            conn.execute(
+                'CREATE TRIGGER IF NOT EXISTS jobs_count_update AFTER UPDATE OF status ON jobs'
+                ' WHEN OLD.status != NEW.status BEGIN'
+                ' UPDATE job_counts SET count = count - 1 WHERE status = OLD.status;'
+                ' INSERT INTO job_counts (status, count) VALUES (NEW.status, 1)'
+                ' ON CONFLICT (status) DO UPDATE SET count = count + 1;'
+                ' END'
+            )
+            conn.execute(
+                'CREATE TRIGGER IF NOT EXISTS jobs_count_delete AFTER DELETE ON jobs BEGIN'
+                ' UPDATE job_counts SET count = count - 1 WHERE status = OLD.status;'
+                ' END'
+            )
+
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS counters ('
+                ' name TEXT PRIMARY KEY,'
+                ' value INTEGER NOT NULL)'
+            )
+
+    def _connection(self):
+        """Connection of the calling thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _encode(job):
+        """Job -> (data, result) column values: JSON without the result, and the result's JSON"""
+        fields = {key: value for key, value in job.items() if key != 'result'}
+        result = job.get('result')
+        return (
+            json.dumps(fields, ensure_ascii=False),
+            json.dumps(result, ensure_ascii=False).encode() if result is not None else None,
+        )
+
+    @staticmethod
+    def _decode(row):
+        """(data, result) columns -> job"""
+        data, result = row
+        job = json.loads(data)
+        if result is not None:
+            job['result'] = json.loads(result)
+        return job
+
+    def create(self, job, conn=None):
+        (conn or self._connection()).execute(
+            'INSERT INTO jobs (job_id, status, priority, lookup_key, heartbeat_at, created_at, data, result)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job['job_id'], job['status'], job.get('priority', 0), job.get('lookup_key'), job.get('heartbeat_at'),
+             job['created_at'], *self._encode(job)),
+        )
+
+    @classmethod
+    def _write(cls, conn, job):
+        """Write back a changed job (inside the caller's transaction)"""
+        conn.execute(
+            'UPDATE jobs SET status = ?, priority = ?, heartbeat_at = ?, data = ?, result = ? WHERE job_id = ?',
+            (job['status'], job.get('priority', 0), job.get('heartbeat_at'), *cls._encode(job), job['job_id']),
+        )
+
+    def find_active(self, lookup_key, conn=None):
+        # A running job without heartbeat_at has no lease: it counts as expired
+        row = (conn or self._connection()).execute(
+            "SELECT data, result FROM jobs WHERE lookup_key = ? AND status IN ('pending', 'running')"
+            " AND (status = 'pending' OR heartbeat_at >= ?)",
+            (lookup_key, _lease_cutoff(self.lease_seconds)),
+        ).fetchone()
+        return self._decode(row) if row else None
+
+    def join(self, job, max_depth=None):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            existing = self.find_active(job['lookup_key'], conn) if job.get('lookup_key') else None
+            if existing is None:
+                if max_depth is not None:
+                    row = conn.execute("SELECT count FROM job_counts WHERE status = 'pending'").fetchone()
+                    depth = row[0] if row else 0
+                    if depth >= max_depth:
+                        raise DepthExceeded(depth)
+                self.create(job, conn)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return (existing, False) if existing is not None else (job, True)
+
+    def get(self, job_id):
+        row = self._connection().execute('SELECT data, result FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def get_json(self, job_id, **fields):
+        row = self._connection().execute('SELECT data, result FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        data, result = row
+        record = JobRecord.from_dict(json.loads(data))
+        if result is not None:
+            # Already UTF-8 JSON: spliced into the response as stored
+            record.result_json = result
+        return record.to_json(**fields)
+
+    def update(self, job_id, **fields):
+        return self._update(job_id, lambda job: fields)
+
+    def _update(self, job_id, change):
+        """
+        Change a job in one write transaction
+
+        Args:
+            job_id: Job to change
+            change: Called with the stored job; returns the fields to set, or
+                None to leave the job as it is
+
+        Returns:
+            The job afterwards, or None if it does not exist
+        """
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front, so concurrent updates from
+        # other workers cannot interleave between the read and the write
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT data, result FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+
+            job = self._decode(row)
+            fields = change(job)
+            if fields is not None:
+                job.update(fields)
+                self._write(conn, job)
+            conn.execute('COMMIT')
+            return job
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def delete(self, job_id):
+        return self._connection().execute('DELETE FROM jobs WHERE job_id = ?', (job_id,)).rowcount > 0
+
+    def append_results(self, job_id, results):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            start = conn.execute('SELECT COUNT(*) FROM job_results WHERE job_id = ?', (job_id,)).fetchone()[0]
+            conn.executemany(
+                'INSERT INTO job_results (job_id, seq, data) VALUES (?, ?, ?)',
+                [(job_id, start + i, json.dumps(result, ensure_ascii=False)) for i, result in enumerate(results)],
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_results(self, job_id, offset=0):
+        rows = self._connection().execute(
+            'SELECT data FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq', (job_id, offset)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def list(self, status=None, limit=10, cursor=None):
+        conditions, params = [], []
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if cursor:
+            # Seek past the cursor on the (status,) created_at, job_id index
+            conditions.append('(created_at, job_id) < (?, ?)')
+            params.extend(parse_cursor(cursor))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        # One extra row tells whether there is a next page
+        rows = self._connection().execute(
+            f'SELECT data, result FROM jobs {where} ORDER BY created_at DESC, job_id DESC LIMIT ?',
+            params + [limit + 1],
+        ).fetchall() if limit > 0 else []
+        page = [self._decode(row) for row in rows[:limit]]
+
+        counts = self.counts()
+        total = counts.get(status, 0) if status else sum(counts.values())
+        return total, page, (make_cursor(page[-1]) if len(rows) > limit else None)
+
+    def counts(self):
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self._connection().execute('SELECT status, count FROM job_counts'))
+        return counts
+
+    def evict(self, before=None, keep=None):
+        conn = self._connection()
+        finished = "status IN ('completed', 'failed')"
+        deleted = 0
+        if before is not None:
+            deleted += conn.execute(f'DELETE FROM jobs WHERE {finished} AND created_at < ?', (before,)).rowcount
+        if keep is not None:
+            deleted += conn.execute(
+                f'DELETE FROM jobs WHERE job_id IN (SELECT job_id FROM jobs WHERE {finished} '
+                'ORDER BY created_at DESC, job_id DESC LIMIT -1 OFFSET ?)',
+                (keep,),
+            ).rowcount
+        return deleted
+
+    def claim(self, max_priority=None):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT data, result FROM jobs WHERE status = 'pending' AND (? IS NULL OR priority <= ?) "
+                "ORDER BY priority, created_at LIMIT 1",
+                (max_priority, max_priority),
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+
+            job = self._decode(row)
+            job.update(_claim_fields(job))
+            self._write(conn, job)
+            conn.execute('COMMIT')
+            return job
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def heartbeat(self, job_id):
+        job = self._update(job_id, lambda job: {'heartbeat_at': _now()} if job['status'] == 'running' else None)
+        return job is not None and job['status'] == 'running'
+
+    def recover(self, max_attempts=MAX_ATTEMPTS):
+        recovered = {'pending': 0, 'failed': 0}
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                "SELECT data, result FROM jobs WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)"
+                ' ORDER BY created_at',
+                (_lease_cutoff(self.lease_seconds),),
+            ).fetchall()
+            for row in rows:
+                job = self._decode(row)
+                superseded = job.get('lookup_key') is not None and conn.execute(
+                    "SELECT 1 FROM jobs WHERE lookup_key = ? AND job_id != ? AND status IN ('pending', 'running')",
+                    (job['lookup_key'], job['job_id']),
+                ).fetchone() is not None
+                job.update(_recovery_fields(job, superseded, max_attempts))
+                self._write(conn, job)
+                recovered[job['status']] += 1
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return recovered['pending'], recovered['failed']
+
+    def queue_position(self, job_id):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT priority, created_at FROM jobs WHERE job_id = ? AND status = 'pending'", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        priority, created_at = row
+        ahead = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'pending' "
+            "AND (priority < ? OR (priority = ? AND created_at < ?))",
+            (priority, priority, created_at),
+        ).fetchone()[0]
+        return ahead + 1
+
+    def incr(self, name, amount=1):
+        self._connection().execute(
+            'INSERT INTO counters (name, value) VALUES (?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+            (name, amount),
+        )
+
+    def counters(self):
+        return dict(self._connection().execute('SELECT name, value FROM counters'))
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisJobStore(JobStore):
+    """
+    Jobs in a Redis-protocol server
+
+    Each job is a JSON string under <prefix>job:<id>. A sorted set per status,
+    scored by creation time, serves filtered listing and counting; status
+    changes move the job between sets in one transaction. Pending jobs are
+    also in the <prefix>queue sorted set, scored by priority lane and age, and
+    <prefix>active:<lookup_key> points at the active job of each lookup.
+    """
+
+    def __init__(self, url, prefix='csgt:', lease_seconds=LEASE_SECONDS, client=None):
+        """
+        Initialize store
+
+        Args:
+            url: redis:// or rediss:// URL
+            prefix: Key prefix, so several deployments can share a server
+            lease_seconds: Seconds a running job stays leased without a heartbeat
+            client: Redis client to use instead of connecting to url (e.g. fakeredis in tests)
+        """
+        if client is None:
+            if redis is None:
+                raise ImportError("redis:// job stores need the redis package: pip install redis")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.lease_seconds = lease_seconds
+
+    def _job_key(self, job_id):
+        return f'{self.prefix}job:{job_id}'
+
+    def _status_key(self, status):
+        return f'{self.prefix}status:{status}'
+
+    @property
+    def _all_key(self):
+        return f'{self.prefix}jobs'
+
+    @property
+    def _queue_key(self):
+        return f'{self.prefix}queue'
+
+    def _active_key(self, lookup_key):
+        return f'{self.prefix}active:{lookup_key}'
+
+    def _results_key(self, job_id):
+        return f'{self.prefix}results:{job_id}'
+
+    @property
+    def _counters_key(self):
+        return f'{self.prefix}counters'
+
+    @staticmethod
+    def _queue_score(job):
+        # Lanes are 1e11 s apart, far more than any creation timestamp
+        return job.get('priority', 0) * 1e11 + _timestamp(job['created_at'])
+
+    def create(self, job):
+        pipe = self.client.pipeline()
+        self._create(pipe, job)
+        pipe.execute()
+
+    def _create(self, pipe, job):
+        """Queue the commands storing a new job on a pipeline"""
+        score = _timestamp(job['created_at'])
+        pipe.set(self._job_key(job['job_id']), json.dumps(job, ensure_ascii=False))
+        pipe.zadd(self._all_key, {job['job_id']: score})
+        pipe.zadd(self._status_key(job['status']), {job['job_id']: score})
+        if job['status'] == 'pending':
+            pipe.zadd(self._queue_key, {job['job_id']: self._queue_score(job)})
+
+    def _create_queued(self, job, max_depth):
+        """Store a new job unless max_depth jobs are pending (retried if the queue changes meanwhile)"""
+        if max_depth is None:
+            self.create(job)
+            return
+
+        def apply(pipe):
+            depth = pipe.zcard(self._queue_key)
+            if depth >= max_depth:
+                raise DepthExceeded(depth)
+            pipe.multi()
+            self._create(pipe, job)
+
+        self.client.transaction(apply, self._queue_key)
+
+    def find_active(self, lookup_key):
+        job_id = self.client.get(self._active_key(lookup_key))
+        if job_id is None:
+            return None
+        job = self.get(job_id.decode())
+        if job is None or job['status'] not in ACTIVE_STATUSES or _expired(job, _lease_cutoff(self.lease_seconds)):
+            return None
+        return job
+
+    def join(self, job, max_depth=None):
+        lookup_key = job.get('lookup_key')
+        if lookup_key is None:
+            self._create_queued(job, max_depth)
+            return job, True
+
+        active_key = self._active_key(lookup_key)
+        joined = {}
+
+        def apply(pipe):
+            joined['existing'] = None
+            job_id = pipe.get(active_key)
+            if job_id is not None:
+                # Also watched: a heartbeat may revive the job it points at
+                existing_key = self._job_key(job_id.decode())
+                pipe.watch(existing_key)
+                data = pipe.get(existing_key)
+                existing = json.loads(data) if data is not None else None
+                if (existing is not None and existing['status'] in ACTIVE_STATUSES
+                        and not _expired(existing, _lease_cutoff(self.lease_seconds))):
+                    joined['existing'] = existing
+                    return
+            if max_depth is not None:
+                depth = pipe.zcard(self._queue_key)
+                if depth >= max_depth:
+                    raise DepthExceeded(depth)
+
+            # No pointer, or a stale one (job finished, deleted or its lease
+            # expired): the job and its pointer are written together
+            pipe.multi()
+            self._create(pipe, job)
+            pipe.set(active_key, job['job_id'])
+
+        # Retried if the pointer, the job it points at or (with max_depth) the
+        # queue changes before EXEC: of several identical submissions exactly
+        # one creates a job, and the others join it
+        self.client.transaction(apply, active_key, *((self._queue_key,) if max_depth is not None else ()))
+        if joined['existing'] is not None:
+            return joined['existing'], False
+        return job, True
+
+    def get(self, job_id):
+        data = self.client.get(self._job_key(job_id))
+        return json.loads(data) if data is not None else None
+
+    def update(self, job_id, **fields):
+        return self._update(job_id, lambda job: fields)
+
+    def _update(self, job_id, change):
+        """
+        Change a job in one transaction
+
+        Args:
+            job_id: Job to change
+            change: Called with the stored job; returns the fields to set, or
+                None to leave the job as it is
+
+        Returns:
+            The job afterwards, or None if it does not exist
+        """
+        key = self._job_key(job_id)
+        updated = {}
+
+        def apply(pipe):
+            data = pipe.get(key)
+            if data is None:
+                updated['job'] = None
+                return
+
+            job = json.loads(data)
+            fields = change(job)
+            updated['job'] = job
+            if fields is None:
+                return
+            old_status = job['status']
+            job.update(fields)
+            lookup_key = job.get('lookup_key')
+            active = None
+            if lookup_key:
+                # Watched too, so the pointer is only dropped if it is still this job's
+                pipe.watch(self._active_key(lookup_key))
+                active = pipe.get(self._active_key(lookup_key))
+
+            pipe.multi()
+            pipe.set(key, json.dumps(job, ensure_ascii=False))
+            if job['status'] != old_status:
+                score = _timestamp(job['created_at'])
+                pipe.zrem(self._status_key(old_status), job_id)
+                pipe.zadd(self._status_key(job['status']), {job_id: score})
+            if job['status'] == 'pending':
+                # Also moves the job when its priority lane changed
+                pipe.zadd(self._queue_key, {job_id: self._queue_score(job)})
+            else:
+                pipe.zrem(self._queue_key, job_id)
+            if job['status'] not in ACTIVE_STATUSES and active == job_id.encode():
+                pipe.delete(self._active_key(lookup_key))
+            elif job['status'] in ACTIVE_STATUSES and lookup_key and active is None:
+                # An active job without a pointer: restore it
+                pipe.set(self._active_key(lookup_key), job_id, nx=True)
+
+        # Retried if another worker changes the job between GET and EXEC
+        self.client.transaction(apply, key)
+        return updated['job']
+
+    def delete(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return False
+
+        pipe = self.client.pipeline()
+        pipe.delete(self._job_key(job_id))
+        pipe.delete(self._results_key(job_id))
+        pipe.zrem(self._all_key, job_id)
+        pipe.zrem(self._status_key(job['status']), job_id)
+        pipe.zrem(self._queue_key, job_id)
+        deleted = pipe.execute()[0] > 0
+
+        # find_active() ignores a pointer to a deleted job, and join() replaces it
+        if job.get('lookup_key'):
+            self._drop_active(job['lookup_key'], job_id)
+        return deleted
+
+    def _drop_active(self, lookup_key, job_id):
+        """Delete a lookup's active pointer if it still points at job_id"""
+        active_key = self._active_key(lookup_key)
+
+        def apply(pipe):
+            if pipe.get(active_key) == job_id.encode():
+                pipe.multi()
+                pipe.delete(active_key)
+
+        self.client.transaction(apply, active_key)
+
+    def append_results(self, job_id, results):
+        if results:
+            self.client.rpush(self._results_key(job_id), *(json.dumps(result, ensure_ascii=False) for result in results))
+
+    def get_results(self, job_id, offset=0):
+        return [json.loads(data) for data in self.client.lrange(self._results_key(job_id), offset, -1)]
+
+    def list(self, status=None, limit=10, cursor=None):
+        index = self._status_key(status) if status else self._all_key
+        total = self.client.zcard(index)
+        if limit <= 0:
+            return total, [], None
+
+        # One extra member tells whether there is a next page
+        if cursor is None:
+            job_ids = self.client.zrevrange(index, 0, limit)
+        else:
+            created_at, last_id = parse_cursor(cursor)
+            rank = self.client.zrevrank(index, last_id)
+            if rank is not None:
+                job_ids = self.client.zrevrange(index, rank + 1, rank + limit + 1)
+            else:
+                # The cursor job left this index (status change, deletion): seek past
+                # (score, job_id) like SQLite's row value comparison. Members with equal
+                # scores are ordered by job_id, so ties with a lower job_id come next.
+                score = _timestamp(created_at)
+                ties = [job_id for job_id in reversed(self.client.zrangebyscore(index, score, score))
+                        if job_id < last_id.encode()]
+                older = self.client.zrevrangebyscore(
+                    index, f'({score}', '-inf', start=0, num=limit + 1 - len(ties)
+                ) if len(ties) <= limit else []
+                job_ids = (ties + older)[:limit + 1]
+
+        data = self.client.mget([self._job_key(job_id.decode()) for job_id in job_ids[:limit]]) if job_ids else []
+        page = [json.loads(d) for d in data if d is not None]
+        return total, page, (make_cursor(page[-1]) if page and len(job_ids) > limit else None)
+
+    def counts(self):
+        pipe = self.client.pipeline()
+        for status in STATUSES:
+            pipe.zcard(self._status_key(status))
+        return dict(zip(STATUSES, pipe.execute()))
+
+    def evict(self, before=None, keep=None):
+        job_ids = set()
+        if before is not None:
+            cutoff = _timestamp(before)
+            for status in FINISHED_STATUSES:
+                job_ids.update(self.client.zrangebyscore(self._status_key(status), '-inf', f'({cutoff}'))
+        if keep is not None:
+            excess = sum(self.client.zcard(self._status_key(status)) for status in FINISHED_STATUSES) - keep
+            if excess > 0:
+                # The oldest `excess` of each set include the oldest `excess` overall
+                oldest = heapq.merge(
+                    *(self.client.zrange(self._status_key(status), 0, excess - 1, withscores=True)
+                      for status in FINISHED_STATUSES),
+                    key=lambda member: member[1],
+                )
+                job_ids.update(job_id for job_id, _ in itertools.islice(oldest, excess))
+        return sum(1 for job_id in job_ids if self.delete(job_id.decode()))
+
+    def claim(self, max_priority=None):
+        # Popping the job and marking it running in one transaction on the
+        # watched queue hands each job to exactly one worker, even across nodes,
+        # and a worker dying mid-claim cannot leave a pending job off the queue
+        claimed = {}
+
+        def apply(pipe):
+            claimed.clear()
+            if max_priority is None:
+                first = pipe.zrange(self._queue_key, 0, 0)
+            else:
+                # Lanes start at priority * 1e11 (see _queue_score)
+                first = pipe.zrangebyscore(
+                    self._queue_key, '-inf', f'({(max_priority + 1) * 1e11}', start=0, num=1
+                )
+            if not first:
+                return
+            job_id = first[0].decode()
+            key = self._job_key(job_id)
+            pipe.watch(key)
+            data = pipe.get(key)
+            job = json.loads(data) if data is not None else None
+
+            pipe.multi()
+            pipe.zrem(self._queue_key, job_id)
+            if job is None or job['status'] != 'pending':
+                claimed['stale'] = True  # Dropped from the queue; try the next job
+                return
+            job.update(_claim_fields(job))
+            pipe.set(key, json.dumps(job, ensure_ascii=False))
+            pipe.zrem(self._status_key('pending'), job_id)
+            pipe.zadd(self._status_key('running'), {job_id: _timestamp(job['created_at'])})
+            claimed['job'] = job
+
+        while True:
+            # Retried if another worker claims or changes the job before EXEC
+            self.client.transaction(apply, self._queue_key)
+            if not claimed.get('stale'):
+                return claimed.get('job')
+
+    def heartbeat(self, job_id):
+        job = self._update(job_id, lambda job: {'heartbeat_at': _now()} if job['status'] == 'running' else None)
+        return job is not None and job['status'] == 'running'
+
+    def recover(self, max_attempts=MAX_ATTEMPTS):
+        cutoff = _lease_cutoff(self.lease_seconds)
+        recovered = {'pending': 0, 'failed': 0}
+        for job_id in self.client.zrange(self._status_key('running'), 0, -1):
+            job_id = job_id.decode()
+
+            def change(job):
+                # Re-checked in the transaction: the worker may have renewed the lease
+                if not _expired(job, cutoff):
+                    return None
+                lookup_key = job.get('lookup_key')
+                active = self.client.get(self._active_key(lookup_key)) if lookup_key else None
+                superseded = active is not None and active != job_id.encode()
+                return _recovery_fields(job, superseded, max_attempts)
+
+            job = self._update(job_id, change)
+            if job is not None and job['status'] != 'running':
+                recovered[job['status']] += 1
+        return recovered['pending'], recovered['failed']
+
+    def queue_position(self, job_id):
+        rank = self.client.zrank(self._queue_key, job_id)
+        return rank + 1 if rank is not None else None
+
+    def queue_depth(self):
+        return self.client.zcard(self._queue_key)
+
+    def incr(self, name, amount=1):
+        self.client.hincrby(self._counters_key, name, amount)
+
+    def counters(self):
+        return {name.decode(): int(value) for name, value in self.client.hgetall(self._counters_key).items()}
+
+    def close(self):
+        self.client.close()
+
+
+def open_job_store(url, lease_seconds=LEASE_SECONDS):
+    """
+    Open a job store from a URL
+
+    Args:
+        url: memory://, sqlite:///<path> or redis://... (see module docstring)
+        lease_seconds: Seconds a running job stays leased without a heartbeat
+
+    Returns:
+        JobStore
+    """
+    scheme = urlparse(url).scheme
+    if scheme == 'memory':
+        return MemoryJobStore(lease_seconds=lease_seconds)
+    if scheme == 'sqlite':
+        # sqlite:///jobs.db -> jobs.db, sqlite:////app/data/jobs.db -> /app/data/jobs.db
+        return SqliteJobStore(url[len('sqlite:///'):] or ':memory:', lease_seconds=lease_seconds)
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisJobStore(url, lease_seconds=lease_seconds)
+    raise ValueError(f"Unsupported job store URL: {url}")
@@ -0,0 +1,201 @@
+"""
+Result Cache
+
+Users re-check the same plates many times a day; each check is a full page,
+captcha, OCR, POST and results round trip. Successful lookup results are
+cached by lookup key (normalized plate + canonical vehicle type) so repeat
+checks within the TTL are answered without touching the site.
+
+The in-memory layer is an LRU bounded by entry count and by the size of the
+serialized results. It can be backed by an on-disk store (RESULT_CACHE_URL):
+
+    memory://                       this process only
+    sqlite:///results.db            local file shared by all workers, survives restarts
+    sqlite:////app/data/results.db  same, absolute path
+
+Memory misses fall through to the disk store, and disk hits are promoted into
+memory. Expired entries are dropped on read and pruned from disk on write.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlparse
+
+
+class ResultCache:
+    """TTL + LRU cache of lookup results, optionally backed by SQLite"""
+
+    def __init__(self, ttl=3600, max_entries=10000, max_bytes=64 * 1024 * 1024, path=None):
+        """
+        Initialize cache
+
+        Args:
+            ttl: Seconds a result stays valid (0 disables the cache)
+            max_entries: Maximum results kept in memory
+            max_bytes: Maximum total size of the serialized results kept in memory
+            path: SQLite file backing the cache, or None for memory only
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = str(path) if path else None
+
+        # key -> (stored_at epoch seconds, serialized result)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        if self.path:
+            if self.path != ':memory:':
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connection()
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' key TEXT PRIMARY KEY,'
+                ' stored_at REAL NOT NULL,'
+                ' data TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS results_stored_at ON results (stored_at)')
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _connection(self):
+        """Connection of the calling thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, max_age=None):
+        """
+        Look up a cached result
+
+        Args:
+            key: Lookup key
+            max_age: Only accept results at most this many seconds old
+                (capped at the TTL; None means the TTL)
+
+        Returns:
+            Tuple of (result dict, age in seconds), or None on a miss
+        """
+        if not self.enabled:
+            return None
+        max_age = self.ttl if max_age is None else min(max_age, self.ttl)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] > self.ttl:
+                    self._remove(key)
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+
+        if entry is None and self.path:
+            row = self._connection().execute(
+                'SELECT stored_at, data FROM results WHERE key = ? AND stored_at >= ?',
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is not None:
+                entry = row
+                with self._lock:
+                    self._insert(key, entry)
+
+        if entry is None:
+            return None
+        stored_at, data = entry
+        age = max(0.0, now - stored_at)
+        if age > max_age:
+            return None
+        return json.loads(data), age
+
+    def put(self, key, result):
+        """Cache a result under a lookup key"""
+        if not self.enabled:
+            return
+        entry = (time.time(), json.dumps(result, ensure_ascii=False))
+        with self._lock:
+            self._insert(key, entry)
+
+        if self.path:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO results (key, stored_at, data) VALUES (?, ?, ?)', (key, *entry))
+            conn.execute('DELETE FROM results WHERE stored_at < ?', (entry[0] - self.ttl,))
+
+    def invalidate(self, key):
+        """Drop a cached result"""
+        with self._lock:
+            self._remove(key)
+        if self.path:
+            self._connection().execute('DELETE FROM results WHERE key = ?', (key,))
+
+    def stats(self):
+        """Entries and serialized bytes held in memory by this process"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+            }
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _insert(self, key, entry):
+        """Add an entry as most recently used and evict down to the bounds (lock held)"""
+        size = len(entry[1])
+        if size > self.max_bytes:
+            # Larger than the whole budget: only the disk store keeps it
+            self._remove(key)
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, data) = self._entries.popitem(last=False)
+            self._bytes -= len(data)
+
+    def _remove(self, key):
+        """Drop an entry from memory (lock held)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+def open_result_cache(url, ttl=3600, max_entries=10000, max_bytes=64 * 1024 * 1024):
+    """
+    Open a result cache from a URL
+
+    Args:
+        url: memory:// or sqlite:///<path> (see module docstring)
+        ttl: Seconds a result stays valid (0 disables the cache)
+        max_entries: Maximum results kept in memory
+        max_bytes: Maximum total size of the serialized results kept in memory
+
+    Returns:
+        ResultCache
+    """
+    scheme = urlparse(url).scheme
+    if scheme == 'memory':
+        return ResultCache(ttl, max_entries, max_bytes)
+    if scheme == 'sqlite':
+        # sqlite:///results.db -> results.db, sqlite:////app/data/results.db -> /app/data/results.db
+        return ResultCache(ttl, max_entries, max_bytes, path=url[len('sqlite:///'):] or ':memory:')
+    raise ValueError(f"Unsupported result cache URL: {url}")
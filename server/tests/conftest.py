@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The server modules (job_store, job_queue, ...) live in the project root
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,79 @@
+"""
+Job queue workers
+
+Jobs run on a MemoryJobStore; the handler records them instead of scraping.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+from job_queue import JobQueue
+from job_store import MemoryJobStore
+
+
+def make_job(job_id):
+    return {'job_id': job_id, 'status': 'pending', 'created_at': datetime.now().isoformat()}
+
+
+def test_interactive_job_runs_while_batches_are_in_flight():
+    async def run():
+        store = MemoryJobStore()
+        release = asyncio.Event()
+        started, finished = [], asyncio.Event()
+
+        async def handler(job):
+            started.append(job['job_id'])
+            if job['lane'] == 'batch':
+                await release.wait()
+            else:
+                finished.set()
+
+        queue = JobQueue(store, handler, workers=2, poll_interval=0.05)
+        await queue.start()
+        try:
+            await queue.submit(make_job('batch-1'), lane='batch')
+            await queue.submit(make_job('batch-2'), lane='batch')
+            await asyncio.sleep(0.2)
+            # One worker stays free for interactive jobs
+            assert started == ['batch-1']
+
+            await queue.submit(make_job('lookup'), lane='interactive')
+            await asyncio.wait_for(finished.wait(), 5)
+            assert store.get('batch-2')['status'] == 'pending'
+
+            release.set()
+            for _ in range(50):
+                if len(started) == 3:
+                    break
+                await asyncio.sleep(0.05)
+            assert started == ['batch-1', 'lookup', 'batch-2']
+        finally:
+            await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_store_calls_leave_the_loop_free():
+    """A store call waiting on a lock (here: sleeping) does not stall other coroutines"""
+    class SlowStore(MemoryJobStore):
+        def join(self, job, max_depth=None):
+            time.sleep(0.3)
+            return super().join(job, max_depth)
+
+    async def run():
+        queue = JobQueue(SlowStore(), handler=None)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await queue.submit(make_job('lookup'))
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 10
@@ -0,0 +1,345 @@
+"""
+Job store backends
+
+One suite, run against every backend: memory://, SQLite and Redis (on
+fakeredis, skipped if it is not installed).
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import job_store
+from job_store import DepthExceeded, MemoryJobStore, RedisJobStore, SqliteJobStore
+
+CREATED_AT = '2025-10-15T14:30:00'
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        store = MemoryJobStore()
+    elif request.param == 'sqlite':
+        store = SqliteJobStore(tmp_path / 'jobs.db')
+    else:
+        fakeredis = pytest.importorskip('fakeredis')
+        store = RedisJobStore('redis://', client=fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+    yield store
+    store.close()
+
+
+def make_job(job_id, created_at=CREATED_AT, status='pending', **fields):
+    return {'job_id': job_id, 'status': status, 'created_at': created_at, **fields}
+
+
+def at(seconds):
+    """created_at some seconds after CREATED_AT"""
+    return (datetime.fromisoformat(CREATED_AT) + timedelta(seconds=seconds)).isoformat()
+
+
+def list_all(store, status=None, limit=2):
+    """Every job, following the cursors"""
+    job_ids, cursor = [], None
+    while True:
+        _, page, cursor = store.list(status=status, limit=limit, cursor=cursor)
+        job_ids.extend(job['job_id'] for job in page)
+        if cursor is None:
+            return job_ids
+
+
+def test_create_get_update_delete(store):
+    store.create(make_job('a', license_plate='59C136047'))
+    assert store.get('a')['license_plate'] == '59C136047'
+
+    job = store.update('a', status='completed', result={'status': 'success'})
+    assert job['status'] == 'completed'
+    assert store.get('a')['result'] == {'status': 'success'}
+    assert store.update('missing', status='failed') is None
+
+    assert store.delete('a')
+    assert not store.delete('a')
+    assert store.get('a') is None
+
+
+def test_get_json(store):
+    store.create(make_job('a', license_plate='59C136047'))
+    assert store.get_json('missing') is None
+    assert json.loads(store.get_json('a', queue_position=1))['queue_position'] == 1
+
+    result = {'status': 'success', 'data': {'violations': [{'violation_location': 'Đường Láng'}]}}
+    store.update('a', status='completed', result=result, progress=None)
+    body = json.loads(store.get_json('a'))
+    assert body['result'] == result
+    assert body['progress'] is None
+
+
+def test_list_newest_first(store):
+    for i in range(5):
+        store.create(make_job(f'j{i}', created_at=at(i)))
+
+    total, page, cursor = store.list(limit=2)
+    assert total == 5
+    assert [job['job_id'] for job in page] == ['j4', 'j3']
+    assert cursor is not None
+    assert list_all(store) == ['j4', 'j3', 'j2', 'j1', 'j0']
+
+
+def test_list_cursor_ties(store):
+    # Same created_at: job_id breaks the tie, no job is skipped or repeated
+    for job_id in ('a', 'b', 'c', 'd', 'e'):
+        store.create(make_job(job_id))
+    store.create(make_job('older', created_at=at(-1)))
+
+    assert list_all(store, limit=2) == ['e', 'd', 'c', 'b', 'a', 'older']
+    assert list_all(store, limit=1) == ['e', 'd', 'c', 'b', 'a', 'older']
+
+
+def test_list_cursor_job_left_index(store):
+    for job_id in ('a', 'b', 'c', 'd', 'e'):
+        store.create(make_job(job_id))
+    store.create(make_job('older', created_at=at(-1)))
+
+    _, page, cursor = store.list(status='pending', limit=2)
+    assert [job['job_id'] for job in page] == ['e', 'd']
+
+    # The cursor job is no longer pending: the next page still starts right after it
+    store.update('d', status='running')
+    _, page, cursor = store.list(status='pending', limit=3, cursor=cursor)
+    assert [job['job_id'] for job in page] == ['c', 'b', 'a']
+    _, page, cursor = store.list(status='pending', limit=3, cursor=cursor)
+    assert [job['job_id'] for job in page] == ['older']
+    assert cursor is None
+
+
+def test_list_by_status(store):
+    store.create(make_job('a', created_at=at(0)))
+    store.create(make_job('b', created_at=at(1), status='completed'))
+    store.create(make_job('c', created_at=at(2)))
+
+    total, page, cursor = store.list(status='pending', limit=10)
+    assert total == 2
+    assert [job['job_id'] for job in page] == ['c', 'a']
+    assert cursor is None
+
+
+@pytest.mark.parametrize('cursor', ['garbage', 'a|', f'{CREATED_AT}|', 'not-a-date|a'])
+def test_list_rejects_bad_cursor(store, cursor):
+    with pytest.raises(ValueError):
+        store.list(cursor=cursor)
+
+
+def test_counts(store):
+    assert store.counts() == {'pending': 0, 'running': 0, 'completed': 0, 'failed': 0}
+    store.create(make_job('a'))
+    store.create(make_job('b'))
+    store.create(make_job('c', status='completed'))
+    store.update('a', status='running')
+    store.update('a', status='failed')
+    store.delete('b')
+
+    assert store.counts() == {'pending': 0, 'running': 0, 'completed': 1, 'failed': 1}
+    assert store.queue_depth() == 0
+
+
+def test_claim_order(store):
+    store.create(make_job('batch', created_at=at(0), priority=1))
+    store.create(make_job('old', created_at=at(1), priority=0))
+    store.create(make_job('new', created_at=at(2), priority=0))
+    assert store.queue_position('old') == 1
+    assert store.queue_position('batch') == 3
+
+    claimed = [store.claim()['job_id'] for _ in range(3)]
+    assert claimed == ['old', 'new', 'batch']
+    assert store.claim() is None
+    assert store.queue_position('old') is None
+    assert store.counts()['running'] == 3
+
+
+def test_claim_max_priority(store):
+    store.create(make_job('batch', created_at=at(0), priority=1))
+    store.create(make_job('interactive', created_at=at(1), priority=0))
+    assert store.claim(max_priority=0)['job_id'] == 'interactive'
+    assert store.claim(max_priority=0) is None
+    assert store.claim()['job_id'] == 'batch'
+
+
+def test_claim_leases_job(store):
+    store.create(make_job('a'))
+    job = store.claim()
+    assert job['status'] == 'running'
+    assert job['attempts'] == 1
+    assert job['claimed_at'] and job['heartbeat_at']
+    assert store.get('a')['heartbeat_at'] == job['heartbeat_at']
+
+    assert store.heartbeat('a')
+    store.update('a', status='completed')
+    assert not store.heartbeat('a')
+    assert not store.heartbeat('missing')
+
+
+def test_join_coalesces(store):
+    job, created = store.join(make_job('a', lookup_key='K'))
+    assert created and job['job_id'] == 'a'
+
+    job, created = store.join(make_job('b', lookup_key='K'))
+    assert not created and job['job_id'] == 'a'
+    assert store.get('b') is None
+
+    # Still coalesced while running
+    store.claim()
+    assert store.find_active('K')['job_id'] == 'a'
+    assert store.join(make_job('c', lookup_key='K'))[0]['job_id'] == 'a'
+
+    # Not once it finished
+    store.update('a', status='completed')
+    assert store.find_active('K') is None
+    job, created = store.join(make_job('d', lookup_key='K'))
+    assert created and job['job_id'] == 'd'
+
+
+def test_redis_join_interleaved():
+    """A second join between the first one's read and write: one job, joined by the other"""
+    fakeredis = pytest.importorskip('fakeredis')
+    store = RedisJobStore('redis://', client=fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+    create, nested = store._create, []
+
+    def interleave(pipe, job):
+        if not nested:
+            nested.append(None)
+            nested[0] = store.join(make_job('b', lookup_key='30A12345:oto'))
+        create(pipe, job)
+
+    store._create = interleave
+    job, created = store.join(make_job('a', lookup_key='30A12345:oto'))
+    assert (nested[0][0]['job_id'], nested[0][1]) == ('b', True)
+    assert (job['job_id'], created) == ('b', False)
+    assert store.counts()['pending'] == 1
+    assert store.get('a') is None
+    store.close()
+
+
+def test_redis_claim_interleaved(monkeypatch):
+    """A worker dying mid-claim leaves the job queued; racing claims get one job each"""
+    fakeredis = pytest.importorskip('fakeredis')
+    store = RedisJobStore('redis://', client=fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+    store.create(make_job('a', created_at=at(0)))
+    store.create(make_job('b', created_at=at(1)))
+    claim_fields, nested = job_store._claim_fields, []
+
+    def die(job):
+        raise RuntimeError('worker lost')
+
+    monkeypatch.setattr(job_store, '_claim_fields', die)
+    with pytest.raises(RuntimeError):
+        store.claim()
+    assert store.queue_position('a') == 1
+    assert store.get('a')['status'] == 'pending'
+
+    def interleave(job):
+        if not nested:
+            nested.append(None)
+            nested[0] = store.claim()
+        return claim_fields(job)
+
+    monkeypatch.setattr(job_store, '_claim_fields', interleave)
+    job = store.claim()
+    assert (nested[0]['job_id'], job['job_id']) == ('a', 'b')
+    assert store.get('a')['attempts'] == store.get('b')['attempts'] == 1
+    assert store.queue_depth() == 0
+    assert store.counts()['running'] == 2
+    store.close()
+
+
+def test_join_max_depth(store):
+    store.join(make_job('a', lookup_key='A'), max_depth=2)
+    store.join(make_job('b', lookup_key='B'), max_depth=2)
+
+    with pytest.raises(DepthExceeded) as raised:
+        store.join(make_job('c', lookup_key='C'), max_depth=2)
+    assert raised.value.depth == 2
+    assert store.get('c') is None
+    assert store.find_active('C') is None
+
+    # Joining an existing job adds no work, so it is allowed when full
+    assert store.join(make_job('d', lookup_key='A'), max_depth=2)[0]['job_id'] == 'a'
+
+
+def test_expired_lease(store):
+    store.join(make_job('a', lookup_key='K'))
+    store.claim()
+    store.update('a', heartbeat_at=at(-3600))
+
+    # Nobody is running the job: identical lookups get a new one
+    assert store.find_active('K') is None
+    job, created = store.join(make_job('b', lookup_key='K'))
+    assert created and job['job_id'] == 'b'
+
+    # The expired job was taken over, so it fails instead of running again
+    assert store.recover() == (0, 1)
+    assert store.get('a')['status'] == 'failed'
+    assert store.find_active('K')['job_id'] == 'b'
+
+
+def test_recover_requeues_then_fails(store):
+    store.create(make_job('a', lookup_key='K'))
+    for attempt in (1, 2, 3):
+        job = store.claim()
+        assert job['job_id'] == 'a' and job['attempts'] == attempt
+        # A live lease is left alone
+        assert store.recover() == (0, 0)
+        store.update('a', heartbeat_at=at(-3600))
+        assert store.recover(max_attempts=3) == ((1, 0) if attempt < 3 else (0, 1))
+
+    job = store.get('a')
+    assert job['status'] == 'failed' and job['error']
+    assert store.counts()['running'] == 0
+
+
+def test_evict(store):
+    store.create(make_job('old', created_at=at(0), status='completed'))
+    store.create(make_job('mid', created_at=at(10), status='failed'))
+    store.create(make_job('new', created_at=at(20), status='completed'))
+    store.create(make_job('active', created_at=at(0)))
+
+    assert store.evict(before=at(5)) == 1
+    assert store.get('old') is None
+    assert store.evict(keep=1) == 1
+    assert store.get('mid') is None
+    assert store.get('new') is not None
+    # Active jobs are never evicted
+    assert store.evict(before=at(100), keep=0) == 1
+    assert store.get('active') is not None
+    assert store.counts()['completed'] == 0
+
+
+def test_results_append_only(store):
+    store.create(make_job('batch', kind='batch'))
+    assert store.get_results('batch') == []
+
+    store.append_results('batch', [{'index': 0}, {'index': 2}])
+    store.append_results('batch', [])
+    store.append_results('batch', [{'index': 1, 'plate': 'Đường'}])
+    assert store.get_results('batch') == [{'index': 0}, {'index': 2}, {'index': 1, 'plate': 'Đường'}]
+    assert store.get_results('batch', 2) == [{'index': 1, 'plate': 'Đường'}]
+    assert store.get_results('batch', 3) == []
+    # Results are not part of the job
+    assert 'results' not in store.get('batch')
+
+
+def test_results_deleted_with_job(store):
+    store.create(make_job('a', status='completed'))
+    store.create(make_job('b', status='completed', created_at=at(10)))
+    store.append_results('a', [{'index': 0}])
+    store.append_results('b', [{'index': 0}])
+
+    store.delete('a')
+    assert store.get_results('a') == []
+    store.evict(keep=0)
+    assert store.get_results('b') == []
+
+
+def test_counters(store):
+    store.incr('jobs/submitted')
+    store.incr('jobs/submitted', 2)
+    assert store.counters() == {'jobs/submitted': 3}
@@ -0,0 +1,126 @@
+"""
+Violation normalization
+
+Display text as the results page shows it -> typed values.
+"""
+
+import unicodedata
+from datetime import datetime, timezone
+
+import pytest
+
+from csgt_scraper.utils.normalize import (
+    Violation,
+    canonical_plate,
+    normalize_violation,
+    parse_amount,
+    parse_violation_time,
+    payment_state,
+)
+
+
+def utc(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('16:39, 01/10/2025', utc(2025, 10, 1, 9, 39)),
+    ('01/10/2025 16:39:05', utc(2025, 10, 1, 9, 39, 5)),
+    ('Lúc 7:05 ngày 1/2/2025', utc(2025, 2, 1, 0, 5)),
+    # Vietnam is UTC+7: early morning is the day before in UTC
+    ('03:00, 01/01/2025', utc(2024, 12, 31, 20, 0)),
+    ('01/10/2025', utc(2025, 9, 30, 17, 0)),
+    ('16:39', None),
+    ('31/02/2025 10:00', None),
+    ('', None),
+    (None, None),
+])
+def test_parse_violation_time(text, expected):
+    assert parse_violation_time(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('800.000 đ', 800000),
+    ('800,000 VND', 800000),
+    ('1.200.000đ', 1200000),
+    ('Không có', None),
+    ('', None),
+    (None, None),
+])
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Chưa xử phạt', 'unpaid'),
+    ('  CHƯA XỬ PHẠT ', 'unpaid'),
+    ('Đã xử phạt', 'paid'),
+    ('đã nộp phạt', 'paid'),
+    (unicodedata.normalize('NFD', 'Đã xử phạt'), 'paid'),
+    ('Đang xử lý', 'unknown'),
+    ('', 'unknown'),
+    (None, 'unknown'),
+])
+def test_payment_state(text, expected):
+    assert payment_state(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('59C1-360.47', '59C136047'),
+    ('59c1 36047', '59C136047'),
+    ('30A12345', '30A12345'),
+    ('', ''),
+    (None, ''),
+])
+def test_canonical_plate(text, expected):
+    assert canonical_plate(text) == expected
+
+
+def test_violation_from_details_missing_fields():
+    """Missing values are '' and 0, never None"""
+    record = Violation.from_details({'license_plate': '30A-123.45'})
+    assert record == Violation(0, '30A12345', 'unknown', 0, '', '', '', '', '', '')
+    assert sorted([record, Violation.from_details({})])
+
+
+def test_violation_id_ignores_formatting_and_payment():
+    unpaid = {
+        'license_plate': '30A-123.45',
+        'violation_time': '16:39, 01/10/2025',
+        'violation_behavior': 'Chạy quá tốc độ quy định',
+        'violation_location': 'Đường Láng, Hà Nội',
+        'payment_status': 'Chưa xử phạt',
+        'fine_amount': '800.000 đ',
+    }
+    paid = dict(unpaid, license_plate='30A12345', violation_time='01/10/2025 16:39:00', payment_status='Đã xử phạt')
+    assert Violation.from_details(unpaid).id == Violation.from_details(paid).id
+    other = dict(unpaid, violation_location='Đường Trường Chinh, Hà Nội')
+    assert Violation.from_details(unpaid).id != Violation.from_details(other).id
+
+
+def test_normalize_violation():
+    violation = {
+        'license_plate': '59C1-360.47',
+        'violation_time': '16:39, 01/10/2025',
+        'payment_status': 'Chưa xử phạt',
+        'fine_amount': '800.000 đ',
+    }
+    normalized = normalize_violation(violation)
+    assert normalized == {
+        **violation,
+        'id': Violation.from_details(violation).id,
+        'plate': '59C136047',
+        'violation_ts': utc(2025, 10, 1, 9, 39),
+        'payment_state': 'unpaid',
+        'fine_vnd': 800000,
+    }
+    assert 'id' not in violation
+
+
+def test_normalize_violation_missing_fields():
+    """Without a time or fine, violation_ts is None and fine_vnd is left out"""
+    normalized = normalize_violation({'license_plate': '30A12345'})
+    assert normalized['violation_ts'] is None
+    assert normalized['payment_state'] == 'unknown'
+    assert 'fine_vnd' not in normalized
+    assert len(normalized['id']) == 16
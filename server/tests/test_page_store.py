@@ -0,0 +1,72 @@
+"""
+Raw page store
+
+Run with each codec (zstd skipped if the zstandard package is not installed).
+"""
+
+import hashlib
+import os
+import time
+
+import pytest
+
+from csgt_scraper.utils.page_store import PageStore, decompress
+
+PAGE = '<html><body><p>Biển kiểm soát: 30A12345</p></body></html>'.encode('utf-8')
+
+
+@pytest.fixture(params=['gzip', 'zstd'])
+def store(request, tmp_path):
+    if request.param == 'zstd':
+        pytest.importorskip('zstandard')
+    return PageStore(tmp_path / 'pages', codec=request.param)
+
+
+def test_round_trip(store):
+    digest, size = store.put(PAGE)
+    assert digest == hashlib.sha256(PAGE).hexdigest()
+    assert size == len(PAGE)
+    assert store.get(digest) == PAGE
+
+    blob, codec = store.read(digest)
+    assert codec == store.codec
+    assert decompress(blob, codec) == PAGE
+    assert store.find(digest)[0].parent.name == digest[:2]
+
+
+def test_str_stored_as_utf8(store):
+    digest, size = store.put(PAGE.decode('utf-8'))
+    assert (digest, size) == (hashlib.sha256(PAGE).hexdigest(), len(PAGE))
+    assert store.get(digest) == PAGE
+
+
+def test_same_page_stored_once(store):
+    digest, _ = store.put(PAGE)
+    path, _ = store.find(digest)
+    os.utime(path, (time.time() - 3600,) * 2)
+    written = path.stat().st_ino
+
+    assert store.put(PAGE) == (digest, len(PAGE))
+    assert path.stat().st_ino == written
+    # Seen again: no longer due for pruning
+    assert path.stat().st_mtime > time.time() - 60
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+def test_missing_page(store):
+    missing = hashlib.sha256(b'never stored').hexdigest()
+    assert store.find(missing) is None
+    assert store.read(missing) is None
+    assert store.get(missing) is None
+    # Not a hash: no path is built from it
+    assert store.get('../../etc/passwd') is None
+
+
+def test_prune(store):
+    old, _ = store.put(b'old page')
+    new, _ = store.put(b'new page')
+    os.utime(store.find(old)[0], (time.time() - 3600,) * 2)
+
+    assert store.prune(time.time() - 60) == 1
+    assert store.get(old) is None
+    assert store.get(new) == b'new page'
@@ -0,0 +1,187 @@
+"""
+Results page parser
+
+Pages are small HTML fixtures in the layout of a CSGT results page, parsed
+the way the spider parses them (response.selector.root).
+"""
+
+import unicodedata
+
+import pytest
+from scrapy.selector import Selector
+
+from csgt_scraper.utils.results_parser import (
+    ALL_TEXT,
+    SPAN_TEXT,
+    TEXT,
+    extract_page_links,
+    extract_violations,
+    field_for_label,
+    is_no_results,
+)
+
+
+def field(label, value):
+    return (
+        '<div class="form-group">'
+        f'<label class="col-md-3"><span>{label}</span></label>'
+        f'<div class="col-md-9">{value}</div>'
+        '</div>'
+    )
+
+
+def page(*blocks):
+    return Selector(text=f'<html><body><div class="container">{"".join(blocks)}</div></body></html>').root
+
+
+@pytest.mark.parametrize('label, expected', [
+    ('Biển kiểm soát:', ('license_plate', TEXT)),
+    ('  BIỂN   KIỂM SOÁT :  ', ('license_plate', TEXT)),
+    ('Thời gian vi phạm (ngày/giờ):', ('violation_time', TEXT)),
+    ('Trạng thái: ', ('payment_status', SPAN_TEXT)),
+    ('Nơi giải quyết vụ việc', ('resolution_location', ALL_TEXT)),
+    ('Số tiền phạt (VNĐ):', ('fine_amount', TEXT)),
+    # Prefix matches stop at word boundaries
+    ('Màu biển số xe:', ('vehicle_color', TEXT)),
+    ('Trạng thái xử lý:', ('payment_status', SPAN_TEXT)),
+    ('Biển kiểm soátx:', None),
+    ('Ghi chú:', None),
+])
+def test_field_for_label(label, expected):
+    assert field_for_label(label) == expected
+
+
+def test_field_for_label_decomposed_unicode():
+    """Labels in NFD (combining accents) match the NFC keys"""
+    assert field_for_label(unicodedata.normalize('NFD', 'Địa điểm vi phạm:')) == ('violation_location', TEXT)
+
+
+def test_extract_violation():
+    root = page(
+        field('Biển kiểm soát:', '30A12345'),
+        field('Màu biển:', 'Nền mầu trắng, chữ và số màu đen'),
+        field('Thời gian vi phạm (ngày/giờ):', '14:30, 15/10/2025'),
+        field('Địa điểm vi phạm:', 'Đường Láng, Hà Nội'),
+        field('Trạng thái:', '<span class="badge">Chưa xử phạt</span>'),
+        field('Nơi giải quyết vụ việc:', '<p>1. Đội CSGT số 6</p><p>Địa chỉ: <b>Số 2</b> Nguyễn Trãi</p>'),
+        '<hr>',
+    )
+    assert extract_violations(root) == [{
+        'license_plate': '30A12345',
+        'vehicle_color': 'Nền mầu trắng, chữ và số màu đen',
+        'violation_time': '14:30, 15/10/2025',
+        'violation_location': 'Đường Láng, Hà Nội',
+        'payment_status': 'Chưa xử phạt',
+        'resolution_location': '1. Đội CSGT số 6 Địa chỉ: Số 2 Nguyễn Trãi',
+    }]
+
+
+def test_extract_violation_missing_optional_fields():
+    """Absent fields and fields with an empty value are left out of the violation"""
+    root = page(
+        field('Biển kiểm soát:', '30A12345'),
+        field('Hành vi vi phạm:', ''),
+        field('Mức phạt:', '   '),
+        field('Ghi chú:', 'Không liên quan'),
+        field('Trạng thái:', 'Đã xử phạt'),
+    )
+    assert extract_violations(root) == [{'license_plate': '30A12345', 'payment_status': 'Đã xử phạt'}]
+
+
+def test_extract_violations_split_by_hr():
+    """Each <hr> ends a violation; a trailing one adds no empty violation"""
+    root = page(
+        field('Biển kiểm soát:', '30A12345'),
+        field('Hành vi vi phạm:', 'Chạy quá tốc độ quy định'),
+        '<hr>',
+        field('Biển kiểm soát:', '30A12345'),
+        field('Hành vi vi phạm:', 'Không chấp hành hiệu lệnh của đèn tín hiệu giao thông'),
+        field('Mức phạt:', '4.000.000 đ'),
+        '<hr>',
+        # Only fields the previous violation lacked: the <hr> alone separates them
+        field('Trạng thái:', '<span>Đã xử phạt</span>'),
+        '<hr>',
+    )
+    assert extract_violations(root) == [
+        {'license_plate': '30A12345', 'violation_behavior': 'Chạy quá tốc độ quy định'},
+        {
+            'license_plate': '30A12345',
+            'violation_behavior': 'Không chấp hành hiệu lệnh của đèn tín hiệu giao thông',
+            'fine_amount': '4.000.000 đ',
+        },
+        {'payment_status': 'Đã xử phạt'},
+    ]
+
+
+def test_extract_violations_without_separator():
+    """A label repeating a field of the current violation starts the next one"""
+    root = page(
+        field('Biển kiểm soát:', '30A12345'),
+        field('Mức phạt:', '800.000 đ'),
+        field('Biển kiểm soát:', '30A12345'),
+        field('Mức phạt:', '1.200.000 đ'),
+        '<hr><hr>',
+    )
+    assert extract_violations(root) == [
+        {'license_plate': '30A12345', 'fine_amount': '800.000 đ'},
+        {'license_plate': '30A12345', 'fine_amount': '1.200.000 đ'},
+    ]
+
+
+def test_no_results_page():
+    html = (
+        '<html><body><div class="container">'
+        '<p class="text-danger">Không tìm thấy kết quả !</p>'
+        '</div></body></html>'
+    )
+    root = Selector(text=html).root
+    assert is_no_results(html)
+    assert extract_violations(root) == []
+
+
+@pytest.mark.parametrize('text', [
+    'không tìm thấy kết quả',
+    'KHÔNG TÌM THẤY KẾT QUẢ',
+    'Không Tìm Thấy Kết Quả',
+    'No results found',
+])
+def test_is_no_results_casings(text):
+    assert is_no_results(f'<p>{text}</p>')
+
+
+def test_results_page_is_not_no_results():
+    assert not is_no_results(field('Biển kiểm soát:', '30A12345'))
+
+
+def pagination(*items):
+    """A pagination control; items are hrefs, or (href, True) for the current page"""
+    links = []
+    for href in items:
+        href, active = href if isinstance(href, tuple) else (href, False)
+        css = ' class="active"' if active else ''
+        links.append(f'<li{css}><a href="{href}">{href}</a></li>')
+    return page(f'<ul class="pagination">{"".join(links)}</ul>')
+
+
+def test_extract_page_links():
+    url = 'https://www.csgt.vn/ket-qua?page=2'
+    root = pagination('?page=1', ('?page=2', True), '?page=3', '#', 'javascript:void(0)', '?page=3', '/ket-qua?page=4')
+    links, current = extract_page_links(root, url)
+    assert links == [
+        'https://www.csgt.vn/ket-qua?page=1',
+        'https://www.csgt.vn/ket-qua?page=3',
+        'https://www.csgt.vn/ket-qua?page=4',
+    ]
+    assert current == [url]
+
+
+def test_extract_page_links_leaves_out_the_page_itself():
+    """A link back to the page is not another page, active or not"""
+    url = 'https://www.csgt.vn/ket-qua'
+    links, current = extract_page_links(pagination(('?page=1', True), 'ket-qua', '?page=2'), url)
+    assert links == ['https://www.csgt.vn/ket-qua?page=2']
+    assert current == ['https://www.csgt.vn/ket-qua?page=1']
+
+
+def test_extract_page_links_without_pagination():
+    assert extract_page_links(page(field('Biển kiểm soát:', '30A12345')), 'https://www.csgt.vn/ket-qua') == ([], [])
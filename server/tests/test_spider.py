@@ -0,0 +1,152 @@
+"""
+CsgtSpider lookup flow
+
+Crawls run on a CrawlEngine against a local port nothing listens on, so
+every download fails with a refused connection.
+"""
+
+import asyncio
+import socket
+from collections import deque
+
+import pytest
+from scrapy.http import Request, TextResponse
+from scrapy.settings import Settings
+from scrapy.utils.reactor import install_reactor
+from scrapy.utils.test import get_crawler
+
+from csgt_scraper.engine import CrawlEngine
+from csgt_scraper.spiders.csgt_spider import CsgtSpider, ResultPages
+
+
+def project_settings(**overrides):
+    settings = Settings()
+    settings.setmodule('csgt_scraper.settings', priority='project')
+    settings.setdict({'DOWNLOAD_DELAY': 0, 'RETRY_ENABLED': False, 'LOG_LEVEL': 'WARNING', **overrides},
+                     priority='cmdline')
+    return settings
+
+
+def refused_url():
+    """URL of a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/tra-cuu-phuong-tien-vi-pham.html'
+
+
+class RefusedSpider(CsgtSpider):
+    allowed_domains = ['127.0.0.1']
+    start_urls = [refused_url()]
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # The spider keeps captcha images in the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def reactor():
+    """The project's reactor, which get_crawler expects installed (no-op once it is)"""
+    install_reactor(project_settings().get('TWISTED_REACTOR'))
+
+
+def test_failed_requests_do_not_use_up_lookups():
+    """Every plate is tried and reported, though each lookup fails"""
+    plates = ['30A00001', '30A00002', '30A00003', '30A00004', '30A00005']
+
+    async def crawl():
+        engine = CrawlEngine(project_settings())
+        engine.start()
+        try:
+            return await asyncio.wait_for(
+                engine.collect(RefusedSpider, 'refused', plates=','.join(plates), concurrency=2), 60
+            )
+        finally:
+            await engine.stop()
+
+    items = asyncio.run(crawl())
+    assert sorted(item['license_plate'] for item in items) == plates
+    assert {item['status'] for item in items} == {'error'}
+    assert all('Request failed' in item['error_message'] for item in items)
+
+
+def test_ajax_parse_error_starts_next_plate(reactor):
+    crawler = get_crawler(CsgtSpider, project_settings().copy_to_dict())
+    spider = CsgtSpider.from_crawler(crawler, plates='30A00001,30A00002')
+    lookup = spider.new_lookup()
+    # No cookiejar in meta: following the results redirect fails
+    request = Request('https://www.csgt.vn/?mod=contact&task=tracuu_post&ajax', meta={'lookup': lookup})
+    response = TextResponse(request.url, body=b'{"success": true, "href": "/ket-qua"}', request=request)
+
+    output = list(spider.parse_ajax_response(response))
+    assert output[0]['license_plate'] == '30A00001'
+    assert output[0]['status'] == 'error'
+    assert isinstance(output[1], Request)
+    assert output[1].meta['lookup'].license_plate == '30A00002'
+
+
+def test_captcha_model_error_falls_back_to_ocr(reactor, tmp_path):
+    """Unreadable model weights leave the captcha to OCR"""
+    weights = tmp_path / 'captcha_model.npz'
+    weights.write_bytes(b'not a model')
+    crawler = get_crawler(CsgtSpider, project_settings(CAPTCHA_MODEL_PATH=str(weights)).copy_to_dict())
+    spider = CsgtSpider.from_crawler(crawler, license_plate='30A00001')
+
+    assert spider.solve_captcha_with_model(tmp_path / 'captcha.png') is None
+    assert crawler.stats.get_value('captcha/model/errors') == 1
+
+def follow_pages(site, first, max_pages=10):
+    """
+    Fetch results pages the way the spider does: claim the links of each
+    page, fetch what was claimed, until no page is pending
+
+    Args:
+        site: URL -> (links on the page, URLs the page calls itself, violations)
+
+    Returns:
+        (ResultPages, URLs in fetch order)
+    """
+    pages = ResultPages({}, max_pages)
+    fetched, todo = [], deque([first])
+    while todo:
+        url = todo.popleft()
+        if url != first:
+            pages.pending -= 1
+        fetched.append(url)
+        links, current, violations = site[url]
+        pages.add(url, violations, current)
+        todo.extend(pages.claim(links))
+        assert len(todo) == pages.pending
+    return pages, fetched
+
+
+def violation(time, fine):
+    return {'license_plate': '30A-123.45', 'violation_time': time, 'fine_amount': fine}
+
+
+def test_result_pages_follow_each_page_once():
+    """Pages linking back to themselves and to pages already seen are fetched once each"""
+    site = {
+        'p1': (['p2', 'p3'], ['p1?page=1'], [violation('08:00, 01/10/2025', '800.000 đ')]),
+        'p2': (['p1?page=1', 'p2', 'p3', 'p4'], ['p2'], [violation('09:00, 02/10/2025', '1.200.000 đ')]),
+        # The same violation as on p1, formatted differently
+        'p3': (['p1', 'p2', 'p4'], [], [violation('08:00:00, 01/10/2025', '800000')]),
+        'p4': (['p1?page=1', 'p3'], ['p4'], []),
+    }
+    pages, fetched = follow_pages(site, 'p1')
+    assert fetched == ['p1', 'p2', 'p3', 'p4']
+    assert list(pages.pages) == ['p1', 'p2', 'p3', 'p4']
+    assert pages.pending == 0
+    assert not pages.truncated
+    assert [v['violation_time'] for v in pages.violations()] == ['08:00, 01/10/2025', '09:00, 02/10/2025']
+
+
+def test_result_pages_stop_at_max_pages():
+    """Pages linking on forever end at max_pages"""
+    site = {f'p{i}': (['p1', f'p{i + 1}', f'p{i + 2}'], [], []) for i in range(1, 100)}
+    pages, fetched = follow_pages(site, 'p1', max_pages=5)
+    assert fetched == ['p1', 'p2', 'p3', 'p4', 'p5']
+    assert pages.pending == 0
+    assert pages.truncated
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Train the captcha character model
+
+Learns the classifier used by CaptchaSolver(method='model') and the spider's
+CAPTCHA_SOLVER = "model" setting from labeled captcha images.
+
+Labeled images are read from a directory, where the label is the file name
+up to the first underscore or dot (e.g. "64pnvp.png" or "64pnvp_20251015.png"),
+and/or from a captcha corpus, where every captcha the site accepted is labeled
+by the guess that was submitted.
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+# Add the project to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from csgt_scraper.utils.captcha_corpus import load_corpus_samples, load_labeled_images
+from csgt_scraper.utils.captcha_model import CAPTCHA_LENGTH, train_model
+
+
+def evaluate(model, samples):
+    """
+    Measure captcha and character accuracy
+
+    Returns:
+        Tuple of (captcha accuracy, character accuracy)
+    """
+    if not samples:
+        return 0.0, 0.0
+
+    captchas_correct = 0
+    chars_correct = 0
+    for image, label in samples:
+        text, _ = model.solve(image)
+        captchas_correct += text == label
+        chars_correct += sum(a == b for a, b in zip(text, label))
+
+    return captchas_correct / len(samples), chars_correct / (len(samples) * CAPTCHA_LENGTH)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Train the captcha character model")
+    parser.add_argument('labeled_dir', nargs='?', help="Directory of labeled captcha images")
+    parser.add_argument('--corpus', help="Captcha corpus directory to take accepted captchas from")
+    parser.add_argument('-o', '--output', default='models/captcha_model.npz', help="Weights file to write")
+    parser.add_argument('--epochs', type=int, default=300, help="Gradient descent steps")
+    parser.add_argument('--learning-rate', type=float, default=0.5, help="Step size")
+    parser.add_argument('--validation', type=float, default=0.2, help="Fraction held out for validation")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the validation split")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Captcha Model Training")
+    print("=" * 60)
+
+    if not args.labeled_dir and not args.corpus:
+        parser.error("give a labeled image directory and/or --corpus")
+
+    samples = []
+    if args.labeled_dir:
+        samples.extend(load_labeled_images(args.labeled_dir))
+    if args.corpus:
+        samples.extend(load_corpus_samples(args.corpus))
+    if not samples:
+        print("No labeled captchas found!")
+        sys.exit(1)
+
+    random.Random(args.seed).shuffle(samples)
+    split = int(len(samples) * (1 - args.validation))
+    train_samples, validation_samples = samples[:split], samples[split:]
+
+    print(f"Training on {len(train_samples)} captchas, validating on {len(validation_samples)}")
+    model = train_model(train_samples, epochs=args.epochs, learning_rate=args.learning_rate)
+
+    for name, subset in (('train', train_samples), ('validation', validation_samples)):
+        captcha_accuracy, char_accuracy = evaluate(model, subset)
+        print(f"{name:>10}: captcha accuracy {captcha_accuracy:.1%}, character accuracy {char_accuracy:.1%}")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    model.save(output)
+
+    print("=" * 60)
+    print(f"Model saved to: {output}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()